@@ -1,6 +1,5 @@
 import os
 
-import cloudinary
 from flask import Flask
 
 from .config import Config
@@ -27,22 +26,82 @@ def create_app(test_config=None):
         # Load test configuration
         app.config.from_mapping(test_config)
 
-    # Ensure the uploads directory exists
+    # Ensure the uploads and internal data directories exist
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['DATA_FOLDER'], exist_ok=True)
 
-    # Configure Cloudinary
-    if all(app.config['CLOUDINARY'].values()):
-        cloudinary.config(
-            cloud_name=app.config['CLOUDINARY']['cloud_name'],
-            api_key=app.config['CLOUDINARY']['api_key'],
-            api_secret=app.config['CLOUDINARY']['api_secret'],
-        )
+    # Time every request and serve the metrics at /metrics
+    from app.core.metrics import init_metrics
+
+    init_metrics(app)
+
+    # Set up the shared storage providers (also configures Cloudinary)
+    from app.modules.file_manager.storage.registry import StorageRegistry
+
+    StorageRegistry(app)
+
+    # Set up the assembly area for chunked uploads
+    from app.modules.file_manager.chunked_upload import ChunkedUploadManager
+
+    app.extensions['chunked_uploads'] = ChunkedUploadManager(
+        os.path.join(app.config['DATA_FOLDER'], 'chunked_uploads'), app.config['UPLOAD_CHUNK_SIZE']
+    )
+
+    # Set up the worker pool for multi-file uploads
+    from app.modules.file_manager.batch_upload import BatchUploader
+
+    app.extensions['batch_uploads'] = BatchUploader(app.config['UPLOAD_WORKERS'])
+
+    # Set up the thumbnail renderer and its cache
+    from app.modules.file_manager.thumbnails import ThumbnailService
+
+    app.extensions['thumbnails'] = ThumbnailService(
+        os.path.join(app.config['DATA_FOLDER'], 'thumbnails'),
+        app.config['THUMBNAIL_CACHE_MAX_BYTES'],
+        app.config['THUMBNAIL_WORKERS'],
+    )
+
+    # Set up the search index, kept current by storage signals and periodic crawls
+    from app.modules.file_manager.search import SearchCrawler
+    from app.modules.file_manager.search import SearchIndex
+
+    app.extensions['search_index'] = SearchIndex(
+        os.path.join(app.config['DATA_FOLDER'], 'search.db')
+    )
+    app.extensions['search_crawler'] = SearchCrawler(
+        app, app.extensions['search_index'], app.config['SEARCH_CRAWL_INTERVAL']
+    )
+    app.extensions['search_crawler'].start()
+
+    # Set up the replication of local writes made during Cloudinary outages
+    from app.modules.file_manager.sync import SyncEngine
+
+    app.extensions['sync_engine'] = SyncEngine(
+        app,
+        os.path.join(app.config['DATA_FOLDER'], 'sync.db'),
+        app.config['SYNC_WORKERS'],
+        app.config['SYNC_RATE_LIMIT'],
+        app.config['SYNC_BANDWIDTH_LIMIT'],
+    )
+    app.extensions['sync_engine'].start()
+
+    # Set up the hub pushing storage changes and upload progress to open pages
+    from app.modules.file_manager.events import EventHub
+
+    app.extensions['events'] = EventHub()
+
+    # Set up the shared event loop for concurrent remote storage calls
+    from app.core.async_runner import AsyncRunner
+
+    app.extensions['async_runner'] = AsyncRunner(app.config['ASYNC_WORKERS'])
 
     # Register blueprints
+    from app.modules.file_manager.api import api_bp
     from app.modules.file_manager.routes import file_manager_bp
     from app.modules.time_calculator.routes import time_calculator_bp
 
     app.register_blueprint(file_manager_bp)
+    app.register_blueprint(api_bp)
     app.register_blueprint(time_calculator_bp)
 
     return app
@@ -6,7 +6,58 @@ class Config:
 
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev')
     UPLOAD_FOLDER = 'uploads'
+    DATA_FOLDER = 'data'  # Internal state: usage ledger, indexes and caches
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
+    # Larger files are sent in parts of this size; must stay below MAX_CONTENT_LENGTH
+    UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+    UPLOAD_WORKERS = 4  # files of a multi-file upload written to storage in parallel
+    ASYNC_WORKERS = 16  # threads for blocking storage calls made from the shared event loop
+
+    # Thumbnails of local images (needs Pillow), cached under DATA_FOLDER
+    THUMBNAIL_WORKERS = 2  # thumbnails rendered at the same time
+    THUMBNAIL_CACHE_MAX_BYTES = 256 * 1024 * 1024  # 256MB
+
+    # Seconds between crawls reconciling the search index with each storage
+    SEARCH_CRAWL_INTERVAL = 60 * 60
+
+    # Store identical local files once, as hardlinks into a content-addressed blob store
+    # under DATA_FOLDER (which must then be on the same filesystem as UPLOAD_FOLDER)
+    LOCAL_STORAGE_DEDUP = os.environ.get('LOCAL_STORAGE_DEDUP', '').lower() in ('1', 'true')
+
+    # Mirror UPLOAD_FOLDER in memory and answer listings and usage from the mirror, following
+    # changes made outside the app (rsync, shares) with inotify, or on other systems by
+    # rescanning every LOCAL_STORAGE_POLL_INTERVAL seconds
+    LOCAL_STORAGE_WATCH = os.environ.get('LOCAL_STORAGE_WATCH', '').lower() in ('1', 'true')
+    LOCAL_STORAGE_POLL_INTERVAL = 60
+
+    # Hand local downloads to a front proxy: 'x-sendfile' (Apache, lighttpd),
+    # 'x-accel-redirect' (nginx, internal location mapping DOWNLOAD_ACCEL_PREFIX to
+    # UPLOAD_FOLDER) or '' to stream them from the application
+    DOWNLOAD_OFFLOAD = os.environ.get('DOWNLOAD_OFFLOAD', '')
+    DOWNLOAD_ACCEL_PREFIX = '/protected-uploads/'
+
+    # Storage providers to set up, by plugin name; their modules (and SDKs) are only imported
+    # when listed here. Requests use STORAGE_PRIMARY while it is set up and online, and
+    # STORAGE_FALLBACK (which must be listed) otherwise; writes made on the fallback during
+    # an outage are replayed to the primary once it is back
+    STORAGE_PROVIDERS = os.environ.get('STORAGE_PROVIDERS', 'local,cloudinary').split(',')
+    STORAGE_PRIMARY = os.environ.get('STORAGE_PRIMARY', 'cloudinary')
+    STORAGE_FALLBACK = os.environ.get('STORAGE_FALLBACK', 'local')
+
+    # Metadata cache for remote storage: 'memory' (per worker), 'sqlite' (shared by all
+    # workers through DATA_FOLDER) or '' to disable
+    STORAGE_CACHE_BACKEND = os.environ.get('STORAGE_CACHE_BACKEND', 'memory')
+    STORAGE_CACHE_TTL = 60  # seconds
+    STORAGE_CACHE_MAX_ENTRIES = 1024
+
+    # Keep copies of downloaded Cloudinary files under DATA_FOLDER and serve them locally
+    CLOUDINARY_LOCAL_TIER = os.environ.get('CLOUDINARY_LOCAL_TIER', '').lower() in ('1', 'true')
+    CLOUDINARY_LOCAL_TIER_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2GB
+
+    # Replay files stored locally during Cloudinary outages once it is back online
+    SYNC_WORKERS = 2  # operations replayed at the same time
+    SYNC_RATE_LIMIT = 5  # operations per second, 0 for no limit
+    SYNC_BANDWIDTH_LIMIT = 0  # uploaded bytes per second, 0 for no limit
 
     # Cloudinary configuration
     CLOUDINARY = {
@@ -0,0 +1,54 @@
+"""Shared event loop for running coroutines from synchronous request handlers."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import Any, Awaitable, Optional
+
+
+class AsyncRunner:
+    """Event loop running on its own thread for the lifetime of the application.
+
+    Request handlers stay synchronous and hand coroutines to ``run()``. Because every
+    request shares the one loop, async clients (and their connection pools) created on
+    it live across requests, and slow remote calls wait on the loop rather than each
+    holding a thread. Blocking fallbacks run through ``asyncio.to_thread`` on a bounded
+    executor.
+    """
+
+    def __init__(self, max_threads: int = 16):
+        """Start the loop thread.
+
+        Args:
+            max_threads: Size of the executor used by ``asyncio.to_thread``
+        """
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(
+            ThreadPoolExecutor(max_threads, thread_name_prefix='async-runner-blocking')
+        )
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name='async-runner', daemon=True
+        )
+        self._thread.start()
+
+    def run(self, coroutine: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and wait for its result.
+
+        The coroutine runs in a copy of the caller's context, so Flask's application
+        and request contexts are available inside it.
+
+        Args:
+            coroutine: Coroutine to run
+            timeout: Seconds to wait before giving up (optional)
+
+        Returns:
+            The coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def close(self):
+        """Stop the loop and its thread."""
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+        self.loop.close()
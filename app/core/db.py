@@ -0,0 +1,72 @@
+"""SQLite helpers shared by the application's on-disk ledgers and indexes."""
+
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """Per-thread SQLite connections to a single database file.
+
+    The database runs in WAL mode so several worker processes can read while one of
+    them writes. The schema script is applied once per connection.
+    """
+
+    def __init__(self, path: str, schema: str = ''):
+        """Initialize the store.
+
+        Args:
+            path: Path of the database file (parent directories are created)
+            schema: SQL script creating the tables, using IF NOT EXISTS
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.schema = schema
+        self._local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        """Get the calling thread's connection, opening it on first use.
+
+        Returns:
+            sqlite3.Connection: Connection in autocommit mode with row access by name.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            if self.schema:
+                conn.executescript(self.schema)
+            self._local.conn = conn
+        return conn
+
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        """Execute a single statement.
+
+        Args:
+            sql: SQL statement
+            params: Statement parameters
+
+        Returns:
+            sqlite3.Cursor: Cursor over the results.
+        """
+        return self.connection().execute(sql, params)
+
+    def executemany(self, sql: str, rows) -> sqlite3.Cursor:
+        """Execute a statement for every row inside one transaction.
+
+        Args:
+            sql: SQL statement
+            rows: Iterable of parameter tuples
+
+        Returns:
+            sqlite3.Cursor: Cursor of the statement.
+        """
+        conn = self.connection()
+        with conn:
+            conn.execute('BEGIN')
+            return conn.executemany(sql, rows)
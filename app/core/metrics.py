@@ -0,0 +1,303 @@
+"""In-process metrics exported in the Prometheus text format.
+
+Metrics are defined once at import time on the process-wide ``REGISTRY`` by the modules
+that record them, and served at ``/metrics`` by ``init_metrics``. Recording a value costs a
+dictionary lookup and an uncontended lock, so instrumentation stays on in production.
+Each worker process keeps its own values; scrape every worker (or run a single one)
+to see them all.
+"""
+
+from abc import ABC
+from abc import abstractmethod
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from flask import g
+from flask import request
+from flask import Response
+
+# Latency buckets in seconds, the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the text format."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    """Format label pairs as ``{name="value",...}``, escaping the values."""
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class CounterValue:
+    """Monotonically increasing value of one label combination."""
+
+    def __init__(self):
+        """Start at zero."""
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        """Increase the value."""
+        with self._lock:
+            self.value += amount
+
+
+class HistogramValue:
+    """Bucketed observations of one label combination."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        """Start with empty buckets."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record an observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self) -> Tuple[list, float]:
+        """Get the bucket counts and the sum of the observations."""
+        with self._lock:
+            return list(self.counts), self.sum
+
+    def time(self) -> 'Timer':
+        """Time a block of code into the histogram."""
+        return Timer(self)
+
+
+class Timer:
+    """Context manager observing the seconds spent in its block."""
+
+    def __init__(self, histogram: HistogramValue):
+        """Initialize the timer."""
+        self.histogram = histogram
+
+    def __enter__(self):
+        """Start timing."""
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Record the elapsed time."""
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class Metric(ABC):
+    """Named metric whose values are kept per combination of label values."""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Initialize the metric.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels values are recorded by
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Get the value of a combination of label values, creating it on first use."""
+        key = tuple(str(value) for value in values)
+        child = self._values.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f'{self.name} expects labels {self.labelnames}')
+            with self._lock:
+                child = self._values.setdefault(key, self._new_value())
+        return child
+
+    def samples(self) -> Iterator[str]:
+        """Yield the exposition lines of the metric."""
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.type}'
+        for key, value in sorted(self._values.copy().items()):
+            yield from self._value_samples(key, value)
+
+    @abstractmethod
+    def _new_value(self):
+        """Create the value of a new label combination."""
+        pass
+
+    @abstractmethod
+    def _value_samples(self, key: Tuple[str, ...], value) -> Iterable[str]:
+        """Format the exposition lines of one label combination."""
+        pass
+
+
+class Counter(Metric):
+    """Metric counting events or amounts."""
+
+    type = 'counter'
+
+    def inc(self, amount: float = 1):
+        """Increase the value of a metric without labels."""
+        self.labels().inc(amount)
+
+    def _new_value(self) -> CounterValue:
+        """Create a counter at zero."""
+        return CounterValue()
+
+    def _value_samples(self, key: Tuple[str, ...], value: CounterValue) -> Iterable[str]:
+        """Format a counter value."""
+        yield f'{self.name}{format_labels(self.labelnames, key)} {value.value}'
+
+
+class Histogram(Metric):
+    """Metric distributing observations (typically durations) into buckets."""
+
+    type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """Initialize the histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels values are recorded by
+            buckets: Upper bounds of the buckets, in increasing order
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_value(self) -> HistogramValue:
+        """Create empty buckets."""
+        return HistogramValue(self.buckets)
+
+    def _value_samples(self, key: Tuple[str, ...], value: HistogramValue) -> Iterable[str]:
+        """Format cumulative bucket counts, the sum and the count."""
+        counts, total = value.snapshot()
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            labels = format_labels(self.labelnames, key, f'le="{le}"')
+            yield f'{self.name}_bucket{labels} {cumulative}'
+        labels = format_labels(self.labelnames, key)
+        yield f'{self.name}_sum{labels} {total}'
+        yield f'{self.name}_count{labels} {cumulative}'
+
+
+class MetricsRegistry:
+    """Set of metrics rendered together."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get a counter, creating it on first use."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Get a histogram, creating it on first use."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[Metric]:
+        """Get a registered metric by name."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return ''.join(f'{line}\n' for metric in metrics for line in metric.samples())
+
+    def _register(self, metric: Metric) -> Metric:
+        """Register a metric, returning the existing one if the name is taken."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds',
+    'Time spent handling requests, until the response is handed to the server',
+    ('method', 'endpoint', 'status'),
+)
+REQUEST_BYTES = REGISTRY.counter(
+    'http_request_bytes_total', 'Request body bytes received', ('endpoint',)
+)
+RESPONSE_BYTES = REGISTRY.counter(
+    'http_response_bytes_total', 'Response body bytes sent', ('endpoint',)
+)
+
+
+def count_bytes(iterable: Iterable[bytes], counter: CounterValue) -> Iterator[bytes]:
+    """Pass a streamed response body through, counting its bytes."""
+    try:
+        for chunk in iterable:
+            counter.inc(len(chunk))
+            yield chunk
+    finally:
+        close = getattr(iterable, 'close', None)
+        if close is not None:
+            close()
+
+
+def start_timer():
+    """Remember when the request started."""
+    g.request_started = time.perf_counter()
+
+
+def record_request(response: Response) -> Response:
+    """Record the duration and the transferred bytes of a request."""
+    endpoint = request.endpoint or 'unmatched'
+    started = g.get('request_started')
+    if started is not None:
+        REQUEST_SECONDS.labels(request.method, endpoint, response.status_code).observe(
+            time.perf_counter() - started
+        )
+    if request.content_length:
+        REQUEST_BYTES.labels(endpoint).inc(request.content_length)
+
+    if response.content_length is not None:
+        RESPONSE_BYTES.labels(endpoint).inc(response.content_length)
+    elif response.is_streamed:
+        response.response = count_bytes(response.response, RESPONSE_BYTES.labels(endpoint))
+    return response
+
+
+def metrics_view() -> Response:
+    """Serve the metrics in the Prometheus text format."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+def init_metrics(app):
+    """Time every request of an application and serve the metrics at ``/metrics``."""
+    app.extensions['metrics'] = REGISTRY
+    app.before_request(start_timer)
+    app.after_request(record_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,179 @@
+"""Versioned JSON API of the file manager.
+
+Unlike the page routes, which redirect back to the listing after every change, these
+endpoints answer with only the data that changed: the stored items of an upload, the
+created folder or the removed paths. Each change costs the provider calls it needs and
+nothing more; the page patches its listing from the response.
+"""
+
+import os
+
+from flask import Blueprint
+from flask import current_app
+from flask import jsonify
+from flask import request
+from flask import Response
+from werkzeug.exceptions import HTTPException
+from werkzeug.utils import secure_filename
+
+from .constants import EVENTS_HEARTBEAT_INTERVAL
+from .events import stream_events
+from .routes import describe_usage
+from .routes import get_cloudinary_status
+from .routes import get_listing_args
+from .storage.factory import get_storage_provider
+from .storage.signals import collect_stored_items
+
+api_bp = Blueprint('file_manager_api', __name__, url_prefix='/api/v1')
+
+
+@api_bp.errorhandler(HTTPException)
+def handle_http_error(error):
+    """Report HTTP errors as JSON."""
+    return jsonify({'error': error.description}), error.code
+
+
+def error_response(message: str, status: int = 400):
+    """Build a JSON error response."""
+    return jsonify({'error': message}), status
+
+
+@api_bp.route('/items', methods=['GET'])
+def list_items():
+    """List a page of the files and folders at ``path``.
+
+    Takes the same pagination and sorting options as the listing page.
+    """
+    path = request.args.get('path', '')
+    listing_args = get_listing_args()
+
+    storage = get_storage_provider()
+    listing = storage.list_items(
+        path,
+        offset=(listing_args['page'] - 1) * listing_args['per_page'],
+        limit=listing_args['per_page'],
+        sort_by=listing_args['sort_by'],
+        reverse=listing_args['order'] == 'desc',
+        cursor=listing_args['cursor'],
+    )
+    pagination = dict(listing_args, total=listing['total'], next_cursor=listing['next_cursor'])
+    return jsonify({'path': path, 'items': listing['items'], 'pagination': pagination})
+
+
+@api_bp.route('/usage', methods=['GET'])
+def storage_usage():
+    """Report the used and total bytes of the active storage."""
+    storage = get_storage_provider()
+    try:
+        usage = storage.get_storage_usage()
+    except Exception as e:
+        usage = e
+    return jsonify(describe_usage(usage))
+
+
+@api_bp.route('/status', methods=['GET'])
+def storage_status():
+    """Report the active storage and the cached Cloudinary status, without a new check."""
+    storage = get_storage_provider()
+    return jsonify({'storage': storage.name, 'cloudinary': get_cloudinary_status(storage)})
+
+
+@api_bp.route('/upload', methods=['POST'])
+def upload_files():
+    """Upload one or more ``file`` fields to ``path``.
+
+    Answers with the result of every file and the listing items of the stored files.
+    """
+    path = request.form.get('path', '')
+    files = [file for file in request.files.getlist('file') if file.filename]
+    if not files:
+        return error_response('No file sent')
+
+    storage = get_storage_provider()
+    with collect_stored_items(storage.name) as items:
+        results = current_app.extensions['batch_uploads'].upload(storage, files, path)
+
+    failed = [result for result in results if not result['success']]
+    for result in failed:
+        current_app.logger.error(f"Upload of {result['filename']} failed: {result['error']}")
+
+    summary = {
+        'results': results,
+        'items': items,
+        'uploaded': len(results) - len(failed),
+        'failed': len(failed),
+    }
+    return jsonify(summary), 207 if failed else 201
+
+
+@api_bp.route('/folders', methods=['POST'])
+def create_folder():
+    """Create the folder ``name`` inside ``path`` and answer with its listing item."""
+    data = request.get_json(silent=True) or request.form
+    path = data.get('path', '')
+    name = secure_filename(data.get('name', ''))
+    if not name:
+        return error_response('Invalid folder name')
+
+    folder_path = os.path.join(path, name) if path else name
+    storage = get_storage_provider()
+    with collect_stored_items(storage.name) as items:
+        success, error = storage.create_folder(folder_path)
+    if not success:
+        current_app.logger.error(f'Create folder failed: {error}')
+        return error_response(error, 500)
+
+    item = items[0] if items else None
+    if item is None:
+        item = {'name': name, 'is_dir': True, 'size': 0, 'path': folder_path, 'modified': None}
+    return jsonify({'item': item}), 201
+
+
+@api_bp.route('/items', methods=['DELETE'])
+def delete_items():
+    """Delete the files in ``paths`` and the folder trees in ``folders``.
+
+    Takes a JSON body (or form fields). A single file costs one ``delete_file`` call and
+    anything else one ``delete_items`` call.
+    """
+    data = request.get_json(silent=True)
+    if data is not None:
+        paths, folders = data.get('paths') or [], data.get('folders') or []
+    else:
+        paths, folders = request.form.getlist('path'), request.form.getlist('folder')
+    if not paths and not folders:
+        return error_response('Nothing to delete')
+
+    storage = get_storage_provider()
+    if len(paths) == 1 and not folders:
+        success, error = storage.delete_file(paths[0])
+    else:
+        success, error = storage.delete_items(paths, folders)
+    if not success:
+        current_app.logger.error(f'Delete failed: {error}')
+        return error_response(error, 500)
+
+    return jsonify({'removed': paths + folders})
+
+
+@api_bp.route('/events', methods=['GET'])
+def events():
+    """Stream storage changes and upload progress as Server-Sent Events.
+
+    Events are 'stored' (``storage`` and ``items``), 'removed' (``storage`` and
+    ``paths``), 'progress' (chunked upload state) and 'resync' (events were missed, the
+    listing should be fetched again). Reconnecting browsers send ``Last-Event-ID`` and
+    get the events they missed.
+
+    Each open stream holds a server thread, so serve the app with threaded (or async)
+    workers.
+    """
+    hub = current_app.extensions['events']
+    subscription = hub.subscribe(request.headers.get('Last-Event-ID'))
+    response = Response(
+        stream_events(subscription, EVENTS_HEARTBEAT_INTERVAL), mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx would otherwise buffer the stream
+    response.call_on_close(lambda: hub.unsubscribe(subscription))
+    return response
@@ -0,0 +1,233 @@
+"""Streaming ZIP archives of stored files and folders."""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import io
+import posixpath
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+import zipfile
+
+from flask import current_app
+
+from .constants import ARCHIVE_BLOCK_SIZE
+from .constants import ARCHIVE_PREFETCH_BLOCKS
+from .constants import ARCHIVE_PREFETCH_WINDOW
+
+# Earliest timestamp a ZIP entry can hold
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+class ZipStreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink collecting the bytes ``zipfile`` produces.
+
+    Being unseekable makes ``zipfile`` write data descriptors after each entry instead
+    of seeking back to patch sizes, so the archive can be sent as it is built.
+    """
+
+    def __init__(self):
+        """Initialize an empty buffer."""
+        super().__init__()
+        self._chunks = []
+
+    def writable(self) -> bool:
+        """Report the buffer as writable."""
+        return True
+
+    def write(self, data) -> int:
+        """Collect bytes written by ``zipfile``."""
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        """Return and forget everything written since the last drain."""
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def read_blocks(open_stream: Callable[[], Any]) -> Iterator[bytes]:
+    """Read a stream block by block, closing it when done."""
+    with open_stream() as stream:
+        yield from iter(lambda: stream.read(ARCHIVE_BLOCK_SIZE), b'')
+
+
+class PrefetchedFile:
+    """Remote file read ahead on a worker thread into a bounded block queue.
+
+    At most ``max_blocks`` blocks are held per file, so memory stays flat however large
+    the file is. The worker stops as soon as ``cancelled`` is set.
+    """
+
+    def __init__(
+        self,
+        executor: ThreadPoolExecutor,
+        open_stream: Callable[[], Any],
+        cancelled: threading.Event,
+        max_blocks: int = ARCHIVE_PREFETCH_BLOCKS,
+    ):
+        """Start reading the file ahead.
+
+        Args:
+            executor: Pool running the read-ahead
+            open_stream: Callable opening the file as a readable binary stream
+            cancelled: Event telling the reader to stop
+            max_blocks: Maximum number of blocks buffered
+        """
+        self._queue = queue.Queue(max_blocks)
+        self._cancelled = cancelled
+        executor.submit(self._fill, open_stream)
+
+    def blocks(self) -> Iterator[bytes]:
+        """Yield the file's blocks in order, re-raising any read error."""
+        while True:
+            block = self._queue.get()
+            if block is None:
+                return
+            if isinstance(block, Exception):
+                raise block
+            yield block
+
+    def _fill(self, open_stream: Callable[[], Any]):
+        """Read the file into the queue, ending it with None or the error raised."""
+        try:
+            for block in read_blocks(open_stream):
+                if not self._put(block):
+                    return
+            self._put(None)
+        except Exception as e:
+            self._put(e)
+
+    def _put(self, value) -> bool:
+        """Queue a value, waiting for room unless the archive was abandoned."""
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(value, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+def archive_entries(storage, paths: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield the files to archive with their names inside the archive.
+
+    Each selected file or folder keeps its own name at the top of the archive; files
+    selected more than once are only included once. A selection that cannot be walked
+    is yielded as an item carrying an 'error'.
+
+    Args:
+        storage: Storage provider holding the files
+        paths: Selected files and folders
+
+    Yields:
+        Tuples of (archive name, file item)
+    """
+    seen = set()
+    for path in paths:
+        path = path.strip('/')
+        base = posixpath.dirname(path)
+        try:
+            for item in storage.walk_files(path):
+                if item['path'] not in seen:
+                    seen.add(item['path'])
+                    yield posixpath.relpath(item['path'], base or '.'), item
+        except Exception as e:
+            yield path or '/', {'path': path, 'error': str(e)}
+
+
+def zip_info(name: str, item: Dict[str, Any]) -> zipfile.ZipInfo:
+    """Build the ZIP entry header of a file item."""
+    date_time = ZIP_EPOCH
+    if item.get('modified'):
+        date_time = max(time.localtime(item['modified'])[:6], ZIP_EPOCH)
+    info = zipfile.ZipInfo(name, date_time=date_time)
+    info.compress_type = zipfile.ZIP_STORED
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def stream_archive(
+    storage, paths: List[str], window: int = ARCHIVE_PREFETCH_WINDOW
+) -> Iterator[bytes]:
+    """Generate a ZIP archive of the selected files and folders as it is built.
+
+    Entries are stored uncompressed (most uploads are already compressed media) and
+    written with ZIP64 headers, so multi-gigabyte files are fine. Files on local disk
+    are read directly; remote files are fetched ``window`` at a time ahead of the entry
+    being written, each through a bounded buffer. Files that fail to read are listed in
+    an ``ERRORS.txt`` entry instead of aborting the download.
+
+    Args:
+        storage: Storage provider holding the files
+        paths: Selected files and folders
+        window: Number of remote files fetched concurrently
+
+    Yields:
+        Consecutive pieces of the archive
+    """
+    app = current_app._get_current_object()
+    executor = ThreadPoolExecutor(window, thread_name_prefix='archive-prefetch')
+    cancelled = threading.Event()
+
+    def open_item(item):
+        def open_stream():
+            with app.app_context():
+                return storage.open_file(item)
+
+        return open_stream
+
+    def sources():
+        pending = deque()
+        entries = archive_entries(storage, paths)
+        for name, item in entries:
+            if item.get('error'):
+                source = None
+            elif storage.get_local_path(item['path']) is not None:
+                source = read_blocks(open_item(item))
+            else:
+                source = PrefetchedFile(executor, open_item(item), cancelled).blocks()
+            pending.append((name, item, source))
+            if len(pending) >= window:
+                yield pending.popleft()
+        yield from pending
+
+    buffer = ZipStreamBuffer()
+    try:
+        yield from (piece for piece in write_archive(buffer, sources()) if piece)
+    finally:
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def write_archive(buffer: ZipStreamBuffer, sources) -> Iterator[bytes]:
+    """Write archive entries into the buffer, yielding its content as it fills.
+
+    Args:
+        buffer: Buffer the ZIP file is written to
+        sources: Iterable of (archive name, file item, block iterator); items carrying an
+            'error' have no block iterator and are only reported
+
+    Yields:
+        Consecutive pieces of the archive (possibly empty)
+    """
+    failures = []
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for name, item, blocks in sources:
+            try:
+                if item.get('error'):
+                    raise IOError(item['error'])
+                with archive.open(zip_info(name, item), 'w', force_zip64=True) as entry:
+                    for block in blocks:
+                        entry.write(block)
+                        yield buffer.drain()
+            except Exception as e:
+                current_app.logger.error(f'Could not add {name} to archive: {e}')
+                failures.append(f'{name}: {e}')
+            yield buffer.drain()
+
+        if failures:
+            archive.writestr('ERRORS.txt', '\n'.join(failures) + '\n')
+    yield buffer.drain()
@@ -0,0 +1,82 @@
+"""Parallel uploads of several files, or whole folders, in one request."""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+import os
+import re
+from typing import Dict, List, Tuple
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+
+def split_relative_path(filename: str) -> Tuple[str, str]:
+    """Split an uploaded file's relative name into a safe folder and file name.
+
+    Folder uploads send names such as ``project/src/main.py``; every component is
+    sanitized, so ``..`` and absolute paths cannot escape the target folder.
+
+    Args:
+        filename: Name of the uploaded file, possibly with relative folders
+
+    Returns:
+        Tuple of (folder, filename), with an empty filename if nothing valid is left
+    """
+    parts = [secure_filename(part) for part in re.split(r'[\\/]', filename or '')]
+    parts = [part for part in parts if part]
+    if not parts:
+        return '', ''
+    return '/'.join(parts[:-1]), parts[-1]
+
+
+class BatchUploader:
+    """Dispatches the files of one request to a storage provider over a bounded pool.
+
+    The pool is shared by every request, so the number of concurrent provider writes
+    stays bounded however many batches arrive at once. Provider uploads are mostly I/O
+    (network for Cloudinary, disk for local storage), so threads overlap them well. Each
+    file is uploaded in a copy of the request's context, so ``collect_stored_items``
+    sees it.
+    """
+
+    def __init__(self, max_workers: int):
+        """Initialize the uploader.
+
+        Args:
+            max_workers: Maximum number of files uploaded at the same time
+        """
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='batch-upload')
+
+    def upload(self, storage, files: List, path: str) -> List[Dict]:
+        """Upload files in parallel and wait for all of them.
+
+        Args:
+            storage: Storage provider receiving the files
+            files: Uploaded files (``FileStorage`` objects)
+            path: Folder the files (and their relative folders) are uploaded to
+
+        Returns:
+            One result per file, in order, with filename, path, name, success and error
+        """
+        app = current_app._get_current_object()
+
+        def upload_one(file) -> Dict:
+            folder, filename = split_relative_path(file.filename)
+            target = os.path.join(path, folder) if path and folder else path or folder
+            result = {'filename': file.filename, 'path': target, 'name': filename}
+            if not filename:
+                return dict(result, success=False, error='Invalid file name')
+
+            with app.app_context():
+                try:
+                    success, error = storage.upload_file(file, target, filename)
+                except Exception as e:
+                    success, error = False, str(e)
+            return dict(result, success=success, error=error)
+
+        futures = [self._executor.submit(copy_context().run, upload_one, file) for file in files]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,258 @@
+"""Server-side assembly area for chunked uploads."""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from typing import Dict, Optional, Set
+import uuid
+
+from werkzeug.utils import secure_filename
+
+from .constants import UPLOAD_SESSION_TTL
+
+COPY_BUFFER_SIZE = 64 * 1024
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ChunkedUploadError(Exception):
+    """Raised when a chunked upload request is invalid.
+
+    Attributes:
+        status_code: HTTP status code describing the error
+    """
+
+    def __init__(self, message: str, status_code: int = 400):
+        """Initialize the error.
+
+        Args:
+            message: Error message
+            status_code: HTTP status code describing the error
+        """
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ChunkedUploadManager:
+    """Assembles uploads sent as fixed-size parts.
+
+    Each upload session lives in its own directory with a ``session.json`` manifest, a
+    preallocated ``data`` file that every part is written into at its own offset, and a
+    marker file per received part holding its SHA-256 digest. Parts are copied from the
+    request stream in small blocks, so memory per upload stays constant whatever the file
+    size, and any worker process can accept any part. Sessions can be resumed: ``status()``
+    reports what is already held so clients only send the missing parts.
+    """
+
+    def __init__(self, root: str, chunk_size: int, session_ttl: float = UPLOAD_SESSION_TTL):
+        """Initialize the manager.
+
+        Args:
+            root: Directory holding the upload sessions
+            chunk_size: Size in bytes of every part but the last
+            session_ttl: Seconds after which unfinished sessions are discarded
+        """
+        self.root = root
+        self.chunk_size = chunk_size
+        self.session_ttl = session_ttl
+        os.makedirs(root, exist_ok=True)
+
+    def create(self, path: str, filename: str, size: int) -> Dict:
+        """Start an upload session.
+
+        Args:
+            path: Storage folder the file is uploaded to
+            filename: Name of the file
+            size: Total size of the file in bytes
+
+        Returns:
+            The session manifest
+
+        Raises:
+            ChunkedUploadError: If the file name or size is invalid
+        """
+        safe_filename = secure_filename(filename or '')
+        if not safe_filename:
+            raise ChunkedUploadError('Invalid file name')
+        if size < 0:
+            raise ChunkedUploadError('Invalid file size')
+        if shutil.disk_usage(self.root).free < size:
+            raise ChunkedUploadError('Not enough disk space for this upload', 507)
+
+        self.cleanup_expired()
+
+        session = {
+            'id': uuid.uuid4().hex,
+            'path': path,
+            'filename': safe_filename,
+            'size': size,
+            'chunk_size': self.chunk_size,
+            'chunks': max(1, -(-size // self.chunk_size)),
+            'created_at': time.time(),
+        }
+        session_dir = self._session_dir(session['id'])
+        os.makedirs(os.path.join(session_dir, 'chunks'))
+        with open(os.path.join(session_dir, 'data'), 'wb') as f:
+            f.truncate(size)
+        with open(os.path.join(session_dir, 'session.json'), 'w') as f:
+            json.dump(session, f)
+        return session
+
+    def get(self, upload_id: str) -> Dict:
+        """Load a session manifest.
+
+        Args:
+            upload_id: Session identifier
+
+        Returns:
+            The session manifest
+
+        Raises:
+            ChunkedUploadError: If the session does not exist
+        """
+        try:
+            with open(os.path.join(self._session_dir(upload_id), 'session.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ChunkedUploadError('Upload session not found', 404)
+
+    def write_chunk(
+        self, upload_id: str, index: int, stream, checksum: Optional[str] = None
+    ) -> int:
+        """Copy one part from a stream into the session's data file.
+
+        The part is hashed while it is copied. A part is only marked as received once
+        its length (and checksum, when given) is verified, so a rejected or interrupted
+        part is simply reported as missing and can be sent again.
+
+        Args:
+            upload_id: Session identifier
+            index: Zero-based part number
+            stream: Readable binary stream with the part's bytes
+            checksum: Expected hex SHA-256 digest of the part (optional)
+
+        Returns:
+            Number of bytes written
+
+        Raises:
+            ChunkedUploadError: If the part number, length or checksum is invalid
+        """
+        session = self.get(upload_id)
+        if not 0 <= index < session['chunks']:
+            raise ChunkedUploadError('Invalid chunk index')
+
+        offset = index * session['chunk_size']
+        expected = min(session['chunk_size'], session['size'] - offset)
+        marker = os.path.join(self._session_dir(upload_id), 'chunks', str(index))
+        if os.path.exists(marker):
+            # The part is being replaced; it is missing until the new copy is verified
+            os.remove(marker)
+
+        digest = hashlib.sha256()
+        written = 0
+        with open(os.path.join(self._session_dir(upload_id), 'data'), 'r+b') as f:
+            f.seek(offset)
+            while written < expected:
+                block = stream.read(min(COPY_BUFFER_SIZE, expected - written))
+                if not block:
+                    break
+                f.write(block)
+                digest.update(block)
+                written += len(block)
+
+        if written != expected or stream.read(1):
+            raise ChunkedUploadError(f'Chunk {index} must be exactly {expected} bytes')
+        if checksum and checksum.lower() != digest.hexdigest():
+            raise ChunkedUploadError(f'Chunk {index} checksum mismatch', 422)
+
+        with open(marker, 'w') as f:
+            f.write(digest.hexdigest())
+        return written
+
+    def status(self, upload_id: str) -> Dict:
+        """Describe what the server already holds for a session.
+
+        Args:
+            upload_id: Session identifier
+
+        Returns:
+            The session manifest plus the received and missing part numbers, the number
+            of bytes received and the received byte ranges as [start, end) pairs
+        """
+        session = self.get(upload_id)
+        received = sorted(self.received_chunks(upload_id))
+        chunk_size = session['chunk_size']
+
+        ranges = []
+        for index in received:
+            start = index * chunk_size
+            end = min(start + chunk_size, session['size'])
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+
+        return dict(
+            session,
+            received=received,
+            missing=sorted(set(range(session['chunks'])) - set(received)),
+            bytes_received=sum(end - start for start, end in ranges),
+            ranges=ranges,
+        )
+
+    def received_chunks(self, upload_id: str) -> Set[int]:
+        """Get the part numbers received so far.
+
+        Args:
+            upload_id: Session identifier
+
+        Returns:
+            Set of received part numbers
+        """
+        chunks_dir = os.path.join(self._session_dir(upload_id), 'chunks')
+        try:
+            return {int(name) for name in os.listdir(chunks_dir)}
+        except FileNotFoundError:
+            raise ChunkedUploadError('Upload session not found', 404)
+
+    def data_path(self, upload_id: str) -> str:
+        """Get the path of a complete session's assembled file.
+
+        Args:
+            upload_id: Session identifier
+
+        Returns:
+            Path of the assembled file
+
+        Raises:
+            ChunkedUploadError: If parts are still missing
+        """
+        session = self.get(upload_id)
+        missing = session['chunks'] - len(self.received_chunks(upload_id))
+        if missing:
+            raise ChunkedUploadError(f'{missing} chunk(s) still missing', 409)
+        return os.path.join(self._session_dir(upload_id), 'data')
+
+    def discard(self, upload_id: str):
+        """Delete a session and its data.
+
+        Args:
+            upload_id: Session identifier
+        """
+        shutil.rmtree(self._session_dir(upload_id), ignore_errors=True)
+
+    def cleanup_expired(self):
+        """Delete sessions that were not completed within the session TTL."""
+        deadline = time.time() - self.session_ttl
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_dir() and entry.stat().st_mtime < deadline:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+
+    def _session_dir(self, upload_id: str) -> str:
+        """Get a session's directory, rejecting malformed identifiers."""
+        if not UPLOAD_ID_PATTERN.match(upload_id or ''):
+            raise ChunkedUploadError('Upload session not found', 404)
+        return os.path.join(self.root, upload_id)
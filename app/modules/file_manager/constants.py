@@ -8,5 +8,57 @@ ALLOWED_VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.webm'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
 ALLOWED_EXTENSIONS = ALLOWED_IMAGE_EXTENSIONS.union(ALLOWED_VIDEO_EXTENSIONS)
 
+# Chunked upload settings
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # unfinished chunked uploads are discarded after a day
+
+# Listing settings
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Cloudinary API settings
+CLOUDINARY_MAX_RESULTS = 500  # largest page the Admin API returns
+CLOUDINARY_API_WORKERS = 4  # threads for concurrent Admin API calls
+CLOUDINARY_UPLOAD_CHUNK_SIZE = 20 * 1024 * 1024  # part size used by upload_large
+CLOUDINARY_DELETE_BATCH_SIZE = 100  # most public ids delete_resources takes per call
+CLOUDINARY_ASYNC_MAX_CONNECTIONS = 10  # pooled connections of the async Admin API client
+
 # Cache settings
 CLOUDINARY_STATUS_CACHE_TTL = 300  # 5 minutes
+
+# Local storage usage ledger
+LOCAL_USAGE_RECONCILE_INTERVAL = 3600  # seconds between full rescans of the upload folder
+
+# Circuit breaker settings for Cloudinary health checks
+CLOUDINARY_FAILURE_THRESHOLD = 3  # consecutive failures before the circuit opens
+CLOUDINARY_BACKOFF_BASE = 5  # seconds before the first retry
+CLOUDINARY_BACKOFF_MAX = 300  # upper bound for the retry delay
+
+# Streaming archive downloads
+ARCHIVE_BLOCK_SIZE = 64 * 1024  # bytes read from a file per write into the archive
+ARCHIVE_PREFETCH_WINDOW = 4  # remote files fetched ahead of the one being archived
+ARCHIVE_PREFETCH_BLOCKS = 16  # blocks buffered per prefetched file (1 MB)
+REMOTE_READ_TIMEOUT = 30  # seconds
+
+# Image thumbnails
+THUMBNAIL_SIZES = (128, 512)  # listing thumbnail and preview, largest side in pixels
+THUMBNAIL_RENDER_TIMEOUT = 30  # seconds a request waits for a thumbnail to render
+THUMBNAIL_MAX_AGE = 365 * 24 * 60 * 60  # thumbnail URLs are versioned by modification time
+
+# Search index
+SEARCH_MAX_RESULTS = 200  # results returned by one search
+SEARCH_CRAWL_BATCH_SIZE = 500  # crawled items written per transaction
+
+# Local tier in front of remote storage
+TIER_FETCH_WORKERS = 2  # remote files copied into the tier at the same time
+TIER_BLOCK_SIZE = 64 * 1024  # bytes read from the remote file per write
+TIER_REVALIDATE_INTERVAL = 60 * 60  # seconds before a copy is checked against the remote
+TIER_TOUCH_INTERVAL = 60  # seconds between last-access updates of a copy
+
+# Replication of local writes to Cloudinary
+SYNC_POLL_INTERVAL = 10  # seconds between outbox checks while entries are waiting
+SYNC_BLOCK_SIZE = 64 * 1024  # bytes read per step when hashing a file
+
+# Live updates (Server-Sent Events)
+EVENTS_HEARTBEAT_INTERVAL = 15  # seconds between keep-alive comments on an idle stream
+EVENTS_HISTORY_SIZE = 256  # recent events replayed to reconnecting pages
+EVENTS_QUEUE_SIZE = 256  # events queued per page before it is told to resync
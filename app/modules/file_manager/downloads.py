@@ -0,0 +1,123 @@
+"""Streaming downloads of files kept on local disk, or relayed from remote storage."""
+
+import os
+from typing import BinaryIO, Optional
+from urllib.parse import quote
+
+from flask import current_app
+from flask import request
+from flask import Response
+from werkzeug.utils import send_file
+
+X_SENDFILE = 'x-sendfile'
+X_ACCEL_REDIRECT = 'x-accel-redirect'
+
+
+def file_etag(stat: os.stat_result) -> str:
+    """Build a strong ETag from a file's size and modification time.
+
+    Args:
+        stat: Result of ``os.stat`` for the file
+
+    Returns:
+        The ETag value (without quotes)
+    """
+    return f'{stat.st_size:x}-{stat.st_mtime_ns:x}'
+
+
+def send_local_file(full_path: str, download_name: Optional[str] = None) -> Response:
+    """Send a local file as an attachment.
+
+    By default the file is streamed by the application, answering ``Range`` requests
+    with partial content and ``If-None-Match``/``If-Modified-Since`` with 304. When the
+    WSGI server provides ``wsgi.file_wrapper`` the copy is done with ``sendfile()``.
+    ``DOWNLOAD_OFFLOAD`` hands the transfer to a front proxy instead: ``x-sendfile``
+    (Apache, lighttpd) sends the absolute path, ``x-accel-redirect`` (nginx) sends the
+    path relative to ``UPLOAD_FOLDER`` under ``DOWNLOAD_ACCEL_PREFIX`` (files outside
+    it, such as copies in a storage tier, are streamed by the application).
+
+    Args:
+        full_path: Absolute path of the file
+        download_name: Name the file is saved as (defaults to its own name)
+
+    Returns:
+        The download response
+    """
+    download_name = download_name or os.path.basename(full_path)
+    offload = current_app.config.get('DOWNLOAD_OFFLOAD')
+    if offload == X_ACCEL_REDIRECT and in_upload_folder(full_path):
+        return accel_redirect_response(full_path, download_name)
+
+    stat = os.stat(full_path)
+    response = send_file(
+        full_path,
+        request.environ,
+        as_attachment=True,
+        download_name=download_name,
+        conditional=True,
+        etag=file_etag(stat),
+        last_modified=stat.st_mtime,
+        use_x_sendfile=offload == X_SENDFILE,
+        response_class=current_app.response_class,
+    )
+    # Advertise range support on full responses too, so clients know they can resume
+    response.accept_ranges = 'bytes'
+    return response
+
+
+def send_stream(stream: BinaryIO, size: int, download_name: str) -> Response:
+    """Send an open stream as an attachment, closing it once the response is done.
+
+    Used for remote files relayed by the application; ranges and conditional requests
+    are not supported, as the stream can only be read once from the start.
+
+    Args:
+        stream: Readable binary stream
+        size: Number of bytes the stream holds
+        download_name: Name the file is saved as
+
+    Returns:
+        The download response
+    """
+    response = send_file(
+        stream,
+        request.environ,
+        as_attachment=True,
+        download_name=download_name,
+        conditional=False,
+        etag=False,
+        response_class=current_app.response_class,
+    )
+    response.content_length = size
+    return response
+
+
+def in_upload_folder(full_path: str) -> bool:
+    """Check whether a path lies inside ``UPLOAD_FOLDER``."""
+    root = os.path.abspath(current_app.config['UPLOAD_FOLDER'])
+    return os.path.commonpath([root, os.path.abspath(full_path)]) == root
+
+
+def accel_redirect_response(full_path: str, download_name: str) -> Response:
+    """Build an empty response asking nginx to serve the file itself.
+
+    nginx handles ranges and conditional requests for the internal location, so only
+    the headers describing the attachment are set here.
+
+    Args:
+        full_path: Absolute path of a file under ``UPLOAD_FOLDER``
+        download_name: Name the file is saved as
+
+    Returns:
+        The response carrying the ``X-Accel-Redirect`` header
+    """
+    root = os.path.abspath(current_app.config['UPLOAD_FOLDER'])
+    relative_path = os.path.relpath(full_path, root).replace(os.sep, '/')
+    prefix = current_app.config['DOWNLOAD_ACCEL_PREFIX'].rstrip('/')
+
+    response = current_app.response_class()
+    response.headers['X-Accel-Redirect'] = f'{prefix}/{quote(relative_path)}'
+    response.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(download_name)}"
+    # Let nginx pick the content type from the file
+    del response.headers['Content-Type']
+    return response
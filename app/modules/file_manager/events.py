@@ -0,0 +1,186 @@
+"""Live file manager updates, pushed to browsers as Server-Sent Events.
+
+Storage write paths already send ``items_stored`` and ``items_removed``; the receivers
+below publish them on the application's ``EventHub``, together with chunked upload
+progress. Each open page keeps one idle ``/api/v1/events`` connection and patches its
+listing from the events instead of reloading.
+
+The hub is per process: with several worker processes, a page only hears about changes
+made through the worker serving its connection.
+"""
+
+from collections import deque
+import itertools
+import json
+import queue
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+import uuid
+
+from flask import current_app
+
+from .constants import EVENTS_HISTORY_SIZE
+from .constants import EVENTS_QUEUE_SIZE
+from .storage.signals import items_removed
+from .storage.signals import items_stored
+
+# Sent to a subscriber that missed events; the page reloads its listing
+RESYNC = 'resync'
+
+
+class Subscription:
+    """Queue of the events published to one connection."""
+
+    def __init__(self, maxsize: int):
+        """Initialize an empty queue holding up to ``maxsize`` events."""
+        self._queue = queue.Queue(maxsize)
+        self.closed = False
+
+    def put(self, event: Dict[str, Any]):
+        """Queue an event; a subscriber too slow to keep up is told to resync instead."""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._drain()
+            self._queue.put_nowait({'id': event['id'], 'type': RESYNC, 'data': {}})
+
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait for the next event, or return None after the timeout."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        """End the subscription, waking up its reader."""
+        self.closed = True
+        self._drain()
+        self._queue.put_nowait(None)
+
+    def _drain(self):
+        """Drop every queued event."""
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+
+class EventHub:
+    """In-process publish/subscribe hub for file manager events.
+
+    Recent events are kept, so a browser reconnecting with ``Last-Event-ID`` gets what
+    it missed. Event ids carry a token of the hub, so ids from another process (or from
+    before a restart) are recognized and answered with a resync.
+    """
+
+    def __init__(
+        self, history_size: int = EVENTS_HISTORY_SIZE, queue_size: int = EVENTS_QUEUE_SIZE
+    ):
+        """Initialize the hub.
+
+        Args:
+            history_size: Recent events kept for reconnecting subscribers
+            queue_size: Events queued per subscriber before it is told to resync
+        """
+        self.queue_size = queue_size
+        self.token = uuid.uuid4().hex[:8]
+        self._history = deque(maxlen=history_size)
+        self._counter = itertools.count(1)
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Send an event to every subscriber.
+
+        Args:
+            event_type: Event name, such as 'stored', 'removed' or 'progress'
+            data: JSON-serializable payload
+
+        Returns:
+            The event, with its id
+        """
+        with self._lock:
+            event = {'id': f'{self.token}-{next(self._counter)}', 'type': event_type, 'data': data}
+            self._history.append(event)
+            for subscription in self._subscribers:
+                subscription.put(event)
+        return event
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscription:
+        """Open a subscription, replaying the events after ``last_event_id`` if given."""
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            if last_event_id:
+                for event in self._missed_events(last_event_id):
+                    subscription.put(event)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Close a subscription and stop sending it events."""
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+        subscription.close()
+
+    def close(self):
+        """Close every subscription, ending their streams."""
+        with self._lock:
+            subscriptions, self._subscribers = self._subscribers, []
+        for subscription in subscriptions:
+            subscription.close()
+
+    def subscriber_count(self) -> int:
+        """Get the number of open subscriptions."""
+        with self._lock:
+            return len(self._subscribers)
+
+    def _missed_events(self, last_event_id: str) -> List[Dict[str, Any]]:
+        """Get the events after an id, or a resync if they are no longer known."""
+        for position, event in enumerate(self._history):
+            if event['id'] == last_event_id:
+                return list(itertools.islice(self._history, position + 1, None))
+        return [{'id': last_event_id, 'type': RESYNC, 'data': {}}]
+
+
+def format_event(event: Dict[str, Any]) -> str:
+    """Format an event in the text/event-stream format."""
+    data = json.dumps(event['data'], separators=(',', ':'))
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+def stream_events(subscription: Subscription, heartbeat: float) -> Iterator[str]:
+    """Yield a subscription's events as they come, with a comment line while idle.
+
+    The comments keep proxies from closing the connection and let the server notice
+    clients that went away.
+    """
+    yield 'retry: 3000\n\n'
+    while not subscription.closed:
+        event = subscription.get(heartbeat)
+        if event is None:
+            if not subscription.closed:
+                yield ': keep-alive\n\n'
+        else:
+            yield format_event(event)
+
+
+def publish(event_type: str, data: Dict[str, Any]):
+    """Publish an event on the current application's hub, never raising."""
+    try:
+        current_app.extensions['events'].publish(event_type, data)
+    except Exception as e:
+        current_app.logger.error(f'Could not publish {event_type} event: {e}')
+
+
+@items_stored.connect
+def publish_stored_items(sender, items: List[Dict[str, Any]], **extra):
+    """Tell open pages about stored files and folders."""
+    publish('stored', {'storage': sender.name, 'items': items})
+
+
+@items_removed.connect
+def publish_removed_items(sender, paths: List[str], **extra):
+    """Tell open pages about deleted files and folders."""
+    publish('removed', {'storage': sender.name, 'paths': paths})
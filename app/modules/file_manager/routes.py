@@ -1,37 +1,96 @@
 """File manager routes module."""
 
+import asyncio
 import os
 
+from flask import abort
 from flask import Blueprint
 from flask import current_app
+from flask import jsonify
 from flask import redirect
 from flask import render_template
 from flask import request
+from flask import Response
+from flask import send_file
+from flask import stream_with_context
 from flask import url_for
 from werkzeug.utils import secure_filename
 
+from .archive import stream_archive
+from .chunked_upload import ChunkedUploadError
+from .constants import ALLOWED_IMAGE_EXTENSIONS
+from .constants import DEFAULT_PAGE_SIZE
+from .constants import MAX_PAGE_SIZE
+from .constants import SEARCH_MAX_RESULTS
+from .constants import THUMBNAIL_MAX_AGE
+from .constants import THUMBNAIL_SIZES
+from .downloads import send_local_file
+from .downloads import send_stream
+from .events import publish
+from .search import SEARCH_MODES
+from .storage.base import SORT_FIELDS
 from .storage.factory import get_storage_provider
+from .storage.signals import collect_stored_items
 
 file_manager_bp = Blueprint(
     'file_manager', __name__, template_folder='templates', static_folder='static', url_prefix='/'
 )
 
 
-@file_manager_bp.route('/')
-def index():
-    """List files and directories at the given path."""
-    path = request.args.get('path', '')
+def get_listing_args():
+    """Read the listing pagination and sorting options from the query string.
+
+    Returns:
+        Dictionary with page, per_page, sort_by, order and cursor.
+    """
+    per_page = request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int)
+    sort_by = request.args.get('sort', 'name')
+    return {
+        'page': max(request.args.get('page', 1, type=int), 1),
+        'per_page': min(max(per_page, 1), MAX_PAGE_SIZE),
+        'sort_by': sort_by if sort_by in SORT_FIELDS else 'name',
+        'order': 'desc' if request.args.get('order') == 'desc' else 'asc',
+        'cursor': request.args.get('cursor'),
+    }
+
+
+def run_async(coroutine):
+    """Run a coroutine on the application's shared event loop and return its result."""
+    return current_app.extensions['async_runner'].run(coroutine)
+
+
+async def load_listing_and_usage(storage, path: str, listing_args: dict) -> list:
+    """Fetch a listing page and the storage usage concurrently.
+
+    Returns:
+        List of [listing, usage], each the result or the exception it raised.
+    """
+    return await asyncio.gather(
+        storage.list_items_async(
+            path,
+            offset=(listing_args['page'] - 1) * listing_args['per_page'],
+            limit=listing_args['per_page'],
+            sort_by=listing_args['sort_by'],
+            reverse=listing_args['order'] == 'desc',
+            cursor=listing_args['cursor'],
+        ),
+        storage.get_storage_usage_async(),
+        return_exceptions=True,
+    )
 
-    # Get the current storage
-    storage = get_storage_provider()
-    items = storage.list_items(path)
 
-    # List to store information from all storages
-    all_storages = []
+def describe_usage(storage_usage) -> dict:
+    """Normalize a storage usage report for display.
 
-    # Get information from the current storage
+    Args:
+        storage_usage: Result of get_storage_usage, or the exception it raised
+
+    Returns:
+        Dictionary with used and total bytes, the storage name and is_active.
+    """
     try:
-        storage_usage = storage.get_storage_usage()
+        if isinstance(storage_usage, Exception):
+            raise storage_usage
 
         # Check if the values are nested dictionaries or direct values
         used = storage_usage.get('used', 0)
@@ -55,12 +114,39 @@ def index():
             'is_active': True,  # Indicates this is the current storage
         }
 
-        all_storages.append(current_storage)
-
     except Exception as e:
         current_app.logger.error(f'Error getting storage usage: {e}')
         current_storage = {'used': 0, 'total': 1, 'name': 'Error Storage', 'is_active': True}
-        all_storages.append(current_storage)
+    return current_storage
+
+
+def get_cloudinary_status(storage) -> dict:
+    """Get the cached Cloudinary status (refreshed by the background health monitor)."""
+    status_checker = getattr(storage, 'status_checker', None)
+    if status_checker:
+        return status_checker.get_status()
+    return {'configured': False, 'online': False, 'error': False}
+
+
+@file_manager_bp.route('/')
+def index():
+    """List files and directories at the given path."""
+    path = request.args.get('path', '')
+    listing_args = get_listing_args()
+
+    # Get the current storage
+    storage = get_storage_provider()
+    listing, storage_usage = run_async(load_listing_and_usage(storage, path, listing_args))
+    if isinstance(listing, Exception):
+        raise listing
+    pagination = dict(listing_args, total=listing['total'], next_cursor=listing['next_cursor'])
+
+    # List to store information from all storages
+    all_storages = []
+
+    # Get information from the current storage
+    current_storage = describe_usage(storage_usage)
+    all_storages.append(current_storage)
 
     # In the future, you can add other storages to the all_storages list here
     # Example:
@@ -76,51 +162,184 @@ def index():
     # except Exception as e:
     #     current_app.logger.error(f'Error getting other storage usage: {e}')
 
-    # Get Cloudinary status from storage if it's CloudinaryStorage
-    cloudinary_status = getattr(storage, 'status_checker', None)
-    if cloudinary_status:
-        cloudinary_status = cloudinary_status.check_status()
-    else:
-        cloudinary_status = {'configured': False, 'online': False, 'error': False}
+    cloudinary_status = get_cloudinary_status(storage)
 
     return render_template(
         'index.html',
-        items=items,
+        items=listing['items'],
+        pagination=pagination,
         current_path=path,
         cloudinary_status=cloudinary_status,
         storage_usage=current_storage,  # Maintains compatibility with the current template
         all_storages=all_storages,  # New variable for multiple storages
+        image_extensions=tuple(ALLOWED_IMAGE_EXTENSIONS),
+        thumbnails_enabled=current_app.extensions['thumbnails'].enabled,
+        storage_name=storage.name,
     )
 
 
+@file_manager_bp.route('/search')
+def search():
+    """Search the active storage's files and folders by name.
+
+    Answered from the search index alone. Takes ``q`` (the text), ``mode`` ('substring'
+    or 'prefix'), ``ext`` (an extension filter), ``path`` (a folder to search below) and
+    ``limit``.
+    """
+    query = request.args.get('q', '')
+    mode = request.args.get('mode', 'substring')
+    mode = mode if mode in SEARCH_MODES else 'substring'
+    extension = request.args.get('ext') or None
+    path = request.args.get('path', '')
+    limit = min(max(request.args.get('limit', SEARCH_MAX_RESULTS, type=int), 1), SEARCH_MAX_RESULTS)
+
+    storage = get_storage_provider()
+    results = current_app.extensions['search_index'].search(
+        storage.name, query, mode=mode, extension=extension, folder=path, limit=limit
+    )
+
+    if wants_json():
+        return jsonify({'storage': storage.name, 'results': results})
+    return render_template(
+        'search.html',
+        results=results,
+        query=query,
+        mode=mode,
+        extension=extension or '',
+        current_path=path,
+        limit=limit,
+    )
+
+
+def wants_json() -> bool:
+    """Check whether the client prefers a JSON response over an HTML page."""
+    best = request.accept_mimetypes.best_match(['text/html', 'application/json'])
+    return best == 'application/json'
+
+
 @file_manager_bp.route('/upload', methods=['POST'])
 def upload_file():
-    """Handle file upload."""
+    """Handle the upload of one or more files.
+
+    Several ``file`` fields may be sent at once. Names holding relative folders (as
+    sent for folder uploads) recreate those folders below the target path. Clients
+    asking for JSON get the result of every file instead of a redirect.
+    """
     path = request.form.get('path', '')
+    files = [file for file in request.files.getlist('file') if file.filename]
+
+    results = []
+    if files:
+        uploader = current_app.extensions['batch_uploads']
+        results = uploader.upload(get_storage_provider(), files, path)
+
+    failed = [result for result in results if not result['success']]
+    for result in failed:
+        current_app.logger.error(f"Upload of {result['filename']} failed: {result['error']}")
+
+    if wants_json():
+        summary = {
+            'results': results,
+            'uploaded': len(results) - len(failed),
+            'failed': len(failed),
+        }
+        return jsonify(summary), 207 if failed else 200
+
+    return redirect(url_for('file_manager.index', path=path))
+
+
+@file_manager_bp.errorhandler(ChunkedUploadError)
+def handle_chunked_upload_error(error):
+    """Report chunked upload errors as JSON."""
+    return jsonify({'error': str(error)}), error.status_code
+
+
+@file_manager_bp.route('/upload/chunked', methods=['POST'])
+def start_chunked_upload():
+    """Start a chunked upload session.
+
+    Expects path, filename and size (in bytes) as form fields or JSON.
+    """
+    data = request.get_json(silent=True) or request.form
+    try:
+        size = int(data.get('size', ''))
+    except ValueError:
+        raise ChunkedUploadError('Invalid file size')
+
+    uploads = current_app.extensions['chunked_uploads']
+    session = uploads.create(data.get('path', ''), data.get('filename', ''), size)
+    return jsonify(session), 201
+
 
-    if 'file' not in request.files:
-        return redirect(url_for('file_manager.index'))
+@file_manager_bp.route('/upload/chunked/<upload_id>', methods=['GET'])
+def chunked_upload_status(upload_id):
+    """Report the parts and byte ranges already received, for resuming an upload."""
+    return jsonify(current_app.extensions['chunked_uploads'].status(upload_id))
 
-    file = request.files['file']
-    if file.filename == '':
-        return redirect(url_for('file_manager.index'))
 
-    filename = secure_filename(file.filename)
+@file_manager_bp.route('/upload/chunked/<upload_id>/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    """Receive one part of a chunked upload as the raw request body.
+
+    An optional X-Chunk-SHA256 header carries the hex SHA-256 digest of the part; parts
+    that do not match it are rejected with 422.
+    """
+    uploads = current_app.extensions['chunked_uploads']
+    checksum = request.headers.get('X-Chunk-SHA256')
+    written = uploads.write_chunk(upload_id, index, request.stream, checksum)
+
+    status = uploads.status(upload_id)
+    progress = {key: status[key] for key in ('path', 'filename', 'size', 'bytes_received')}
+    publish('progress', dict(progress, upload_id=upload_id))
+    return jsonify({'index': index, 'size': written})
+
+
+@file_manager_bp.route('/upload/chunked/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id):
+    """Store the assembled file in the active storage and close the session.
+
+    Answers with the listing items of the stored file, for the page to show it. If the
+    storage fails, the session and its parts are kept, so the commit can be retried.
+    """
+    uploads = current_app.extensions['chunked_uploads']
+    session = uploads.get(upload_id)
+    data_path = uploads.data_path(upload_id)
+
     storage = get_storage_provider()
+    with collect_stored_items(storage.name) as items:
+        success, error = storage.commit_upload(data_path, session['path'], session['filename'])
 
-    success, error = storage.upload_file(file, path, filename)
     if not success:
-        current_app.logger.error(f'Upload failed: {error}')
-        # You might want to flash the error message here
+        current_app.logger.error(f'Chunked upload failed: {error}')
+        return jsonify({'error': error, 'upload_id': upload_id}), 500
 
-    return redirect(url_for('file_manager.index', path=path))
+    uploads.discard(upload_id)
+
+    return jsonify(
+        {
+            'success': True,
+            'path': session['path'],
+            'filename': session['filename'],
+            'items': items,
+        }
+    )
+
+
+@file_manager_bp.route('/upload/chunked/<upload_id>', methods=['DELETE'])
+def abort_chunked_upload(upload_id):
+    """Abort a chunked upload and discard its parts."""
+    current_app.extensions['chunked_uploads'].discard(upload_id)
+    return '', 204
 
 
 @file_manager_bp.route('/delete/<path:filename>')
 def delete_file(filename):
-    """Delete a file."""
+    """Delete a file, or a folder with everything in it when ``folder`` is set."""
     storage = get_storage_provider()
-    success, error = storage.delete_file(filename)
+    if request.args.get('folder'):
+        success, error = storage.delete_items(folders=[filename])
+    else:
+        success, error = storage.delete_file(filename)
 
     if not success:
         current_app.logger.error(f'Delete failed: {error}')
@@ -129,10 +348,32 @@ def delete_file(filename):
     return redirect(url_for('file_manager.index', path=os.path.dirname(filename)))
 
 
+@file_manager_bp.route('/delete', methods=['POST'])
+def delete_items():
+    """Delete the selected files (``path``) and folders (``folder``) in bulk."""
+    storage = get_storage_provider()
+    success, error = storage.delete_items(
+        request.form.getlist('path'), request.form.getlist('folder')
+    )
+    if not success:
+        current_app.logger.error(f'Delete failed: {error}')
+
+    if wants_json():
+        return jsonify({'success': success, 'error': error}), 200 if success else 500
+    return redirect(url_for('file_manager.index', path=request.form.get('current_path', '')))
+
+
 @file_manager_bp.route('/download/<path:filename>')
 def download_file(filename):
-    """Download a file."""
+    """Download a file, streaming it directly when it is kept on local disk."""
     storage = get_storage_provider()
+    local_path = storage.get_local_path(filename)
+    if local_path is not None:
+        return send_local_file(local_path, os.path.basename(filename))
+    download = storage.open_download(filename)
+    if download is not None:
+        return send_stream(*download, os.path.basename(filename))
+
     file_url, error = storage.get_file(filename)
 
     if error:
@@ -142,6 +383,59 @@ def download_file(filename):
     return redirect(file_url) if file_url else redirect(url_for('file_manager.index'))
 
 
+@file_manager_bp.route('/thumbnail/<path:filename>')
+def thumbnail(filename):
+    """Serve a small rendition of an image, for browsing without full downloads.
+
+    ``size`` picks one of THUMBNAIL_SIZES. Local images are rendered (once) into the
+    thumbnail cache; remote ones redirect to the provider's resized rendition. Listing
+    URLs carry the file's modification time, so responses can be cached for long.
+    """
+    size = request.args.get('size', THUMBNAIL_SIZES[0], type=int)
+    is_image = os.path.splitext(filename)[1].lower() in ALLOWED_IMAGE_EXTENSIONS
+    if size not in THUMBNAIL_SIZES or not is_image:
+        abort(404)
+
+    storage = get_storage_provider()
+    local_path = storage.get_local_path(filename)
+    if local_path is None:
+        thumbnail_url = storage.get_thumbnail_url(filename, size)
+        if not thumbnail_url:
+            abort(404)
+        response = redirect(thumbnail_url)
+    else:
+        thumbnails = current_app.extensions['thumbnails']
+        if not thumbnails.enabled:
+            abort(404)
+        try:
+            response = send_file(thumbnails.thumbnail(local_path, size), mimetype='image/jpeg')
+        except Exception as e:
+            current_app.logger.error(f'Thumbnail of {filename} failed: {e}')
+            abort(404)
+
+    response.cache_control.public = True
+    response.cache_control.max_age = THUMBNAIL_MAX_AGE
+    return response
+
+
+@file_manager_bp.route('/download-archive', methods=['GET', 'POST'])
+def download_archive():
+    """Stream a ZIP archive of the selected files and folders.
+
+    Takes one or more ``path`` (or ``folder``) values from the query string or form;
+    without any, the whole storage is archived. The archive is generated while it is sent.
+    """
+    paths = request.values.getlist('path') + request.values.getlist('folder') or ['']
+    name = secure_filename(os.path.basename(paths[0].rstrip('/'))) if len(paths) == 1 else ''
+
+    storage = get_storage_provider()
+    return Response(
+        stream_with_context(stream_archive(storage, paths)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{name or "arquivos"}.zip"'},
+    )
+
+
 @file_manager_bp.route('/mkdir', methods=['POST'])
 def mkdir():
     """Create a new directory."""
@@ -0,0 +1,364 @@
+"""Persistent search index over the names and metadata of stored files."""
+
+import os
+import posixpath
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from flask import current_app
+
+from app.core.db import SQLiteStore
+from app.modules.file_manager.constants import SEARCH_CRAWL_BATCH_SIZE
+from app.modules.file_manager.constants import SEARCH_MAX_RESULTS
+from app.modules.file_manager.storage.signals import items_removed
+from app.modules.file_manager.storage.signals import items_stored
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    storage TEXT NOT NULL,
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    modified REAL,
+    resource_type TEXT,
+    crawl INTEGER NOT NULL,
+    UNIQUE (storage, path)
+);
+CREATE INDEX IF NOT EXISTS entries_name ON entries (storage, name_lower);
+CREATE INDEX IF NOT EXISTS entries_extension ON entries (storage, extension, name_lower);
+CREATE TABLE IF NOT EXISTS crawls (
+    storage TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL,
+    finished_at REAL
+);
+'''
+
+# Trigram full-text index over names, kept in sync with the entries table by triggers
+FTS_SCHEMA = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    name, content='entries', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+'''
+
+UPSERT = '''
+INSERT INTO entries (
+    storage, path, name, name_lower, extension, is_dir, size, modified, resource_type, crawl
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (storage, path) DO UPDATE SET
+    is_dir = excluded.is_dir,
+    size = excluded.size,
+    modified = coalesce(excluded.modified, entries.modified),
+    resource_type = coalesce(excluded.resource_type, entries.resource_type),
+    crawl = max(excluded.crawl, entries.crawl)
+'''
+
+SEARCH_MODES = ('substring', 'prefix')
+
+# Shortest query the trigram index can answer; shorter ones scan the names
+TRIGRAM_LENGTH = 3
+
+
+def has_fts5_trigram() -> bool:
+    """Check whether the SQLite library supports FTS5 with the trigram tokenizer."""
+    try:
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(name, tokenize='trigram')")
+        conn.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so a value matches literally, with backslash as ESCAPE."""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class SearchIndex:
+    """SQLite index of every file and folder of each storage, searched by name.
+
+    Rows are kept current from the storage signals and reconciled by periodic crawls,
+    so searches never touch the storage backends. Substring searches use an FTS5
+    trigram index when SQLite provides one; prefix searches and extension filters use
+    plain B-tree indexes.
+    """
+
+    def __init__(self, db_path: str):
+        """Initialize the index.
+
+        Args:
+            db_path: Path of the SQLite database
+        """
+        self.fts = has_fts5_trigram()
+        self._store = SQLiteStore(db_path, SCHEMA + (FTS_SCHEMA if self.fts else ''))
+
+    def add(self, storage: str, items: Iterable[Dict[str, Any]], crawl: Optional[int] = None):
+        """Add or update items, and the folders they are in.
+
+        Args:
+            storage: Name of the storage holding the items
+            items: Listing items
+            crawl: Generation of the crawl that saw the items (defaults to the latest)
+        """
+        if crawl is None:
+            crawl = self._generation(storage)
+
+        rows = {}
+        for item in items:
+            path = item['path'].strip('/')
+            parent = posixpath.dirname(path)
+            while parent and parent not in rows:
+                rows[parent] = self._row(storage, {'path': parent, 'is_dir': True}, crawl)
+                parent = posixpath.dirname(parent)
+            rows[path] = self._row(storage, item, crawl)
+        self._store.executemany(UPSERT, rows.values())
+
+    def remove(self, storage: str, paths: Iterable[str]):
+        """Remove items, and everything below the folders among them.
+
+        Args:
+            storage: Name of the storage that held the items
+            paths: Paths of the removed files and folders
+        """
+        self._store.executemany(
+            'DELETE FROM entries WHERE storage = ? AND (path = ? OR (path >= ? AND path < ?))',
+            (
+                (storage, path, f'{path}/', f'{path}/\uffff')
+                for path in (path.strip('/') for path in paths)
+            ),
+        )
+
+    def search(
+        self,
+        storage: str,
+        query: str = '',
+        mode: str = 'substring',
+        extension: Optional[str] = None,
+        folder: Optional[str] = None,
+        limit: int = SEARCH_MAX_RESULTS,
+    ) -> List[Dict[str, Any]]:
+        """Find items of a storage by name.
+
+        Args:
+            storage: Name of the storage to search
+            query: Text the name contains (substring) or starts with (prefix), any case
+            mode: 'substring' or 'prefix'
+            extension: Only files with this extension, such as '.jpg' (optional)
+            folder: Only items below this folder (optional)
+            limit: Maximum number of results
+
+        Returns:
+            Matching items, folders first and then by name
+        """
+        where, params = ['e.storage = ?'], [storage]
+        query = query.strip().lower()
+        if query and mode == 'prefix':
+            where.append('e.name_lower >= ? AND e.name_lower < ?')
+            params += [query, f'{query}\uffff']
+        elif query and self.fts and len(query) >= TRIGRAM_LENGTH:
+            where.append('e.id IN (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?)')
+            params.append('"{}"'.format(query.replace('"', '""')))
+        elif query:
+            where.append("e.name_lower LIKE ? ESCAPE '\\'")
+            params.append(f'%{escape_like(query)}%')
+
+        if extension:
+            extension = extension.lower()
+            where.append('e.extension = ?')
+            params.append(extension if extension.startswith('.') else f'.{extension}')
+        if folder and folder.strip('/'):
+            folder = folder.strip('/')
+            where.append('e.path >= ? AND e.path < ?')
+            params += [f'{folder}/', f'{folder}/\uffff']
+
+        rows = self._store.execute(
+            'SELECT e.name, e.path, e.is_dir, e.size, e.modified, e.resource_type '
+            f"FROM entries AS e WHERE {' AND '.join(where)} "
+            'ORDER BY e.is_dir DESC, e.name_lower LIMIT ?',
+            params + [limit],
+        ).fetchall()
+        return [self._row_to_item(row) for row in rows]
+
+    def crawl(self, storage: str, provider) -> int:
+        """Reconcile the index of a storage with a full walk of it.
+
+        Unchanged rows are only re-stamped with the crawl generation (the full-text index
+        is untouched); rows the walk did not see are removed once it has finished. Items
+        stored while the crawl runs carry its generation, so they are kept.
+
+        Args:
+            storage: Name of the storage
+            provider: Storage provider to walk
+
+        Returns:
+            The number of items seen
+        """
+        generation = self._store.execute(
+            'INSERT INTO crawls (storage, generation) VALUES (?, 1) '
+            'ON CONFLICT (storage) DO UPDATE SET generation = generation + 1 '
+            'RETURNING generation',
+            (storage,),
+        ).fetchone()['generation']
+
+        seen = 0
+        for items in self._batches(provider.walk_folders(''), provider.walk_files('')):
+            self.add(storage, items, crawl=generation)
+            seen += len(items)
+
+        self._store.execute(
+            'DELETE FROM entries WHERE storage = ? AND crawl < ?', (storage, generation)
+        )
+        self._store.execute(
+            "UPDATE crawls SET finished_at = strftime('%s', 'now') WHERE storage = ?",
+            (storage,),
+        )
+        return seen
+
+    def is_empty(self) -> bool:
+        """Check whether nothing has been indexed yet."""
+        return self._store.execute('SELECT 1 FROM entries LIMIT 1').fetchone() is None
+
+    def _generation(self, storage: str) -> int:
+        """Get the generation of the latest crawl of a storage (0 before the first)."""
+        row = self._store.execute(
+            'SELECT generation FROM crawls WHERE storage = ?', (storage,)
+        ).fetchone()
+        return row['generation'] if row else 0
+
+    def _batches(self, *walks: Iterator[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        """Group the items of several walks into batches written in one transaction."""
+        batch = []
+        for walk in walks:
+            for item in walk:
+                batch.append(item)
+                if len(batch) >= SEARCH_CRAWL_BATCH_SIZE:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def _row(self, storage: str, item: Dict[str, Any], crawl: int) -> tuple:
+        """Build the entries row of a listing item."""
+        path = item['path'].strip('/')
+        name = posixpath.basename(path)
+        is_dir = bool(item.get('is_dir'))
+        return (
+            storage,
+            path,
+            name,
+            name.lower(),
+            '' if is_dir else os.path.splitext(name)[1].lower(),
+            int(is_dir),
+            item.get('size') or 0,
+            item.get('modified'),
+            item.get('resource_type'),
+            crawl,
+        )
+
+    def _row_to_item(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert an entries row to a listing item."""
+        item = {
+            'name': row['name'],
+            'is_dir': bool(row['is_dir']),
+            'size': row['size'],
+            'path': row['path'],
+            'modified': row['modified'],
+        }
+        if row['resource_type']:
+            item['resource_type'] = row['resource_type']
+        return item
+
+
+class SearchCrawler:
+    """Background thread crawling every configured storage into the search index.
+
+    The first crawl runs right away when the index is empty, later ones every
+    ``interval`` seconds. Storages reporting themselves offline are skipped.
+    """
+
+    def __init__(self, app, index: SearchIndex, interval: float):
+        """Initialize the crawler.
+
+        Args:
+            app: Flask application whose storage registry is crawled
+            index: Search index to fill
+            interval: Seconds between crawls
+        """
+        self.app = app
+        self.index = index
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the crawler thread if it is not running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='search-crawler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the crawler thread, waiting briefly for a crawl in progress."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def wake(self):
+        """Crawl again right away."""
+        self._wake.set()
+
+    def crawl_all(self):
+        """Crawl every configured storage that is online."""
+        registry = self.app.extensions['storage_registry']
+        with self.app.app_context():
+            for name in registry.names():
+                provider = registry.get(name)
+                if provider is None or self._stopped.is_set():
+                    continue
+                checker = getattr(provider, 'status_checker', None)
+                if checker is not None and not checker.get_status()['online']:
+                    continue
+                try:
+                    self.index.crawl(name, provider)
+                except Exception as e:
+                    self.app.logger.error(f'Search crawl of {name} failed: {e}')
+
+    def _run(self):
+        """Crawl, then sleep until the next crawl is due."""
+        if not self.index.is_empty():
+            self._wake.wait(self.interval)
+        while not self._stopped.is_set():
+            self._wake.clear()
+            self.crawl_all()
+            self._wake.wait(self.interval)
+
+
+@items_stored.connect
+def index_stored_items(sender, items: List[Dict[str, Any]], **extra):
+    """Add stored items to the application's search index."""
+    try:
+        current_app.extensions['search_index'].add(sender.name, items)
+    except Exception as e:
+        current_app.logger.error(f'Could not index stored items: {e}')
+
+
+@items_removed.connect
+def unindex_removed_items(sender, paths: List[str], **extra):
+    """Remove deleted items from the application's search index."""
+    try:
+        current_app.extensions['search_index'].remove(sender.name, paths)
+    except Exception as e:
+        current_app.logger.error(f'Could not unindex removed items: {e}')
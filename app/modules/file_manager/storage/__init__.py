@@ -1,8 +1,31 @@
-"""Storage package."""
+"""Storage package.
+
+``CloudinaryStorage`` is imported on first access, so that importing the package does not
+load the Cloudinary SDK.
+"""
 
 from .base import StorageProvider
-from .cloudinary_storage import CloudinaryStorage
+from .cache import CachedStorage
 from .factory import get_storage_provider
 from .local import LocalStorage
+from .registry import StorageRegistry
+from .tiered import TieredStorage
+
+__all__ = [
+    'get_storage_provider',
+    'StorageProvider',
+    'LocalStorage',
+    'CloudinaryStorage',
+    'CachedStorage',
+    'StorageRegistry',
+    'TieredStorage',
+]
+
+
+def __getattr__(name):
+    """Import ``CloudinaryStorage`` on first access."""
+    if name == 'CloudinaryStorage':
+        from .cloudinary_storage import CloudinaryStorage
 
-__all__ = ['get_storage_provider', 'StorageProvider', 'LocalStorage', 'CloudinaryStorage']
+        return CloudinaryStorage
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
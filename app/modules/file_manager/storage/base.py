@@ -2,11 +2,107 @@
 
 from abc import ABC
 from abc import abstractmethod
-from typing import Dict, List, Optional, Tuple, Union
+import asyncio
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.request import urlopen
+
+from werkzeug.datastructures import FileStorage
+
+from ..constants import REMOTE_READ_TIMEOUT
+from ..storage.instrumentation import instrument_methods
+
+# Fields list_items can sort by; folders are always listed before files
+SORT_FIELDS = ('name', 'size', 'modified')
+
+
+def sort_items(items: List[Dict[str, Any]], sort_by: str = 'name', reverse: bool = False):
+    """Sort listing items in place, keeping folders before files.
+
+    Args:
+        items: Items as returned in a list_items page
+        sort_by: Field to sort by, one of SORT_FIELDS
+        reverse: Sort in descending order
+    """
+    if sort_by == 'name':
+        items.sort(key=lambda item: item['name'].lower(), reverse=reverse)
+    else:
+        items.sort(key=lambda item: item.get(sort_by) or 0, reverse=reverse)
+    items.sort(key=lambda item: not item['is_dir'])
+
+
+def paginate_items(
+    items: List[Dict[str, Any]],
+    offset: int = 0,
+    limit: Optional[int] = None,
+    sort_by: str = 'name',
+    reverse: bool = False,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build a list_items page from a complete, in-memory listing.
+
+    The cursor is the offset of the next page as a string.
+
+    Args:
+        items: Every item in the listed path
+        offset: Number of items to skip
+        limit: Maximum number of items to return (None for all)
+        sort_by: Field to sort by, one of SORT_FIELDS
+        reverse: Sort in descending order
+        cursor: Cursor returned for a previous page, takes precedence over offset
+
+    Returns:
+        Page dictionary as described in StorageProvider.list_items
+    """
+    offset = parse_offset_cursor(cursor, offset)
+    sort_items(items, sort_by, reverse)
+    end = offset + limit if limit else len(items)
+    return {
+        'items': items[offset:end],
+        'total': len(items),
+        'offset': offset,
+        'next_cursor': str(end) if end < len(items) else None,
+    }
+
+
+def parse_offset_cursor(cursor: Optional[str], default: int = 0) -> int:
+    """Decode an offset cursor, falling back to the given offset.
+
+    Args:
+        cursor: Cursor string holding an offset, or None
+        default: Offset to use when there is no valid cursor
+
+    Returns:
+        Non-negative offset
+    """
+    try:
+        offset = int(cursor) if cursor else default
+    except ValueError:
+        offset = default
+    return max(offset, 0)
 
 
 class StorageProvider(ABC):
-    """Abstract base class for storage providers."""
+    """Abstract base class for storage providers.
+
+    Providers send ``items_stored`` and ``items_removed`` (see ``storage.signals``) after
+    their write operations, with themselves as sender; ``name`` identifies them to
+    receivers and matches their key in the storage registry. Remote providers include the
+    ``etag`` they hold for a stored file in its item, for replication to compare.
+
+    The main methods of every subclass are timed into the ``storage_operation_seconds``
+    metric (see ``storage.instrumentation``).
+    """
+
+    name = 'storage'
+
+    def __init_subclass__(cls, **kwargs):
+        """Time the storage operations of each provider class."""
+        super().__init_subclass__(**kwargs)
+        instrument_methods(cls)
+
+    def close(self):
+        """Release background resources held by the provider."""
+        pass
 
     @abstractmethod
     def get_storage_usage(self) -> Dict[str, Union[int, float]]:
@@ -17,21 +113,72 @@ class StorageProvider(ABC):
             - used: Used storage space in bytes
             - total: Total storage space in bytes
             - name: Storage provider name
+            - error: Error message, only present if the usage could not be read
         """
         pass
 
     @abstractmethod
-    def list_items(self, path: str) -> List[Dict[str, Union[str, bool, int]]]:
-        """List items in the given path.
+    def list_items(
+        self,
+        path: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort_by: str = 'name',
+        reverse: bool = False,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List a page of items in the given path.
 
         Args:
             path: The path to list items from
+            offset: Number of items to skip
+            limit: Maximum number of items to return (None for all)
+            sort_by: Field to sort by, one of SORT_FIELDS
+            reverse: Sort in descending order
+            cursor: Opaque cursor returned by a previous call, takes precedence over offset
 
         Returns:
-            List of items with their properties
+            Dictionary containing:
+            - items: List of items with their properties (name, is_dir, size, path, modified)
+            - total: Total number of items in the path, None if unknown
+            - offset: Offset of the first returned item
+            - next_cursor: Cursor for the next page, None on the last page
+            - error: Error message, only present if the listing failed
         """
         pass
 
+    async def get_storage_usage_async(self) -> Dict[str, Union[int, float]]:
+        """Get storage usage information without blocking the event loop.
+
+        The default runs ``get_storage_usage`` on a worker thread; providers with an
+        async client override it.
+
+        Returns:
+            Dictionary as described in get_storage_usage
+        """
+        return await asyncio.to_thread(self.get_storage_usage)
+
+    async def list_items_async(
+        self,
+        path: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort_by: str = 'name',
+        reverse: bool = False,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List a page of items without blocking the event loop.
+
+        The default runs ``list_items`` on a worker thread; providers with an async
+        client override it.
+
+        Returns:
+            Page dictionary as described in list_items
+        """
+        return await asyncio.to_thread(
+            self.list_items, path, offset, limit, sort_by, reverse, cursor
+        )
+
     @abstractmethod
     def upload_file(self, file, path: str, filename: str) -> Tuple[bool, Optional[str]]:
         """Upload a file to storage.
@@ -46,6 +193,25 @@ class StorageProvider(ABC):
         """
         pass
 
+    def commit_upload(
+        self, source_path: str, path: str, filename: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Store a file that was assembled on local disk, e.g. by a chunked upload.
+
+        The provider may move or consume the source file. By default the file is streamed
+        through ``upload_file``.
+
+        Args:
+            source_path: Path of the assembled file on local disk
+            path: The path to upload to
+            filename: The name of the file
+
+        Returns:
+            Tuple of (success, error_message)
+        """
+        with open(source_path, 'rb') as f:
+            return self.upload_file(FileStorage(stream=f, filename=filename), path, filename)
+
     @abstractmethod
     def delete_file(self, path: str) -> Tuple[bool, Optional[str]]:
         """Delete a file from storage.
@@ -58,6 +224,33 @@ class StorageProvider(ABC):
         """
         pass
 
+    def delete_items(
+        self, paths: Iterable[str] = (), folders: Iterable[str] = ()
+    ) -> Tuple[bool, Optional[str]]:
+        """Delete many files and folders at once.
+
+        The default deletes files one by one and empties folders through walk_files;
+        providers override it with bulk operations.
+
+        Args:
+            paths: Files to delete
+            folders: Folders to delete together with everything below them
+
+        Returns:
+            Tuple of (success, error_message); every item is attempted even if some fail
+        """
+        errors = []
+        for folder in folders:
+            try:
+                paths = list(paths) + [item['path'] for item in self.walk_files(folder)]
+            except Exception as e:
+                errors.append(f'{folder}: {e}')
+        for path in list(paths) + list(folders):
+            success, error = self.delete_file(path)
+            if not success:
+                errors.append(error)
+        return not errors, '; '.join(errors) or None
+
     @abstractmethod
     def get_file(self, path: str) -> Tuple[Optional[str], Optional[str]]:
         """Get a file from storage.
@@ -70,6 +263,113 @@ class StorageProvider(ABC):
         """
         pass
 
+    def get_local_path(self, path: str) -> Optional[str]:
+        """Get the path of a file on local disk, if the provider keeps one.
+
+        Files with a local path are served directly by the download route (with range
+        and conditional request support) instead of redirecting to ``get_file``.
+
+        Args:
+            path: The path of the file
+
+        Returns:
+            Absolute path of the file, or None if it is not available on local disk
+        """
+        return None
+
+    def open_download(self, path: str) -> Optional[Tuple[BinaryIO, int]]:
+        """Open a remote file for the download route to relay, instead of redirecting.
+
+        Providers that want downloads to pass through the application (for instance to
+        keep a copy on the way) return the stream; by default downloads are redirected
+        to the URL from ``get_file``.
+
+        Args:
+            path: The path of the file
+
+        Returns:
+            Readable binary stream (closed by the caller) and its size, or None
+        """
+        return None
+
+    def get_thumbnail_url(self, path: str, size: int) -> Optional[str]:
+        """Get the URL of a resized rendition of an image, if the provider makes them.
+
+        Args:
+            path: The path of the image
+            size: Largest width or height of the rendition
+
+        Returns:
+            URL of the rendition, or None if the provider has none
+        """
+        return None
+
+    def walk_folders(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Yield every folder below a folder, as listing items.
+
+        Folders holding files are implied by ``walk_files``; this is for crawls that must
+        also find empty folders. The default yields nothing.
+
+        Args:
+            path: Folder to walk
+
+        Yields:
+            Folder items as described in list_items
+        """
+        return iter(())
+
+    def walk_files(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Yield every file below a folder.
+
+        The default walks ``list_items`` folder by folder; providers override it with a
+        cheaper recursive listing and to accept a single file path.
+
+        Args:
+            path: The folder (or file) to walk
+
+        Yields:
+            File items as returned by list_items, optionally with a download 'url'
+
+        Raises:
+            IOError: If a folder cannot be listed
+        """
+        folders = [path]
+        while folders:
+            listing = self.list_items(folders.pop())
+            if listing.get('error'):
+                raise IOError(listing['error'])
+            for item in listing['items']:
+                if item['is_dir']:
+                    folders.append(item['path'])
+                else:
+                    yield item
+
+    def open_file(self, item: Dict[str, Any]) -> BinaryIO:
+        """Open a file item returned by walk_files for streaming reads.
+
+        Files on local disk are opened directly, others are streamed from their 'url'
+        (or the URL returned by get_file).
+
+        Args:
+            item: File item
+
+        Returns:
+            Readable binary stream, to be closed by the caller
+
+        Raises:
+            IOError: If the file cannot be opened
+        """
+        local_path = self.get_local_path(item['path'])
+        if local_path is not None:
+            return open(local_path, 'rb')
+
+        url = item.get('url')
+        if not url:
+            url, error = self.get_file(item['path'])
+            if error:
+                raise IOError(error)
+        return urlopen(url, timeout=REMOTE_READ_TIMEOUT)
+
     @abstractmethod
     def create_folder(self, path: str) -> Tuple[bool, Optional[str]]:
         """Create a folder in storage.
@@ -0,0 +1,169 @@
+"""Content-addressed blob store backing deduplicated local storage."""
+
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Optional
+import uuid
+
+from app.core.db import SQLiteStore
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS refs (
+    path TEXT PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS refs_digest ON refs (digest);
+'''
+
+
+class BlobStore:
+    """Files stored once by SHA-256 digest and referenced through hardlinks.
+
+    Blobs live under a two-level fan-out (``ab/cd/abcd...``). Every stored file is a
+    hardlink to its blob, so identical content takes disk space once and the blob's link
+    count is its reference count: a blob left with no other link is removed. An index
+    maps each stored path to its digest, so a delete knows which blob it released.
+
+    Stored files must never be modified in place (that would change every copy); the
+    application always replaces them with a new link instead. The blob root has to be on
+    the same filesystem as the stored files.
+    """
+
+    def __init__(self, root: str, db_path: str):
+        """Initialize the store.
+
+        Args:
+            root: Directory holding the blobs
+            db_path: Path of the SQLite reference index
+        """
+        self.root = root
+        self._staging = os.path.join(root, 'staging')
+        os.makedirs(self._staging, exist_ok=True)
+        self._store = SQLiteStore(db_path, SCHEMA)
+        self._lock = threading.Lock()
+
+    def blob_path(self, digest: str) -> str:
+        """Get the path of the blob holding the given digest."""
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def store_stream(self, stream, target_path: str) -> str:
+        """Store the content of a stream at a path, hashing it while it is written.
+
+        Args:
+            stream: Readable binary stream
+            target_path: Path the file should appear at
+
+        Returns:
+            The content digest
+        """
+        fd, staged = tempfile.mkstemp(dir=self._staging)
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for block in iter(lambda: stream.read(COPY_BUFFER_SIZE), b''):
+                    digest.update(block)
+                    f.write(block)
+            return self._place(staged, digest.hexdigest(), target_path)
+        finally:
+            if os.path.exists(staged):
+                os.remove(staged)
+
+    def store_file(self, source_path: str, target_path: str) -> str:
+        """Move a file on local disk into the store and link it at a path.
+
+        Args:
+            source_path: File to store (consumed)
+            target_path: Path the file should appear at
+
+        Returns:
+            The content digest
+        """
+        digest = hashlib.sha256()
+        with open(source_path, 'rb') as f:
+            for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+                digest.update(block)
+        try:
+            return self._place(source_path, digest.hexdigest(), target_path)
+        finally:
+            if os.path.exists(source_path):
+                os.remove(source_path)
+
+    def digest_of(self, path: str) -> Optional[str]:
+        """Get the digest of a stored path, or None if it is not in the store."""
+        row = self._store.execute(
+            'SELECT digest FROM refs WHERE path = ?', (os.path.abspath(path),)
+        ).fetchone()
+        return row['digest'] if row else None
+
+    def release(self, path: str):
+        """Forget a stored path after it was removed, collecting its blob if unused.
+
+        Args:
+            path: Path of the removed file
+        """
+        digest = self.digest_of(path)
+        if digest is not None:
+            self._store.execute('DELETE FROM refs WHERE path = ?', (os.path.abspath(path),))
+            self._collect(digest)
+
+    def release_tree(self, folder: str):
+        """Forget every stored path below a removed folder, collecting unused blobs.
+
+        Args:
+            folder: Path of the removed folder
+        """
+        prefix = os.path.join(os.path.abspath(folder), '')
+        bounds = (prefix, prefix + '\uffff')
+        rows = self._store.execute(
+            'SELECT DISTINCT digest FROM refs WHERE path >= ? AND path < ?', bounds
+        ).fetchall()
+        self._store.execute('DELETE FROM refs WHERE path >= ? AND path < ?', bounds)
+        for row in rows:
+            self._collect(row['digest'])
+
+    def _place(self, source_path: str, digest: str, target_path: str) -> str:
+        """Turn a staged file into a blob reference at the target path.
+
+        Known content only gains a link; new content becomes the blob. The link is
+        created beside the target and renamed over it, so readers never see a partial
+        file and an overwritten file's previous blob is released.
+        """
+        blob = self.blob_path(digest)
+        link = f'{target_path}.{uuid.uuid4().hex}.part'
+        previous = self.digest_of(target_path)
+
+        with self._lock:
+            try:
+                os.link(blob, link)
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.replace(source_path, blob)
+                os.link(blob, link)
+
+        try:
+            os.replace(link, target_path)
+        except OSError:
+            os.remove(link)
+            raise
+
+        self._store.execute(
+            'INSERT OR REPLACE INTO refs (path, digest) VALUES (?, ?)',
+            (os.path.abspath(target_path), digest),
+        )
+        if previous is not None and previous != digest:
+            self._collect(previous)
+        return digest
+
+    def _collect(self, digest: str):
+        """Remove a blob once no stored file links to it any more."""
+        blob = self.blob_path(digest)
+        with self._lock:
+            try:
+                if os.stat(blob).st_nlink <= 1:
+                    os.remove(blob)
+            except FileNotFoundError:
+                pass
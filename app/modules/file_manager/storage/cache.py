@@ -0,0 +1,364 @@
+"""Metadata caching for storage providers."""
+
+from abc import ABC
+from abc import abstractmethod
+from collections import OrderedDict
+import json
+import os
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from app.core.db import SQLiteStore
+from app.modules.file_manager.storage.base import StorageProvider
+from app.modules.file_manager.storage.instrumentation import CACHE_REQUESTS
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at);
+'''
+
+
+class CacheBackend(ABC):
+    """Bounded key/value store with per-entry expiry.
+
+    Values are JSON strings, so cached results are never shared (and mutated) between
+    callers.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Get a value, or None if it is missing or expired."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float):
+        """Store a value for ttl seconds, evicting the least recently used entries."""
+        pass
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str):
+        """Delete every entry whose key starts with the prefix."""
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU cache, private to each worker process."""
+
+    def __init__(self, max_entries: int):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: str, ttl: float):
+        """Store a value for ttl seconds, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix: str):
+        """Delete every entry whose key starts with the prefix."""
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """On-disk LRU cache shared by every worker process using the same file."""
+
+    def __init__(self, path: str, max_entries: int):
+        """Initialize the cache.
+
+        Args:
+            path: Path of the SQLite cache file
+            max_entries: Maximum number of entries kept
+        """
+        self.max_entries = max_entries
+        self._store = SQLiteStore(path, SCHEMA)
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a value, or None if it is missing or expired."""
+        now = time.time()
+        row = self._store.execute(
+            'SELECT value FROM cache WHERE key = ? AND expires_at >= ?', (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        self._store.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+        return row['value']
+
+    def set(self, key: str, value: str, ttl: float):
+        """Store a value for ttl seconds, evicting the least recently used entries."""
+        now = time.time()
+        self._store.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) '
+            'VALUES (?, ?, ?, ?)',
+            (key, value, now + ttl, now),
+        )
+        self._store.execute(
+            'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+            'ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,),
+        )
+
+    def delete_prefix(self, prefix: str):
+        """Delete every entry whose key starts with the prefix."""
+        self._store.execute(
+            'DELETE FROM cache WHERE key >= ? AND key < ?', (prefix, prefix + '\uffff')
+        )
+
+
+def create_cache_backend(config: Dict[str, Any]) -> Optional[CacheBackend]:
+    """Create the cache backend selected by STORAGE_CACHE_BACKEND.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        The cache backend, or None if caching is disabled
+    """
+    backend = config.get('STORAGE_CACHE_BACKEND')
+    max_entries = config['STORAGE_CACHE_MAX_ENTRIES']
+
+    if backend == 'memory':
+        return MemoryCacheBackend(max_entries)
+    if backend == 'sqlite':
+        return SQLiteCacheBackend(os.path.join(config['DATA_FOLDER'], 'cache.db'), max_entries)
+    return None
+
+
+def parent_path(path: str) -> str:
+    """Get the parent folder of a storage path ('' for top-level items)."""
+    return os.path.dirname(path.rstrip('/\\'))
+
+
+class CachedStorage(StorageProvider):
+    """Storage provider wrapper caching listings, usage and file lookups.
+
+    Reads are served from the cache backend for up to ``ttl`` seconds. Writes made
+    through the wrapper invalidate exactly the entries they affect: the listing of the
+    parent folder, the file itself, everything below a deleted folder and the usage
+    totals. Failed reads are never cached. Other attributes (such as ``status_checker``)
+    are delegated to the wrapped provider.
+    """
+
+    def __init__(self, provider: StorageProvider, backend: CacheBackend, ttl: float):
+        """Initialize the wrapper.
+
+        Args:
+            provider: Storage provider to wrap
+            backend: Cache backend holding the results
+            ttl: Seconds a cached result stays valid
+        """
+        self.provider = provider
+        self.backend = backend
+        self.ttl = ttl
+
+    def __getattr__(self, name: str):
+        """Delegate unknown attributes to the wrapped provider."""
+        return getattr(self.provider, name)
+
+    @property
+    def name(self) -> str:
+        """Name of the wrapped provider."""
+        return self.provider.name
+
+    def close(self):
+        """Release background resources held by the wrapped provider."""
+        self.provider.close()
+
+    def get_local_path(self, path: str) -> Optional[str]:
+        """Get the path of a file on local disk from the wrapped provider."""
+        return self.provider.get_local_path(path)
+
+    def open_download(self, path: str) -> Optional[Tuple[BinaryIO, int]]:
+        """Open a file for the download route with the wrapped provider."""
+        return self.provider.open_download(path)
+
+    def get_thumbnail_url(self, path: str, size: int) -> Optional[str]:
+        """Get the URL of a resized image from the wrapped provider."""
+        return self.provider.get_thumbnail_url(path, size)
+
+    def walk_folders(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Walk folders with the wrapped provider (uncached, walks are one-off)."""
+        return self.provider.walk_folders(path)
+
+    def walk_files(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Walk files with the wrapped provider (uncached, walks are one-off)."""
+        return self.provider.walk_files(path)
+
+    def open_file(self, item: Dict[str, Any]) -> BinaryIO:
+        """Open a file item with the wrapped provider."""
+        return self.provider.open_file(item)
+
+    def get_storage_usage(self) -> Dict[str, Union[int, float]]:
+        """Get storage usage information, cached."""
+        return self._cached('usage:', self.provider.get_storage_usage)
+
+    def list_items(
+        self,
+        path: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort_by: str = 'name',
+        reverse: bool = False,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List a page of items in the given path, cached per page."""
+        key = f'{self._list_prefix(path)}{offset}:{limit}:{sort_by}:{reverse}:{cursor}'
+        return self._cached(
+            key, lambda: self.provider.list_items(path, offset, limit, sort_by, reverse, cursor)
+        )
+
+    async def get_storage_usage_async(self) -> Dict[str, Union[int, float]]:
+        """Get storage usage information without blocking the event loop, cached."""
+        return await self._cached_async('usage:', self.provider.get_storage_usage_async)
+
+    async def list_items_async(
+        self,
+        path: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort_by: str = 'name',
+        reverse: bool = False,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List a page of items without blocking the event loop, cached per page."""
+        key = f'{self._list_prefix(path)}{offset}:{limit}:{sort_by}:{reverse}:{cursor}'
+        return await self._cached_async(
+            key,
+            lambda: self.provider.list_items_async(path, offset, limit, sort_by, reverse, cursor),
+        )
+
+    def get_file(self, path: str) -> Tuple[Optional[str], Optional[str]]:
+        """Get a file URL, cached."""
+        return tuple(self._cached(f'file:{path}\0', lambda: list(self.provider.get_file(path))))
+
+    def upload_file(self, file, path: str, filename: str) -> Tuple[bool, Optional[str]]:
+        """Upload a file and invalidate the affected cache entries."""
+        result = self.provider.upload_file(file, path, filename)
+        self.invalidate(os.path.join(path, filename) if path else filename, new_folders=True)
+        return result
+
+    def commit_upload(
+        self, source_path: str, path: str, filename: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Store an assembled file and invalidate the affected cache entries."""
+        result = self.provider.commit_upload(source_path, path, filename)
+        self.invalidate(os.path.join(path, filename) if path else filename, new_folders=True)
+        return result
+
+    def delete_file(self, path: str) -> Tuple[bool, Optional[str]]:
+        """Delete a file or folder and invalidate the affected cache entries."""
+        result = self.provider.delete_file(path)
+        self.invalidate(path, recursive=True)
+        return result
+
+    def delete_items(
+        self, paths: Iterable[str] = (), folders: Iterable[str] = ()
+    ) -> Tuple[bool, Optional[str]]:
+        """Delete many files and folders and invalidate the affected cache entries."""
+        paths, folders = list(paths), list(folders)
+        result = self.provider.delete_items(paths, folders)
+        for path in paths:
+            self.invalidate(path)
+        for folder in folders:
+            self.invalidate(folder, recursive=True)
+        return result
+
+    def create_folder(self, path: str) -> Tuple[bool, Optional[str]]:
+        """Create a folder and invalidate the listings it appears in."""
+        result = self.provider.create_folder(path)
+        self.invalidate(path, new_folders=True)
+        return result
+
+    def invalidate(self, path: str, recursive: bool = False, new_folders: bool = False):
+        """Drop the cache entries affected by a change to a path.
+
+        Args:
+            path: File or folder that changed
+            recursive: Also drop entries below the path (for deleted folders)
+            new_folders: The write may have created intermediate folders, so the listings
+                of every ancestor are dropped as well
+        """
+        self.backend.delete_prefix('usage:')
+        self.backend.delete_prefix(f'file:{path}\0')
+
+        parent = parent_path(path)
+        self.backend.delete_prefix(self._list_prefix(parent))
+        while new_folders and parent:
+            parent = parent_path(parent)
+            self.backend.delete_prefix(self._list_prefix(parent))
+
+        if recursive:
+            self.backend.delete_prefix(self._list_prefix(path))
+            self.backend.delete_prefix(f'list:{path}/')
+            self.backend.delete_prefix(f'file:{path}/')
+
+    def _list_prefix(self, path: str) -> str:
+        """Get the key prefix shared by every cached page of a folder listing."""
+        return f'list:{path}\0'
+
+    def _cached(self, key: str, load):
+        """Return a cached value, loading and storing it on a miss.
+
+        Results carrying an error are returned but not cached.
+        """
+        cached = self.backend.get(key)
+        if cached is not None:
+            CACHE_REQUESTS.labels(self.name, 'hit').inc()
+            return json.loads(cached)
+
+        CACHE_REQUESTS.labels(self.name, 'miss').inc()
+        value = load()
+        if not self._has_error(value):
+            self.backend.set(key, json.dumps(value), self.ttl)
+        return value
+
+    async def _cached_async(self, key: str, load):
+        """Return a cached value, awaiting ``load()`` and storing it on a miss.
+
+        Shares its entries with ``_cached``, so sync and async reads hit the same cache.
+        """
+        cached = self.backend.get(key)
+        if cached is not None:
+            CACHE_REQUESTS.labels(self.name, 'hit').inc()
+            return json.loads(cached)
+
+        CACHE_REQUESTS.labels(self.name, 'miss').inc()
+        value = await load()
+        if not self._has_error(value):
+            self.backend.set(key, json.dumps(value), self.ttl)
+        return value
+
+    def _has_error(self, value) -> bool:
+        """Check whether a provider result reports an error."""
+        if isinstance(value, dict):
+            return bool(value.get('error'))
+        if isinstance(value, list):
+            return value[1] is not None
+        return False
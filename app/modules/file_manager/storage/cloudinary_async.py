@@ -0,0 +1,254 @@
+"""Async Cloudinary Admin API client over a pooled HTTP connection pool.
+
+Without Cloudinary credentials ``create_async_client`` returns None and CloudinaryStorage
+falls back to running the blocking SDK calls on worker threads.
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import cloudinary
+from flask import current_app
+import httpx
+
+from ..constants import CLOUDINARY_ASYNC_MAX_CONNECTIONS
+from ..constants import CLOUDINARY_MAX_RESULTS
+from ..constants import REMOTE_READ_TIMEOUT
+from ..storage.base import sort_items
+from ..storage.cloudinary_utils import decode_cursor
+from ..storage.cloudinary_utils import encode_cursor
+from ..storage.cloudinary_utils import RESOURCE_TYPES
+from ..storage.cloudinary_utils import usage_from_response
+from ..storage.instrumentation import CLOUDINARY_ERRORS
+from ..storage.instrumentation import CLOUDINARY_SECONDS
+
+DEFAULT_API_PREFIX = 'https://api.cloudinary.com'
+
+
+class AsyncCloudinaryClient:
+    """Subset of the Cloudinary Admin API used for listings and usage, as coroutines.
+
+    A single ``httpx.AsyncClient`` keeps up to CLOUDINARY_ASYNC_MAX_CONNECTIONS
+    keep-alive connections open, so concurrent calls share connections instead of
+    each paying for a TLS handshake. The client must be used from one event loop.
+    """
+
+    def __init__(self, client):
+        """Initialize the client.
+
+        Args:
+            client: ``httpx.AsyncClient`` whose base URL is the cloud's Admin API root
+        """
+        self._client = client
+
+    async def resources(
+        self,
+        resource_type: str,
+        type: str = 'upload',
+        prefix: Optional[str] = None,
+        max_results: Optional[int] = None,
+        next_cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List resources, like ``cloudinary.api.resources``."""
+        return await self._get(
+            f'resources/{resource_type}/{type}',
+            prefix=prefix,
+            max_results=max_results,
+            next_cursor=next_cursor,
+        )
+
+    async def root_folders(self, max_results: Optional[int] = None) -> Dict[str, Any]:
+        """List the top-level folders, like ``cloudinary.api.root_folders``."""
+        return await self._get('folders', max_results=max_results)
+
+    async def subfolders(self, path: str, max_results: Optional[int] = None) -> Dict[str, Any]:
+        """List the subfolders of a folder, like ``cloudinary.api.subfolders``."""
+        return await self._get(f'folders/{path}', max_results=max_results)
+
+    async def usage(self) -> Dict[str, Any]:
+        """Get the account usage report, like ``cloudinary.api.usage``."""
+        return await self._get('usage')
+
+    async def aclose(self):
+        """Close the pooled connections."""
+        await self._client.aclose()
+
+    async def _get(self, path: str, **params) -> Dict[str, Any]:
+        """Send a GET request and decode the JSON response, raising on HTTP errors."""
+        params = {key: value for key, value in params.items() if value is not None}
+        function = path.split('/', 1)[0]
+        with CLOUDINARY_SECONDS.labels('admin_async', function).time():
+            try:
+                response = await self._client.get(path, params=params)
+            except Exception:
+                CLOUDINARY_ERRORS.labels('admin_async', function).inc()
+                raise
+        if response.is_error:
+            CLOUDINARY_ERRORS.labels('admin_async', function).inc()
+            try:
+                message = response.json()['error']['message']
+            except (ValueError, KeyError, TypeError):
+                message = response.text
+            raise IOError(f'Cloudinary API error {response.status_code}: {message}')
+        return response.json()
+
+
+def create_async_client() -> Optional[AsyncCloudinaryClient]:
+    """Create an Admin API client from the global Cloudinary configuration.
+
+    Must be called from the event loop the client will be used on.
+
+    Returns:
+        The client, or None if Cloudinary is not configured
+    """
+    config = cloudinary.config()
+    if not (config.cloud_name and config.api_key and config.api_secret):
+        return None
+
+    prefix = getattr(config, 'upload_prefix', None) or DEFAULT_API_PREFIX
+    limits = httpx.Limits(
+        max_connections=CLOUDINARY_ASYNC_MAX_CONNECTIONS,
+        max_keepalive_connections=CLOUDINARY_ASYNC_MAX_CONNECTIONS,
+    )
+    client = httpx.AsyncClient(
+        base_url=f'{prefix.rstrip("/")}/v1_1/{config.cloud_name}/',
+        auth=(config.api_key, config.api_secret),
+        limits=limits,
+        timeout=REMOTE_READ_TIMEOUT,
+    )
+    return AsyncCloudinaryClient(client)
+
+
+class AsyncCloudinaryMixin:
+    """Async listing and usage for CloudinaryStorage over an ``AsyncCloudinaryClient``.
+
+    Folders and every resource type of a page, or the listing and the usage report, are
+    awaited concurrently on the caller's event loop. Without a client the blocking
+    implementations from StorageProvider (run on worker threads) are used instead.
+    """
+
+    _async_client = None
+    _async_loop = None
+
+    async def get_storage_usage_async(self) -> Dict[str, Union[int, float]]:
+        """Get storage usage information with the async client.
+
+        Returns:
+            Dict[str, Union[int, float]]: Dictionary as returned by get_storage_usage.
+        """
+        client = self._get_async_client()
+        if client is None:
+            return await super().get_storage_usage_async()
+
+        try:
+            return usage_from_response(await client.usage())
+        except Exception as e:
+            error_msg = f'Error getting Cloudinary usage: {e}'
+            current_app.logger.error(error_msg)
+            return {'used': 0, 'total': 1, 'name': 'Cloudinary', 'error': error_msg}
+
+    async def list_items_async(
+        self,
+        path: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort_by: str = 'name',
+        reverse: bool = False,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List a page of items with the async client, as described in list_items.
+
+        Returns:
+            Dict[str, Any]: Page of items as described in StorageProvider.list_items.
+        """
+        client = self._get_async_client()
+        if client is None:
+            return await super().list_items_async(path, offset, limit, sort_by, reverse, cursor)
+
+        page = {'items': [], 'total': None, 'offset': offset, 'next_cursor': None}
+        status = self.status_checker.get_status()
+        if not status['configured'] or not status['online']:
+            page['error'] = 'Cloudinary is offline'
+            return page
+
+        try:
+            cursors = decode_cursor(cursor)
+            first_page = cursors is None
+            if first_page:
+                cursors = {resource_type: None for resource_type in RESOURCE_TYPES}
+
+            while True:
+                items, cursors = await self._list_page_async(
+                    client, path, cursors, limit, first_page
+                )
+                page['items'].extend(items)
+                first_page = False
+                if limit or not cursors:
+                    break
+
+            page['next_cursor'] = encode_cursor(cursors)
+        except Exception as e:
+            page['error'] = f'Error listing Cloudinary items: {e}'
+            current_app.logger.error(page['error'])
+            self.status_checker.record_failure(e)
+
+        sort_items(page['items'], sort_by, reverse)
+        return page
+
+    async def _list_page_async(
+        self,
+        client: AsyncCloudinaryClient,
+        path: str,
+        cursors: Dict[str, Optional[str]],
+        limit: Optional[int],
+        with_folders: bool,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """Fetch one page of every pending resource type (and folders) concurrently."""
+        max_results = min(limit or CLOUDINARY_MAX_RESULTS, CLOUDINARY_MAX_RESULTS)
+        calls = [
+            client.resources(
+                resource_type,
+                prefix=f'{path}/' if path else None,
+                max_results=max_results,
+                next_cursor=cursors[resource_type],
+            )
+            for resource_type in cursors
+        ]
+        if with_folders:
+            if path and path.strip():
+                calls.append(client.subfolders(path, max_results=CLOUDINARY_MAX_RESULTS))
+            else:
+                calls.append(client.root_folders(max_results=CLOUDINARY_MAX_RESULTS))
+
+        results = await asyncio.gather(*calls)
+        items = []
+        if with_folders:
+            items = [self._folder_to_item(folder) for folder in results.pop().get('folders', [])]
+
+        next_cursors = {}
+        for resource_type, result in zip(cursors, results):
+            # Prefix listings are recursive; keep only direct children of the path
+            items.extend(
+                self._resource_to_item(resource, resource_type)
+                for resource in result.get('resources', [])
+                if os.path.dirname(resource['public_id']) == (path or '')
+            )
+            if result.get('next_cursor'):
+                next_cursors[resource_type] = result['next_cursor']
+        return items, next_cursors
+
+    def _get_async_client(self) -> Optional[AsyncCloudinaryClient]:
+        """Get the client bound to the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_client = create_async_client()
+            self._async_loop = loop
+        return self._async_client
+
+    def _close_async_client(self):
+        """Close the async client's connections on the loop that owns them."""
+        client, loop = self._async_client, self._async_loop
+        self._async_client = self._async_loop = None
+        if client is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
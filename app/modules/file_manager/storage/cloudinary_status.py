@@ -0,0 +1,129 @@
+"""Cloudinary connection status tracking."""
+
+from datetime import datetime
+import threading
+import time
+from typing import Dict, Union
+
+from flask import current_app
+
+from ..constants import CLOUDINARY_BACKOFF_BASE
+from ..constants import CLOUDINARY_BACKOFF_MAX
+from ..constants import CLOUDINARY_FAILURE_THRESHOLD
+from ..constants import CLOUDINARY_STATUS_CACHE_TTL
+from ..storage.health import CircuitBreaker
+from ..storage.instrumentation import admin_api
+
+
+class CloudinaryStatus:
+    """Class to check and maintain Cloudinary connection status.
+
+    This class handles checking the connection status to Cloudinary and caching the results.
+    Pings are made by the background health monitor; request handlers read the cached
+    snapshot through ``get_status()``. A circuit breaker spaces out pings with jittered
+    backoff while Cloudinary is failing.
+    """
+
+    def __init__(self):
+        """Initialize the status checker with default values."""
+        self.breaker = CircuitBreaker(
+            CLOUDINARY_FAILURE_THRESHOLD, CLOUDINARY_BACKOFF_BASE, CLOUDINARY_BACKOFF_MAX
+        )
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._has_succeeded = False
+        self.status = {
+            'configured': False,
+            'online': False,
+            'error': False,
+            'error_message': '',
+            'last_check': None,
+            'state': self.breaker.state,
+        }
+
+    def should_refresh(self) -> bool:
+        """Check if status should be refreshed based on cache TTL.
+
+        While Cloudinary is failing, the backoff delay is used instead of the TTL.
+
+        Returns:
+            bool: True if status needs refresh, False otherwise.
+        """
+        return self.seconds_until_refresh() <= 0
+
+    def seconds_until_refresh(self) -> float:
+        """Get the seconds until the status should be refreshed.
+
+        Returns:
+            float: Remaining time, 0 if a refresh is due.
+        """
+        return max(0.0, self._next_check - time.monotonic())
+
+    def get_status(self) -> Dict[str, Union[bool, str]]:
+        """Get the cached status without contacting Cloudinary.
+
+        Returns:
+            Dict[str, Union[bool, str]]: Copy of the last status snapshot.
+        """
+        return dict(self.status)
+
+    def check_status(self) -> Dict[str, Union[bool, str]]:
+        """Check Cloudinary connection status.
+
+        Returns:
+            Dict[str, Union[bool, str]]: Dictionary containing status information.
+        """
+        status = {
+            'configured': all(current_app.config['CLOUDINARY'].values()),
+            'online': False,
+            'error': False,
+            'error_message': '',
+            'last_check': datetime.now(),
+        }
+
+        if status['configured']:
+            if self.breaker.allow_request():
+                try:
+                    admin_api.ping()
+                    self.breaker.record_success()
+                except Exception as e:
+                    self.breaker.record_failure()
+                    status['error'] = True
+                    status['error_message'] = str(e)
+                    current_app.logger.error(f'Cloudinary connection error: {e}')
+            else:
+                status['error'] = True
+                status['error_message'] = self.status['error_message']
+
+        self._publish(status)
+        return dict(self.status)
+
+    def record_failure(self, error: Exception):
+        """Record a failed Cloudinary call made outside of the health checks.
+
+        Args:
+            error: The exception raised by the call.
+        """
+        self.breaker.record_failure()
+        status = dict(self.status)
+        status['error'] = True
+        status['error_message'] = str(error)
+        self._publish(status)
+
+    def _publish(self, status: Dict[str, Union[bool, str]]):
+        """Replace the cached snapshot and schedule the next refresh."""
+        with self._lock:
+            if not status['error'] and status['configured']:
+                self._has_succeeded = True
+
+            state = self.breaker.state
+            status['state'] = state
+            status['online'] = (
+                status['configured'] and self._has_succeeded and state == CircuitBreaker.CLOSED
+            )
+            if self.breaker.failures:
+                self._next_check = time.monotonic() + self.breaker.retry_after()
+            else:
+                self._next_check = time.monotonic() + CLOUDINARY_STATUS_CACHE_TTL
+
+            self.status = status
@@ -3,84 +3,57 @@
 This module provides classes for interacting with Cloudinary storage service.
 """
 
-from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import os
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import cloudinary
-import cloudinary.api
-import cloudinary.uploader
+import cloudinary.utils
 from flask import current_app
 from werkzeug.utils import secure_filename
 
 from ..constants import ALLOWED_IMAGE_EXTENSIONS
 from ..constants import ALLOWED_VIDEO_EXTENSIONS
-from ..constants import CLOUDINARY_STATUS_CACHE_TTL
+from ..constants import CLOUDINARY_API_WORKERS
+from ..constants import CLOUDINARY_DELETE_BATCH_SIZE
+from ..constants import CLOUDINARY_MAX_RESULTS
+from ..constants import CLOUDINARY_UPLOAD_CHUNK_SIZE
+from ..storage.base import sort_items
 from ..storage.base import StorageProvider
-
-
-class CloudinaryStatus:
-    """Class to check and maintain Cloudinary connection status.
-
-    This class handles checking the connection status to Cloudinary and caching the results.
-    """
-
-    def __init__(self):
-        """Initialize the status checker with default values."""
-        self.status = {
-            'configured': False,
-            'online': False,
-            'error': False,
-            'error_message': '',
-            'last_check': None,
-        }
-        self.check_status()
-
-    def should_refresh(self) -> bool:
-        """Check if status should be refreshed based on cache TTL.
-
-        Returns:
-            bool: True if status needs refresh, False otherwise.
-        """
-        if not self.status['last_check']:
-            return True
-
-        elapsed = datetime.now() - self.status['last_check']
-        return elapsed.total_seconds() > CLOUDINARY_STATUS_CACHE_TTL
-
-    def check_status(self) -> Dict[str, Union[bool, str]]:
-        """Check Cloudinary connection status.
-
-        Returns:
-            Dict[str, Union[bool, str]]: Dictionary containing status information.
-        """
-        self.status['configured'] = all(current_app.config['CLOUDINARY'].values())
-        self.status['online'] = False
-        self.status['error'] = False
-        self.status['error_message'] = ''
-        self.status['last_check'] = datetime.now()
-
-        if self.status['configured']:
-            try:
-                cloudinary.api.ping()
-                self.status['online'] = True
-            except Exception as e:
-                self.status['error'] = True
-                self.status['error_message'] = str(e)
-                current_app.logger.error(f'Cloudinary connection error: {e}')
-
-        return self.status
-
-
-class CloudinaryStorage(StorageProvider):
+from ..storage.cloudinary_async import AsyncCloudinaryMixin
+from ..storage.cloudinary_status import CloudinaryStatus
+from ..storage.cloudinary_utils import batched
+from ..storage.cloudinary_utils import decode_cursor
+from ..storage.cloudinary_utils import encode_cursor
+from ..storage.cloudinary_utils import parse_timestamp
+from ..storage.cloudinary_utils import RESOURCE_TYPES
+from ..storage.cloudinary_utils import usage_from_response
+from ..storage.instrumentation import admin_api
+from ..storage.instrumentation import upload_api
+from ..storage.signals import items_removed
+from ..storage.signals import items_stored
+
+
+class CloudinaryStorage(AsyncCloudinaryMixin, StorageProvider):
     """Cloudinary storage provider implementation.
 
     This class implements the StorageProvider interface for Cloudinary storage service.
     """
 
+    name = 'cloudinary'
+
     def __init__(self):
         """Initialize Cloudinary storage provider with status checker."""
         self.status_checker = CloudinaryStatus()
+        self._executor = ThreadPoolExecutor(
+            max_workers=CLOUDINARY_API_WORKERS, thread_name_prefix='cloudinary-api'
+        )
+
+    def close(self):
+        """Stop the worker threads and async connections used for concurrent API calls."""
+        self._executor.shutdown(wait=False)
+        self._close_async_client()
 
     def get_resource_type(self, filename: str) -> str:
         """Get Cloudinary resource type based on file extension.
@@ -99,61 +72,178 @@ class CloudinaryStorage(StorageProvider):
             return 'video'
         return 'raw'
 
-    def list_items(self, path: str) -> List[Dict[str, Union[str, bool, int]]]:
-        """List items from Cloudinary storage.
+    def list_items(
+        self,
+        path: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort_by: str = 'name',
+        reverse: bool = False,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List a page of items from Cloudinary storage.
+
+        Image, video and raw resources are listed concurrently, so a page costs about the
+        latency of the slowest call. Each page holds up to ``limit`` resources of each
+        type (folders are listed on the first page) and is sorted within itself; the total
+        is unknown, so pages are reached through ``next_cursor``.
 
         Args:
             path (str): Path to list items from.
+            offset (int): Offset reported back in the page (Cloudinary pages by cursor).
+            limit (Optional[int]): Maximum number of resources per type, None for all.
+            sort_by (str): Field to sort by.
+            reverse (bool): Sort in descending order.
+            cursor (Optional[str]): Cursor returned for a previous page.
 
         Returns:
-            List[Dict[str, Union[str, bool, int]]]: List of items with their properties.
+            Dict[str, Any]: Page of items as described in StorageProvider.list_items.
         """
-        items = []
-        status = self.status_checker.check_status()
+        page = {'items': [], 'total': None, 'offset': offset, 'next_cursor': None}
+        status = self.status_checker.get_status()
 
         if not status['configured'] or not status['online']:
-            return items
+            page['error'] = 'Cloudinary is offline'
+            return page
 
         try:
-            # List folders
-            folders_result = cloudinary.api.subfolders(path if path and path.strip() else '')
-
-            for folder in folders_result.get('folders', []):
-                folder_name = os.path.basename(folder['path'])
-                items.append(
-                    {
-                        'name': folder_name,
-                        'is_dir': True,
-                        'size': 0,
-                        'path': folder['path'],
-                    }
-                )
+            cursors = decode_cursor(cursor)
+            first_page = cursors is None
+            if first_page:
+                cursors = {resource_type: None for resource_type in RESOURCE_TYPES}
+
+            while True:
+                items, cursors = self._list_page(path, cursors, limit, first_page)
+                page['items'].extend(items)
+                first_page = False
+                if limit or not cursors:
+                    break
+
+            page['next_cursor'] = encode_cursor(cursors)
+        except Exception as e:
+            page['error'] = f'Error listing Cloudinary items: {e}'
+            current_app.logger.error(page['error'])
+            self.status_checker.record_failure(e)
+
+        sort_items(page['items'], sort_by, reverse)
+        return page
+
+    def _list_page(
+        self, path: str, cursors: Dict[str, Optional[str]], limit: Optional[int], with_folders: bool
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """Fetch one page of every pending resource type (and folders) concurrently.
 
-            # List files
-            result = cloudinary.api.resources(
-                # TODO: return all files that match the allowed extensions
-                resource_type='raw',
-                prefix=path if path else None,
-                max_results=500,
+        Returns:
+            Tuple of (items, cursors of the resource types that have more pages).
+        """
+        futures = {
+            resource_type: self._executor.submit(
+                self._list_resources, path, resource_type, cursors[resource_type], limit
             )
+            for resource_type in cursors
+        }
+        folders = self._executor.submit(self._list_folders, path) if with_folders else None
+
+        items = folders.result() if folders else []
+        next_cursors = {}
+        for resource_type, future in futures.items():
+            resources, next_cursor = future.result()
+            items.extend(resources)
+            if next_cursor:
+                next_cursors[resource_type] = next_cursor
+        return items, next_cursors
+
+    def _list_folders(self, path: str) -> List[Dict[str, Any]]:
+        """List the subfolders of a path."""
+        if path and path.strip():
+            result = admin_api.subfolders(path, max_results=CLOUDINARY_MAX_RESULTS)
+        else:
+            result = admin_api.root_folders(max_results=CLOUDINARY_MAX_RESULTS)
+
+        return [self._folder_to_item(folder) for folder in result.get('folders', [])]
+
+    def _folder_to_item(self, folder: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a Cloudinary folder to a listing item."""
+        return {
+            'name': os.path.basename(folder['path']),
+            'is_dir': True,
+            'size': 0,
+            'path': folder['path'],
+            'modified': None,
+        }
 
-            for resource in result.get('resources', []):
-                filename = os.path.basename(resource['public_id'])
-                items.append(
-                    {
-                        'name': filename,
-                        'is_dir': False,
-                        'size': resource.get('bytes', 0),
-                        'path': resource['public_id'],
-                    }
-                )
+    def _list_resources(
+        self, path: str, resource_type: str, next_cursor: Optional[str], limit: Optional[int]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List one page of resources of a type directly inside a path.
 
-        except Exception as e:
-            current_app.logger.error(f'Error listing Cloudinary items: {e}')
-            self.status_checker.status['error'] = True
-            self.status_checker.status['error_message'] = str(e)
+        Returns:
+            Tuple of (items, cursor of the next page or None).
+        """
+        options = {'next_cursor': next_cursor} if next_cursor else {}
+        result = admin_api.resources(
+            resource_type=resource_type,
+            type='upload',
+            prefix=f'{path}/' if path else None,
+            max_results=min(limit or CLOUDINARY_MAX_RESULTS, CLOUDINARY_MAX_RESULTS),
+            **options,
+        )
+
+        # Prefix listings are recursive; keep only direct children of the path
+        items = [
+            self._resource_to_item(resource, resource_type)
+            for resource in result.get('resources', [])
+            if os.path.dirname(resource['public_id']) == (path or '')
+        ]
+        return items, result.get('next_cursor')
+
+    def _resource_to_item(self, resource: Dict[str, Any], resource_type: str) -> Dict[str, Any]:
+        """Convert a Cloudinary resource to a listing item."""
+        return {
+            'name': os.path.basename(resource['public_id']),
+            'is_dir': False,
+            'size': resource.get('bytes', 0),
+            'path': resource['public_id'],
+            'modified': parse_timestamp(resource.get('created_at')),
+            'resource_type': resource_type,
+            'etag': resource.get('etag'),
+        }
+
+    def walk_files(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Yield the resource at a path, or every resource below a folder.
 
-        return items
+        Uses recursive prefix listings (a few calls per 500 resources of each type)
+        instead of walking folder by folder. Items carry the resource's delivery URL, so
+        ``open_file`` needs no further API calls.
+
+        Args:
+            path (str): Public id or folder path, '' for everything.
+
+        Yields:
+            Dict[str, Any]: File items as returned by ``list_items``, plus 'url'.
+        """
+        path = path.strip('/')
+        for resource_type in RESOURCE_TYPES:
+            options = {}
+            while True:
+                result = admin_api.resources(
+                    resource_type=resource_type,
+                    type='upload',
+                    prefix=path or None,
+                    max_results=CLOUDINARY_MAX_RESULTS,
+                    **options,
+                )
+                for resource in result.get('resources', []):
+                    public_id = resource['public_id']
+                    if path and public_id != path and not public_id.startswith(f'{path}/'):
+                        continue
+                    item = self._resource_to_item(resource, resource_type)
+                    item['url'] = resource.get('secure_url') or resource.get('url')
+                    yield item
+
+                if not result.get('next_cursor'):
+                    break
+                options = {'next_cursor': result['next_cursor']}
 
     def upload_file(self, file, path: str, filename: str) -> Tuple[bool, Optional[str]]:
         """Upload file to Cloudinary.
@@ -166,16 +256,46 @@ class CloudinaryStorage(StorageProvider):
         Returns:
             Tuple[bool, Optional[str]]: Success status and error message if any.
         """
+        return self._upload(upload_api.upload, file, path, filename)
+
+    def commit_upload(
+        self, source_path: str, path: str, filename: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Upload an assembled file to Cloudinary in chunks.
+
+        ``upload_large`` streams the file from disk in CLOUDINARY_UPLOAD_CHUNK_SIZE parts,
+        so large files never have to fit in memory.
+
+        Args:
+            source_path (str): Path of the assembled file on local disk.
+            path (str): Path where to upload the file.
+            filename (str): Name of the file.
+
+        Returns:
+            Tuple[bool, Optional[str]]: Success status and error message if any.
+        """
+        return self._upload(
+            upload_api.upload_large,
+            source_path,
+            path,
+            filename,
+            chunk_size=CLOUDINARY_UPLOAD_CHUNK_SIZE,
+        )
+
+    def _upload(
+        self, upload, file, path: str, filename: str, **options
+    ) -> Tuple[bool, Optional[str]]:
+        """Upload a file with the given Cloudinary uploader function."""
         try:
             safe_filename = secure_filename(filename)
             upload_path = os.path.join(path, safe_filename) if path else safe_filename
             resource_type = self.get_resource_type(safe_filename)
 
-            result = cloudinary.uploader.upload(
-                file, public_id=upload_path, resource_type=resource_type
-            )
+            result = upload(file, public_id=upload_path, resource_type=resource_type, **options)
 
             current_app.logger.info(f"File uploaded to Cloudinary: {result['url']}")
+            resource = dict(result, public_id=result.get('public_id', upload_path))
+            items_stored.send(self, items=[self._resource_to_item(resource, resource_type)])
             return True, None
 
         except Exception as e:
@@ -194,13 +314,99 @@ class CloudinaryStorage(StorageProvider):
         """
         try:
             resource_type = self.get_resource_type(path)
-            cloudinary.uploader.destroy(path, resource_type=resource_type)
+            upload_api.destroy(path, resource_type=resource_type)
+            items_removed.send(self, paths=[path])
             return True, None
         except Exception as e:
             error_msg = f'Error deleting from Cloudinary: {e}'
             current_app.logger.error(error_msg)
             return False, error_msg
 
+    def delete_items(
+        self, paths: Iterable[str] = (), folders: Iterable[str] = ()
+    ) -> Tuple[bool, Optional[str]]:
+        """Delete many resources and folders with bulk Admin API calls.
+
+        Resources are deleted with ``delete_resources`` in batches of up to
+        CLOUDINARY_DELETE_BATCH_SIZE public ids per resource type. A folder is emptied
+        with ``delete_resources_by_prefix`` (one call per resource type, repeated while
+        Cloudinary reports a partial deletion) and then removed, with its empty
+        subfolders, by ``delete_folder``.
+
+        Args:
+            paths (Iterable[str]): Public ids of the resources to delete.
+            folders (Iterable[str]): Folders to delete with everything below them.
+
+        Returns:
+            Tuple[bool, Optional[str]]: Success status and error message if any.
+        """
+        by_type = defaultdict(list)
+        for path in paths:
+            by_type[self.get_resource_type(path)].append(path)
+
+        futures = {
+            self._executor.submit(
+                admin_api.delete_resources, batch, resource_type=resource_type
+            ): batch
+            for resource_type, public_ids in by_type.items()
+            for batch in batched(public_ids, CLOUDINARY_DELETE_BATCH_SIZE)
+        }
+        futures.update(
+            {self._executor.submit(self._delete_folder, folder): [folder] for folder in folders}
+        )
+
+        errors = []
+        removed = []
+        for future, deleted in futures.items():
+            try:
+                future.result()
+                removed.extend(deleted)
+            except Exception as e:
+                errors.append(str(e))
+
+        if removed:
+            items_removed.send(self, paths=removed)
+        if errors:
+            error_msg = f"Error deleting from Cloudinary: {'; '.join(errors)}"
+            current_app.logger.error(error_msg)
+            return False, error_msg
+        return True, None
+
+    def _delete_folder(self, folder: str):
+        """Delete every resource below a folder, then the folder itself."""
+        folder = folder.strip('/')
+        for resource_type in RESOURCE_TYPES:
+            options = {}
+            while True:
+                result = admin_api.delete_resources_by_prefix(
+                    f'{folder}/', resource_type=resource_type, **options
+                )
+                if not result.get('partial') or not result.get('next_cursor'):
+                    break
+                options = {'next_cursor': result['next_cursor']}
+        admin_api.delete_folder(folder)
+
+    def get_resource(self, path: str) -> Dict[str, Any]:
+        """Get the size, content tag and delivery URL of a resource.
+
+        Args:
+            path (str): Public id of the resource.
+
+        Returns:
+            Dict[str, Any]: Item with 'path', 'size', 'etag' (MD5 of the content) and 'url'.
+
+        Raises:
+            cloudinary.exceptions.Error: If the Admin API call fails (NotFound if the
+                resource does not exist).
+        """
+        resource = admin_api.resource(path, resource_type=self.get_resource_type(path))
+        return {
+            'path': path,
+            'size': resource.get('bytes', 0),
+            'etag': resource.get('etag'),
+            'url': resource.get('secure_url') or resource['url'],
+        }
+
     def get_file(self, path: str) -> Tuple[Optional[str], Optional[str]]:
         """Get file URL from Cloudinary.
 
@@ -211,13 +417,41 @@ class CloudinaryStorage(StorageProvider):
             Tuple[Optional[str], Optional[str]]: File URL and error message if any.
         """
         try:
-            resource = cloudinary.api.resource(path)
+            resource = admin_api.resource(path, resource_type=self.get_resource_type(path))
             return resource['url'], None
         except Exception as e:
             error_msg = f'Error getting Cloudinary file: {e}'
             current_app.logger.error(error_msg)
             return None, error_msg
 
+    def get_thumbnail_url(self, path: str, size: int) -> Optional[str]:
+        """Get a derived transformation URL shrinking an image to fit a ``size`` square.
+
+        Cloudinary renders and caches the rendition on its CDN the first time it is
+        requested, so no API call is made here.
+
+        Args:
+            path (str): Path (public id) of the image.
+            size (int): Largest width or height of the rendition.
+
+        Returns:
+            Optional[str]: Rendition URL, or None if the file is not an image.
+        """
+        if self.get_resource_type(path) != 'image':
+            return None
+        url, _ = cloudinary.utils.cloudinary_url(
+            path,
+            resource_type='image',
+            type='upload',
+            format='jpg',
+            width=size,
+            height=size,
+            crop='limit',
+            quality='auto',
+            secure=True,
+        )
+        return url
+
     def create_folder(self, path: str) -> Tuple[bool, Optional[str]]:
         """Create a new folder in Cloudinary.
 
@@ -228,7 +462,8 @@ class CloudinaryStorage(StorageProvider):
             Tuple[bool, Optional[str]]: Success status and error message if any.
         """
         try:
-            cloudinary.api.create_folder(path)
+            admin_api.create_folder(path)
+            items_stored.send(self, items=[self._folder_to_item({'path': path})])
             return True, None
         except Exception as e:
             error_msg = f'Error creating Cloudinary folder: {e}'
@@ -242,46 +477,8 @@ class CloudinaryStorage(StorageProvider):
             Dict[str, Union[int, float]]: Dictionary containing storage usage information.
         """
         try:
-            usage = cloudinary.api.usage()
-            current_app.logger.debug(f'Cloudinary usage response: {usage}')
-
-            # Extract numeric values from nested dictionaries
-            storage_used = 0
-            storage_limit = 0
-
-            # Get storage usage (in bytes)
-            has_storage = (
-                'storage' in usage
-                and isinstance(usage['storage'], dict)
-                and 'usage' in usage['storage']
-            )
-            if has_storage:
-                storage_used = usage['storage']['usage']
-
-            # Get storage limit
-            # In the free plan, the limit is based on credits
-            if 'credits' in usage and isinstance(usage['credits'], dict):
-                if 'limit' in usage['credits']:
-                    # Convert credits to bytes (approximately 1 credit = 1GB)
-                    storage_limit = usage['credits']['limit'] * 1024 * 1024 * 1024
-
-            # Verify if the values are numbers
-            if not isinstance(storage_used, (int, float)):
-                msg = f'Cloudinary storage_used is not a number: {storage_used}'
-                current_app.logger.warning(msg)
-                storage_used = 0
-
-            if not isinstance(storage_limit, (int, float)) or storage_limit <= 0:
-                msg = f'Cloudinary storage_limit invalid: {storage_limit}'
-                current_app.logger.warning(msg)
-                # Set a default value for the free plan (25GB)
-                storage_limit = 25 * 1024 * 1024 * 1024
-
-            return {
-                'used': storage_used,  # in bytes
-                'total': storage_limit,  # in bytes
-                'name': 'Cloudinary',
-            }
+            return usage_from_response(admin_api.usage())
         except Exception as e:
-            current_app.logger.error(f'Error getting Cloudinary usage: {e}')
-            return {'used': 0, 'total': 1, 'name': 'Cloudinary'}
+            error_msg = f'Error getting Cloudinary usage: {e}'
+            current_app.logger.error(error_msg)
+            return {'used': 0, 'total': 1, 'name': 'Cloudinary', 'error': error_msg}
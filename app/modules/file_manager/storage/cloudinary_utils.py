@@ -0,0 +1,119 @@
+"""Helpers for Cloudinary Admin API results and cursors."""
+
+import base64
+from datetime import datetime
+from datetime import timezone
+import json
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from flask import current_app
+
+RESOURCE_TYPES = ('image', 'video', 'raw')
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Convert a Cloudinary ISO 8601 timestamp to a POSIX timestamp.
+
+    Args:
+        value (Optional[str]): Timestamp such as '2024-01-31T12:00:00Z'.
+
+    Returns:
+        Optional[float]: POSIX timestamp, or None if the value is missing or invalid.
+    """
+    try:
+        return (
+            datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc).timestamp()
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def encode_cursor(cursors: Dict[str, str]) -> Optional[str]:
+    """Pack the per-resource-type Cloudinary cursors into one opaque cursor.
+
+    Args:
+        cursors (Dict[str, str]): Next cursor of each resource type that has more pages.
+
+    Returns:
+        Optional[str]: URL-safe cursor, or None if every type is exhausted.
+    """
+    if not cursors:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(cursors).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, str]]:
+    """Unpack a cursor created by ``encode_cursor``.
+
+    Args:
+        cursor (Optional[str]): Opaque cursor.
+
+    Returns:
+        Optional[Dict[str, str]]: Per-resource-type cursors, or None to start from the
+        first page.
+    """
+    if not cursor:
+        return None
+    try:
+        cursors = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        return None
+    if not isinstance(cursors, dict):
+        return None
+    return {key: value for key, value in cursors.items() if key in RESOURCE_TYPES}
+
+
+def batched(items: List[str], size: int) -> Iterator[List[str]]:
+    """Split a list into consecutive batches of at most ``size`` items.
+
+    Args:
+        items (List[str]): Items to split.
+        size (int): Largest batch size.
+
+    Yields:
+        List[str]: Consecutive batches.
+    """
+    for start in range(0, len(items), size):
+        end = start + size
+        yield items[start:end]
+
+
+def usage_from_response(usage: Dict[str, Any]) -> Dict[str, Union[int, float]]:
+    """Extract the storage usage from a Cloudinary usage report."""
+    current_app.logger.debug(f'Cloudinary usage response: {usage}')
+
+    # Extract numeric values from nested dictionaries
+    storage_used = 0
+    storage_limit = 0
+
+    # Get storage usage (in bytes)
+    has_storage = (
+        'storage' in usage and isinstance(usage['storage'], dict) and 'usage' in usage['storage']
+    )
+    if has_storage:
+        storage_used = usage['storage']['usage']
+
+    # Get storage limit
+    # In the free plan, the limit is based on credits
+    if 'credits' in usage and isinstance(usage['credits'], dict):
+        if 'limit' in usage['credits']:
+            # Convert credits to bytes (approximately 1 credit = 1GB)
+            storage_limit = usage['credits']['limit'] * 1024 * 1024 * 1024
+
+    # Verify if the values are numbers
+    if not isinstance(storage_used, (int, float)):
+        msg = f'Cloudinary storage_used is not a number: {storage_used}'
+        current_app.logger.warning(msg)
+        storage_used = 0
+
+    if not isinstance(storage_limit, (int, float)) or storage_limit <= 0:
+        msg = f'Cloudinary storage_limit invalid: {storage_limit}'
+        current_app.logger.warning(msg)
+        # Set a default value for the free plan (25GB)
+        storage_limit = 25 * 1024 * 1024 * 1024
+
+    return {
+        'used': storage_used,  # in bytes
+        'total': storage_limit,  # in bytes
+        'name': 'Cloudinary',
+    }
@@ -0,0 +1,199 @@
+"""In-memory mirror of a directory tree, with per-folder usage totals."""
+
+import logging
+import os
+import stat
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TreeNode:
+    """File or folder of a ``DirectoryTree``."""
+
+    __slots__ = ('name', 'parent', 'is_dir', 'size', 'modified', 'used', 'children')
+
+    def __init__(self, name: str, is_dir: bool, size: int = 0, modified: float = 0.0):
+        """Initialize a node.
+
+        Args:
+            name: Entry name
+            is_dir: Whether the entry is a folder (or a link to one)
+            size: Size in bytes shown in listings
+            modified: Modification time
+        """
+        self.name = name
+        self.parent: Optional['TreeNode'] = None
+        self.is_dir = is_dir
+        self.size = size
+        self.modified = modified
+        # Bytes of the regular files at or below this node, as counted in usage
+        self.used = 0
+        # Entries of a folder by name; None for files and for links to folders
+        self.children: Optional[Dict[str, 'TreeNode']] = None
+
+    def to_item(self, path: str) -> Dict[str, Any]:
+        """Build the listing item of the node, ``path`` being the listed folder."""
+        return {
+            'name': self.name,
+            'is_dir': self.is_dir,
+            'size': 0 if self.is_dir else self.size,
+            'path': os.path.join(path, self.name),
+            'modified': self.modified,
+        }
+
+
+def stat_node(full_path: str, name: str) -> Optional[TreeNode]:
+    """Build an unlinked node for a path, without its folder contents.
+
+    Links are described by their target, but only real folders are descended into and
+    only regular files count towards usage, as in ``scan_tree``.
+
+    Returns:
+        The node, or None if the path does not exist (or is a broken link)
+    """
+    try:
+        link = os.lstat(full_path)
+        target = os.stat(full_path) if stat.S_ISLNK(link.st_mode) else link
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    node = TreeNode(name, stat.S_ISDIR(target.st_mode), target.st_size, target.st_mtime)
+    if stat.S_ISDIR(link.st_mode):
+        node.children = {}
+    elif stat.S_ISREG(link.st_mode):
+        node.used = link.st_size
+    return node
+
+
+def scan_node(full_path: str, name: str = '') -> Optional[TreeNode]:
+    """Build the node of a path with everything below it, in one pass of ``os.scandir``.
+
+    Returns:
+        The node, or None if the path does not exist
+    """
+    top = stat_node(full_path, name)
+    if top is None or top.children is None:
+        return top
+
+    folders = [(top, full_path)]
+    for folder, folder_path in folders:
+        try:
+            with os.scandir(folder_path) as entries:
+                for entry in entries:
+                    node = stat_node(entry.path, entry.name)
+                    if node is None:
+                        continue
+                    node.parent = folder
+                    folder.children[entry.name] = node
+                    if node.children is not None:
+                        folders.append((node, entry.path))
+        except OSError as e:
+            logger.warning(f'Skipping unreadable directory while mirroring a tree: {e}')
+
+    # Folders are listed parents first, so totals add up walking the list backwards
+    for folder, _ in reversed(folders):
+        folder.used += sum(child.used for child in folder.children.values())
+    return top
+
+
+def split_path(path: str) -> Optional[List[str]]:
+    """Split a storage path into its names, or None if it leaves the root."""
+    parts = [part for part in path.replace(os.sep, '/').split('/') if part not in ('', '.')]
+    return None if '..' in parts else parts
+
+
+class DirectoryTree:
+    """Mirror of the files and folders below a directory, kept in memory.
+
+    Every folder holds the bytes used below it, so both listings and usage (of the
+    whole tree or any folder) are answered without touching the disk. The tree is built
+    by ``rebuild()`` and kept current with ``refresh()`` calls for changed paths, made
+    by a watcher and by the storage's own write paths.
+    """
+
+    def __init__(self, root: str):
+        """Initialize an empty tree; it answers nothing until the first ``rebuild()``.
+
+        Args:
+            root: Directory to mirror
+        """
+        self.root_path = os.path.abspath(root)
+        self.root: Optional[TreeNode] = None
+        self._lock = threading.RLock()
+
+    def rebuild(self):
+        """Scan the whole directory and replace the mirror."""
+        root = scan_node(self.root_path) or TreeNode('', True)
+        if root.children is None:
+            root.children = {}
+        with self._lock:
+            self.root = root
+
+    def list_items(self, path: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the listing items of a folder, unsorted.
+
+        Returns:
+            The items, or None if the folder is not mirrored
+        """
+        with self._lock:
+            node = self._find(path)
+            if node is None or node.children is None:
+                return None
+            return [child.to_item(path) for child in node.children.values()]
+
+    def used(self, path: str = '') -> Optional[int]:
+        """Get the bytes used at or below a path, or None if it is not mirrored."""
+        with self._lock:
+            node = self._find(path)
+            return None if node is None else node.used
+
+    def refresh(self, path: str):
+        """Update the mirror of a path (and everything below it) from the disk.
+
+        Missing parent folders are mirrored as well, and paths that no longer exist are
+        removed, so this handles creations, changes and deletions alike.
+        """
+        parts = split_path(path)
+        with self._lock:
+            if self.root is None or not parts:
+                return
+            # Refresh the first folder on the way that is not mirrored yet, if any
+            folder = self.root
+            for depth, name in enumerate(parts[:-1]):
+                child = folder.children.get(name)
+                if child is None or child.children is None:
+                    parts = parts[: depth + 1]
+                    break
+                folder = child
+
+        full_path = os.path.join(self.root_path, *parts)
+        node = scan_node(full_path, parts[-1])
+        with self._lock:
+            # The folder may have been replaced while scanning; look it up again
+            folder = self._find('/'.join(parts[:-1]))
+            if folder is not None and folder.children is not None:
+                self._replace(folder, parts[-1], node)
+
+    def _find(self, path: str) -> Optional[TreeNode]:
+        """Get the node of a path; the caller holds the lock."""
+        parts = split_path(path)
+        node = self.root
+        for name in parts or ():
+            if node is None or node.children is None:
+                return None
+            node = node.children.get(name)
+        return node if parts is not None else None
+
+    def _replace(self, folder: TreeNode, name: str, node: Optional[TreeNode]):
+        """Swap the entry of a folder, updating the totals of every parent folder."""
+        previous = folder.children.pop(name, None)
+        if node is not None:
+            node.parent = folder
+            folder.children[name] = node
+
+        delta = (node.used if node else 0) - (previous.used if previous else 0)
+        while folder is not None and delta:
+            folder.used += delta
+            folder = folder.parent
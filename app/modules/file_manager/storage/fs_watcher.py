@@ -0,0 +1,276 @@
+"""Watchers keeping a ``DirectoryTree`` in step with changes made outside the app.
+
+Files can land in the upload folder from rsync, other machines on a share or manual
+copies. ``InotifyWatcher`` follows them as they happen through Linux inotify (called
+through ctypes, so no extra dependency is needed); elsewhere, or when inotify runs out
+of watches, ``PollingWatcher`` rescans the tree at a fixed interval instead.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..storage.directory_tree import DirectoryTree
+from ..storage.directory_tree import split_path
+
+logger = logging.getLogger(__name__)
+
+# inotify event masks, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_ONLYDIR
+    | IN_DONT_FOLLOW
+)
+
+EVENT_HEADER = struct.Struct('iIII')
+READ_SIZE = 64 * 1024
+STOP_CHECK_INTERVAL = 1.0  # seconds an idle inotify watcher waits before checking for stop
+
+
+class PollingWatcher:
+    """Background thread rebuilding a directory tree at a fixed interval.
+
+    The tree answers listings and usage once ``ready`` is set, after the first scan;
+    until then callers read the disk themselves.
+    """
+
+    def __init__(self, root: str, interval: float):
+        """Initialize the watcher.
+
+        Args:
+            root: Directory to mirror
+            interval: Seconds between rescans
+        """
+        self.tree = DirectoryTree(root)
+        self.interval = interval
+        self.ready = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the watcher thread if it is not running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='storage-fs-watcher', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Stop the watcher thread."""
+        self._stopped.set()
+
+    def list_items(self, path: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the items of a folder from the tree, or None until it is ready."""
+        return self.tree.list_items(path) if self.ready.is_set() else None
+
+    def used(self, path: str = '') -> Optional[int]:
+        """Get the bytes used at or below a path, or None until the tree is ready."""
+        return self.tree.used(path) if self.ready.is_set() else None
+
+    def refresh(self, path: str):
+        """Update a path changed by the application itself, without waiting for events."""
+        self.tree.refresh(path)
+
+    def _run(self):
+        """Rescan the tree, then sleep until the next rescan is due."""
+        while not self._stopped.is_set():
+            self._rebuild()
+            self._stopped.wait(self.interval)
+
+    def _rebuild(self):
+        """Rebuild the tree, logging rather than raising errors."""
+        try:
+            self.tree.rebuild()
+            self.ready.set()
+        except Exception as e:
+            logger.error(f'Scanning {self.tree.root_path} failed: {e}')
+
+
+def load_inotify() -> Optional[ctypes.CDLL]:
+    """Load the C library if it provides inotify, or return None."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def parse_events(data: bytes) -> Iterable[Tuple[int, int, str]]:
+    """Decode a buffer read from an inotify descriptor.
+
+    Yields:
+        Watch descriptor, event mask and entry name ('' for the watched folder itself)
+    """
+    offset = 0
+    while offset + EVENT_HEADER.size <= len(data):
+        wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+        start, offset = offset + EVENT_HEADER.size, offset + EVENT_HEADER.size + length
+        yield wd, mask, os.fsdecode(data[start:offset].rstrip(b'\0'))
+
+
+class InotifyWatcher(PollingWatcher):
+    """Watcher applying inotify events to the tree as they arrive.
+
+    Every folder gets a watch; events are read in batches and each changed path is
+    refreshed once per batch. A queue overflow triggers a full rescan. When inotify
+    cannot be used (including running out of watches, see
+    ``fs.inotify.max_user_watches``) the watcher falls back to polling.
+    """
+
+    def __init__(self, root: str, interval: float, libc: ctypes.CDLL):
+        """Initialize the watcher.
+
+        Args:
+            root: Directory to mirror
+            interval: Seconds between rescans once fallen back to polling
+            libc: C library providing the inotify functions
+        """
+        super().__init__(root, interval)
+        self._libc = libc
+        self._fd = -1
+        self._watches: Dict[int, str] = {}
+
+    def _run(self):
+        """Follow inotify events, or poll if inotify fails."""
+        try:
+            self._fd = self._check(self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC))
+            # Watch before scanning, so changes made during the scan are not missed
+            self._watch_tree('')
+            self._rebuild()
+            while not self._stopped.is_set():
+                self._read_events()
+        except OSError as e:
+            logger.warning(f'Watching {self.tree.root_path} with inotify failed, polling: {e}')
+            self._close()
+            super()._run()
+        else:
+            self._close()
+
+    def _read_events(self):
+        """Wait for a batch of events and apply it to the tree."""
+        readable, _, _ = select.select([self._fd], [], [], STOP_CHECK_INTERVAL)
+        if not readable:
+            return
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return
+
+        changed, rescan = self._handle_events(parse_events(data))
+        if rescan:
+            self._watch_tree('')
+            self._rebuild()
+            return
+        # Parents first, so a new folder is scanned before its own entries are looked at
+        for path in sorted(changed, key=lambda path: path.count('/')):
+            self.tree.refresh(path)
+
+    def _handle_events(self, events: Iterable[Tuple[int, int, str]]) -> Tuple[Set[str], bool]:
+        """Update the watches for a batch of events.
+
+        Returns:
+            Paths whose mirror must be refreshed, and whether a full rescan is needed
+        """
+        changed = set()
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                return changed, True
+            folder = self._watches.get(wd)
+            if folder is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+            if not name:
+                continue
+
+            path = f'{folder}/{name}' if folder else name
+            if mask & IN_ISDIR and mask & (IN_DELETE | IN_MOVED_FROM):
+                self._unwatch_tree(path)
+            elif mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(path)
+            changed.add(path)
+        return changed, False
+
+    def _watch_tree(self, path: str):
+        """Watch a folder and every folder below it."""
+        top = os.path.join(self.tree.root_path, *split_path(path))
+        for folder, dirs, _ in os.walk(top):
+            relative = os.path.relpath(folder, self.tree.root_path).replace(os.sep, '/')
+            relative = '' if relative == '.' else relative
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0 and ctypes.get_errno() in (errno.ENOENT, errno.ENOTDIR):
+                dirs.clear()  # removed while walking; its parent reports the deletion
+                continue
+            self._watches[self._check(wd)] = relative
+
+    def _unwatch_tree(self, path: str):
+        """Forget the watches of a folder tree that was removed or moved away."""
+        prefix = f'{path}/'
+        for wd, folder in list(self._watches.items()):
+            if folder == path or folder.startswith(prefix):
+                # A moved folder keeps its watch, so remove it; deleted ones are gone
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def _check(self, result: int) -> int:
+        """Raise the C library error of a failed call."""
+        if result < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        return result
+
+    def _close(self):
+        """Close the inotify descriptor."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._watches.clear()
+
+
+def create_watcher(root: str, interval: float) -> PollingWatcher:
+    """Create the best watcher available on this system (not started).
+
+    Args:
+        root: Directory to mirror
+        interval: Seconds between rescans when polling
+
+    Returns:
+        An ``InotifyWatcher`` on Linux, a ``PollingWatcher`` elsewhere
+    """
+    libc = load_inotify()
+    if libc is None:
+        return PollingWatcher(root, interval)
+    return InotifyWatcher(root, interval, libc)
@@ -0,0 +1,138 @@
+"""Background health monitoring for storage providers."""
+
+import random
+import threading
+import time
+
+from ..constants import CLOUDINARY_STATUS_CACHE_TTL
+
+
+class CircuitBreaker:
+    """Circuit breaker with jittered exponential backoff.
+
+    The breaker is closed while calls succeed. After ``failure_threshold`` consecutive
+    failures it opens and rejects calls until a jittered backoff delay has passed, then
+    lets a single probe through (half-open). A successful probe closes it again, a failed
+    one reopens it with a longer delay.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, backoff_base: float, backoff_max: float):
+        """Initialize the breaker in the closed state.
+
+        Args:
+            failure_threshold: Consecutive failures needed to open the breaker.
+            backoff_base: Base delay in seconds for the first retry.
+            backoff_max: Upper bound for the retry delay in seconds.
+        """
+        self.failure_threshold = failure_threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.state = self.CLOSED
+        self.failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Check whether a call may be attempted, moving open to half-open when due.
+
+        Returns:
+            bool: True if the call may go through.
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() >= self._retry_at:
+                self.state = self.HALF_OPEN
+            return self.state != self.OPEN
+
+    def record_success(self):
+        """Record a successful call and close the breaker."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._retry_at = 0.0
+
+    def record_failure(self):
+        """Record a failed call, opening the breaker when the threshold is reached."""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+            self._retry_at = time.monotonic() + self._backoff()
+
+    def retry_after(self) -> float:
+        """Get the seconds until the next call should be attempted after a failure.
+
+        Returns:
+            float: Remaining backoff delay, 0 if there is no pending backoff.
+        """
+        with self._lock:
+            return max(0.0, self._retry_at - time.monotonic())
+
+    def _backoff(self) -> float:
+        """Compute the next retry delay using exponential backoff with equal jitter."""
+        exponent = max(0, self.failures - 1)
+        delay = min(self.backoff_max, self.backoff_base * 2**exponent)
+        return random.uniform(delay / 2, delay)
+
+
+class HealthMonitor:
+    """Background thread refreshing provider status snapshots when they are due.
+
+    Status checkers decide when they are due (TTL while healthy, backoff while failing),
+    so request handlers only ever read the cached snapshot.
+    """
+
+    def __init__(self, registry, max_interval: float = CLOUDINARY_STATUS_CACHE_TTL):
+        """Initialize the monitor.
+
+        Args:
+            registry: StorageRegistry whose providers are monitored.
+            max_interval: Longest time in seconds to sleep between rounds.
+        """
+        self.registry = registry
+        self.max_interval = max_interval
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the monitor thread if it is not running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='storage-health-monitor', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Stop the monitor thread."""
+        self._stopped.set()
+        self._wake.set()
+
+    def wake(self):
+        """Re-evaluate the schedule immediately, e.g. after a reconfiguration."""
+        self._wake.set()
+
+    def _run(self):
+        """Refresh due status checkers, then sleep until the next one is due."""
+        while not self._stopped.is_set():
+            checkers = self.registry.status_checkers()
+            if any(checker.should_refresh() for checker in checkers):
+                self._refresh()
+
+            delay = self.max_interval
+            for checker in checkers:
+                delay = min(delay, checker.seconds_until_refresh())
+
+            self._wake.wait(max(delay, 0.5))
+            self._wake.clear()
+
+    def _refresh(self):
+        """Run the registry health check, sharing any check already in flight."""
+        try:
+            self.registry.check_health(wait=True)
+        except Exception as e:
+            self.registry.app.logger.error(f'Storage health check failed: {e}')
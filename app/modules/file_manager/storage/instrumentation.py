@@ -0,0 +1,153 @@
+"""Timers and counters for storage providers and the Cloudinary API."""
+
+import functools
+import importlib
+import inspect
+import time
+from typing import Any
+
+from app.core.metrics import REGISTRY
+
+# Provider methods timed on every StorageProvider subclass
+METERED_METHODS = (
+    'list_items',
+    'list_items_async',
+    'upload_file',
+    'commit_upload',
+    'delete_file',
+    'delete_items',
+    'get_file',
+    'get_storage_usage',
+    'get_storage_usage_async',
+    'create_folder',
+    'open_file',
+)
+
+STORAGE_SECONDS = REGISTRY.histogram(
+    'storage_operation_seconds',
+    'Time spent in storage provider methods; wrappers (layer) are timed with what they wrap',
+    ('provider', 'layer', 'method'),
+)
+STORAGE_ERRORS = REGISTRY.counter(
+    'storage_operation_errors_total',
+    'Storage provider calls that raised or reported an error',
+    ('provider', 'layer', 'method'),
+)
+CLOUDINARY_SECONDS = REGISTRY.histogram(
+    'cloudinary_api_call_seconds',
+    'Time spent in Cloudinary API calls (one or more HTTP round trips each)',
+    ('api', 'function'),
+)
+CLOUDINARY_ERRORS = REGISTRY.counter(
+    'cloudinary_api_errors_total', 'Cloudinary API calls that failed', ('api', 'function')
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    'storage_cache_requests_total',
+    'Storage metadata cache lookups by result (hit or miss)',
+    ('provider', 'result'),
+)
+TIER_REQUESTS = REGISTRY.counter(
+    'storage_tier_requests_total',
+    'Local tier lookups of remote files by result (hit or miss)',
+    ('provider', 'result'),
+)
+TIER_FETCHED_BYTES = REGISTRY.counter(
+    'storage_tier_fetched_bytes_total', 'Bytes copied from remote storage into the local tier'
+)
+
+
+def reports_error(result: Any) -> bool:
+    """Check whether a provider result reports an error instead of raising it."""
+    if isinstance(result, dict):
+        return bool(result.get('error'))
+    if isinstance(result, (tuple, list)) and len(result) == 2:
+        return result[1] is not None
+    return False
+
+
+def metered(method):
+    """Time a provider method and count its errors, labelled by provider and class."""
+    name = method.__name__
+
+    def record(self, started: float, failed: bool):
+        labels = (self.name, type(self).__name__, name)
+        STORAGE_SECONDS.labels(*labels).observe(time.perf_counter() - started)
+        if failed:
+            STORAGE_ERRORS.labels(*labels).inc()
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def metered_async(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = await method(self, *args, **kwargs)
+            except BaseException:
+                record(self, started, True)
+                raise
+            record(self, started, reports_error(result))
+            return result
+
+        metered_async.metered = True
+        return metered_async
+
+    @functools.wraps(method)
+    def metered_sync(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        except BaseException:
+            record(self, started, True)
+            raise
+        record(self, started, reports_error(result))
+        return result
+
+    metered_sync.metered = True
+    return metered_sync
+
+
+def instrument_methods(cls):
+    """Time the METERED_METHODS of a class, unless a parent class already does."""
+    for name in METERED_METHODS:
+        method = getattr(cls, name, None)
+        if method is not None and not getattr(method, 'metered', False):
+            setattr(cls, name, metered(method))
+
+
+class MeteredApi:
+    """Calls the functions of a Cloudinary SDK module, timing them and counting errors.
+
+    The module is imported on first use, so importing this module does not load the SDK.
+    Functions are looked up on the module at every access, so patching the module (as
+    tests do) still takes effect.
+    """
+
+    def __init__(self, module: str, api: str):
+        """Initialize the proxy.
+
+        Args:
+            module: Name of the SDK module, such as ``cloudinary.api``
+            api: Label of the API ('admin' or 'upload')
+        """
+        self._module = module
+        self._api = api
+
+    def __getattr__(self, name: str):
+        """Get a timed version of a module function."""
+        function = getattr(importlib.import_module(self._module), name)
+        timer = CLOUDINARY_SECONDS.labels(self._api, name)
+
+        @functools.wraps(function)
+        def call(*args, **kwargs):
+            try:
+                with timer.time():
+                    return function(*args, **kwargs)
+            except Exception:
+                CLOUDINARY_ERRORS.labels(self._api, name).inc()
+                raise
+
+        return call
+
+
+admin_api = MeteredApi('cloudinary.api', 'admin')
+upload_api = MeteredApi('cloudinary.uploader', 'upload')
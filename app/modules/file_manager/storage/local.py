@@ -2,25 +2,69 @@
 
 import os
 import shutil
-from typing import Dict, List, Optional, Tuple, Union
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
 
 from flask import current_app
-from flask import send_from_directory
+from flask import url_for
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 
+from ..storage.base import paginate_items
+from ..storage.base import parse_offset_cursor
 from ..storage.base import StorageProvider
+from ..storage.blob_store import BlobStore
+from ..storage.fs_watcher import create_watcher
+from ..storage.signals import items_removed
+from ..storage.signals import items_stored
+from ..storage.usage_ledger import scan_tree
+from ..storage.usage_ledger import UsageLedger
 
 
 class LocalStorage(StorageProvider):
     """Local filesystem storage provider implementation."""
 
-    def __init__(self, base_path: str):
+    name = 'local'
+
+    def __init__(
+        self,
+        base_path: str,
+        data_path: Optional[str] = None,
+        dedup: bool = False,
+        watch_interval: Optional[float] = None,
+    ):
         """Initialize local storage.
 
         Args:
             base_path: Base path for local storage
+            data_path: Directory for internal state such as the usage ledger (optional,
+                usage is computed with a full scan when omitted)
+            dedup: Store file contents once in a content-addressed blob store under
+                data_path (requires data_path on the same filesystem as base_path)
+            watch_interval: Mirror the storage folder in memory, following changes made
+                outside the application, and answer listings and usage from the mirror.
+                Changes are followed with inotify where available, otherwise by
+                rescanning every watch_interval seconds (optional, off when omitted)
         """
         self.base_path = base_path
+        self.ledger = None
+        self.blobs = None
+        self.watcher = None
+        self._makedirs_lock = threading.Lock()
+        if watch_interval is not None:
+            self.watcher = create_watcher(base_path, watch_interval)
+            self.watcher.start()
+        if data_path:
+            self.ledger = UsageLedger(base_path, os.path.join(data_path, 'usage.db'))
+            if dedup:
+                self.blobs = BlobStore(
+                    os.path.join(data_path, 'blobs'), os.path.join(data_path, 'blobs.db')
+                )
+
+    def close(self):
+        """Stop following changes of the storage folder."""
+        if self.watcher is not None:
+            self.watcher.stop()
 
     def _get_full_path(self, path: str) -> str:
         """Get full filesystem path.
@@ -33,37 +77,116 @@ class LocalStorage(StorageProvider):
         """
         return os.path.join(self.base_path, path)
 
-    def list_items(self, path: str) -> List[Dict[str, Union[str, bool, int]]]:
-        """List items in the given path."""
-        items = []
+    def list_items(
+        self,
+        path: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort_by: str = 'name',
+        reverse: bool = False,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List a page of items in the given path.
+
+        Uses a single ``os.scandir`` pass; the entry type comes from the directory listing
+        itself, so when sorting by name only the returned page is ``stat``-ed. With a
+        watcher, the page comes from the in-memory mirror instead.
+        """
+        if self.watcher is not None:
+            items = self.watcher.list_items(path)
+            if items is not None:
+                return paginate_items(items, offset, limit, sort_by, reverse, cursor)
+
+        offset = parse_offset_cursor(cursor, offset)
         full_path = self._get_full_path(path)
 
         try:
-            for item in os.listdir(full_path):
-                item_path = os.path.join(full_path, item)
-                items.append(
-                    {
-                        'name': item,
-                        'is_dir': os.path.isdir(item_path),
-                        'size': os.path.getsize(item_path) if not os.path.isdir(item_path) else 0,
-                        'path': os.path.join(path, item),
-                    }
-                )
-            return items
+            with os.scandir(full_path) as it:
+                entries = list(it)
+
+            if sort_by in ('size', 'modified'):
+                stat_field = 'st_size' if sort_by == 'size' else 'st_mtime'
+                entries.sort(key=lambda entry: getattr(entry.stat(), stat_field), reverse=reverse)
+            else:
+                entries.sort(key=lambda entry: entry.name.lower(), reverse=reverse)
+            entries.sort(key=lambda entry: not entry.is_dir())
+
+            total = len(entries)
+            end = offset + limit if limit else total
+            return {
+                'items': [self._entry_to_item(entry, path) for entry in entries[offset:end]],
+                'total': total,
+                'offset': offset,
+                'next_cursor': str(end) if end < total else None,
+            }
         except Exception as e:
-            current_app.logger.error(f'Error listing local files: {e}')
-            return []
+            error_msg = f'Error listing local files: {e}'
+            current_app.logger.error(error_msg)
+            return {
+                'items': [],
+                'total': 0,
+                'offset': offset,
+                'next_cursor': None,
+                'error': error_msg,
+            }
+
+    def _entry_to_item(self, entry: os.DirEntry, path: str) -> Dict[str, Union[str, bool, int]]:
+        """Convert a directory entry to a listing item."""
+        is_dir = entry.is_dir()
+        stat = entry.stat()
+        return {
+            'name': entry.name,
+            'is_dir': is_dir,
+            'size': 0 if is_dir else stat.st_size,
+            'path': os.path.join(path, entry.name),
+            'modified': stat.st_mtime,
+        }
 
     def upload_file(self, file, path: str, filename: str) -> Tuple[bool, Optional[str]]:
         """Upload a file to local storage."""
+        if self.blobs is not None:
+            return self._store_file(
+                path, filename, lambda file_path: self.blobs.store_stream(file.stream, file_path)
+            )
+        return self._store_file(path, filename, file.save)
+
+    def commit_upload(
+        self, source_path: str, path: str, filename: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Move an assembled file into local storage (a rename on the same filesystem)."""
+        if self.blobs is not None:
+            return self._store_file(
+                path, filename, lambda file_path: self.blobs.store_file(source_path, file_path)
+            )
+        return self._store_file(
+            path, filename, lambda file_path: shutil.move(source_path, file_path)
+        )
+
+    def _store_file(self, path: str, filename: str, write) -> Tuple[bool, Optional[str]]:
+        """Write a file with the given callable and record it in the usage ledger.
+
+        Args:
+            path: Folder to store the file in
+            filename: Name of the file
+            write: Callable writing the file to the full path it receives
+        """
         try:
             target_dir = self._get_full_path(path)
-            os.makedirs(target_dir, exist_ok=True)
+            self._makedirs(target_dir)
 
             safe_filename = secure_filename(filename)
             file_path = os.path.join(target_dir, safe_filename)
-            file.save(file_path)
+            previous_size = os.path.getsize(file_path) if os.path.isfile(file_path) else None
+            write(file_path)
 
+            self._record_usage(
+                used=os.path.getsize(file_path) - (previous_size or 0),
+                files=0 if previous_size is not None else 1,
+            )
+            self._refresh_mirror(file_path)
+            items_stored.send(
+                self, items=[self._file_item(file_path, os.path.abspath(self.base_path))]
+            )
             return True, None
         except Exception as e:
             error_msg = f'Error uploading file locally: {e}'
@@ -71,35 +194,152 @@ class LocalStorage(StorageProvider):
             return False, error_msg
 
     def delete_file(self, path: str) -> Tuple[bool, Optional[str]]:
-        """Delete a file from local storage."""
-        try:
-            full_path = self._get_full_path(path)
-            if os.path.isfile(full_path):
-                os.remove(full_path)
-            elif os.path.isdir(full_path):
-                os.rmdir(full_path)
-            return True, None
-        except Exception as e:
-            error_msg = f'Error deleting file locally: {e}'
+        """Delete a file, or a folder with everything below it, from local storage."""
+        return self.delete_items([path])
+
+    def delete_items(
+        self, paths: Iterable[str] = (), folders: Iterable[str] = ()
+    ) -> Tuple[bool, Optional[str]]:
+        """Delete files and folder trees from local storage.
+
+        Files and folders are told apart on disk, so both arguments are handled alike.
+        """
+        errors = []
+        removed = []
+        for path in list(paths) + list(folders):
+            try:
+                self._delete_path(path)
+                removed.append(path)
+            except Exception as e:
+                errors.append(f'{path}: {e}')
+
+        if removed:
+            items_removed.send(self, paths=removed)
+        if errors:
+            error_msg = f"Error deleting locally: {'; '.join(errors)}"
             current_app.logger.error(error_msg)
             return False, error_msg
+        return True, None
+
+    def _delete_path(self, path: str):
+        """Delete one file or folder tree and update the usage ledger and blob store."""
+        root = os.path.abspath(self.base_path)
+        full_path = safe_join(root, path)
+        if full_path is None or os.path.normpath(full_path) == root:
+            raise ValueError('Invalid path')
+
+        if os.path.isdir(full_path) and not os.path.islink(full_path):
+            totals = self._remove_tree(full_path)
+            if self.blobs is not None:
+                self.blobs.release_tree(full_path)
+            self._record_usage(
+                used=-totals['used'], files=-totals['files'], folders=-totals['folders']
+            )
+        elif os.path.lexists(full_path):
+            size = os.lstat(full_path).st_size
+            os.remove(full_path)
+            if self.blobs is not None:
+                self.blobs.release(full_path)
+            self._record_usage(used=-size, files=-1)
+        self._refresh_mirror(full_path)
+
+    def _remove_tree(self, full_path: str) -> Dict[str, int]:
+        """Remove a folder tree in one bottom-up pass, totalling what was removed.
+
+        Returns:
+            Dictionary with the used bytes, file count and folder count removed (the
+            folder itself included)
+        """
+        totals = {'used': 0, 'files': 0, 'folders': 0}
+        for folder, dirs, files in os.walk(full_path, topdown=False):
+            for name in files:
+                file_path = os.path.join(folder, name)
+                totals['used'] += os.lstat(file_path).st_size
+                totals['files'] += 1
+                os.remove(file_path)
+            for name in dirs:
+                dir_path = os.path.join(folder, name)
+                if os.path.islink(dir_path):
+                    os.remove(dir_path)
+                else:
+                    os.rmdir(dir_path)
+                    totals['folders'] += 1
+        os.rmdir(full_path)
+        totals['folders'] += 1
+        return totals
 
     def get_file(self, path: str) -> Tuple[Optional[str], Optional[str]]:
-        """Get a file from local storage."""
-        try:
-            directory = os.path.dirname(self._get_full_path(path))
-            filename = os.path.basename(path)
-            return send_from_directory(directory, filename, as_attachment=True), None
-        except Exception as e:
-            error_msg = f'Error getting local file: {e}'
+        """Get the download URL of a file in local storage."""
+        if self.get_local_path(path) is None:
+            error_msg = f'Local file not found: {path}'
             current_app.logger.error(error_msg)
             return None, error_msg
+        return url_for('file_manager.download_file', filename=path), None
+
+    def get_local_path(self, path: str) -> Optional[str]:
+        """Get the absolute path of a file, rejecting paths outside the storage root."""
+        full_path = safe_join(os.path.abspath(self.base_path), path)
+        if full_path is None or not os.path.isfile(full_path):
+            return None
+        return full_path
+
+    def walk_files(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Yield the file at a path, or every file below a folder, from one tree walk."""
+        root = os.path.abspath(self.base_path)
+        full_path = safe_join(root, path)
+        if full_path is None:
+            raise IOError(f'Invalid path: {path}')
+        if os.path.isfile(full_path):
+            yield self._file_item(full_path, root)
+            return
+
+        for folder, dirs, files in os.walk(full_path):
+            dirs.sort()
+            for name in sorted(files):
+                yield self._file_item(os.path.join(folder, name), root)
+
+    def walk_folders(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Yield every folder below a folder from one tree walk."""
+        root = os.path.abspath(self.base_path)
+        full_path = safe_join(root, path)
+        if full_path is None:
+            raise IOError(f'Invalid path: {path}')
+
+        for folder, dirs, _ in os.walk(full_path):
+            dirs.sort()
+            for name in dirs:
+                yield self._folder_item(os.path.join(folder, name), root)
+
+    def _folder_item(self, full_path: str, root: str) -> Dict[str, Union[str, bool, int]]:
+        """Build a listing item for a folder given by its full path."""
+        return {
+            'name': os.path.basename(full_path),
+            'is_dir': True,
+            'size': 0,
+            'path': os.path.relpath(full_path, root).replace(os.sep, '/'),
+            'modified': os.stat(full_path).st_mtime,
+        }
+
+    def _file_item(self, full_path: str, root: str) -> Dict[str, Union[str, bool, int]]:
+        """Build a listing item for a file given by its full path."""
+        stat = os.stat(full_path)
+        return {
+            'name': os.path.basename(full_path),
+            'is_dir': False,
+            'size': stat.st_size,
+            'path': os.path.relpath(full_path, root).replace(os.sep, '/'),
+            'modified': stat.st_mtime,
+        }
 
     def create_folder(self, path: str) -> Tuple[bool, Optional[str]]:
         """Create a folder in local storage."""
         try:
             full_path = self._get_full_path(path)
-            os.makedirs(full_path, exist_ok=True)
+            self._makedirs(full_path)
+            self._refresh_mirror(full_path)
+            items_stored.send(
+                self, items=[self._folder_item(full_path, os.path.abspath(self.base_path))]
+            )
             return True, None
         except Exception as e:
             error_msg = f'Error creating local folder: {e}'
@@ -107,13 +347,14 @@ class LocalStorage(StorageProvider):
             return False, error_msg
 
     def get_storage_usage(self) -> Dict[str, Union[int, float]]:
-        """Get storage usage information from local filesystem."""
+        """Get storage usage information from local filesystem.
+
+        With a watcher the used bytes come from the in-memory mirror. Otherwise, with a
+        usage ledger this is a single lookup; the first call (and one every
+        reconcile interval, in the background) rescans the tree to correct any drift.
+        """
         try:
-            total_size = 0
-            for dirpath, _, filenames in os.walk(self.base_path):
-                for f in filenames:
-                    fp = os.path.join(dirpath, f)
-                    total_size += os.path.getsize(fp)
+            total_size = self._get_used_bytes()
 
             # Get disk usage information
             disk_total, disk_used, disk_free = shutil.disk_usage(self.base_path)
@@ -137,5 +378,57 @@ class LocalStorage(StorageProvider):
                 'name': 'Local Storage',
             }
         except Exception as e:
-            current_app.logger.error(f'Error getting local storage usage: {e}')
-            return {'used': 0, 'total': 1, 'name': 'Local Storage'}
+            error_msg = f'Error getting local storage usage: {e}'
+            current_app.logger.error(error_msg)
+            return {'used': 0, 'total': 1, 'name': 'Local Storage', 'error': error_msg}
+
+    def reconcile_usage(self) -> Dict[str, Union[int, float]]:
+        """Rebuild the usage ledger from a full scan of the storage folder.
+
+        Returns:
+            The reconciled totals
+        """
+        if self.ledger is None:
+            return scan_tree(self.base_path)
+        return self.ledger.reconcile()
+
+    def _get_used_bytes(self) -> int:
+        """Get the bytes used by the storage folder, preferring the mirror, then the ledger."""
+        used = self.watcher.used() if self.watcher is not None else None
+        if used is not None:
+            return used
+        if self.ledger is None:
+            return scan_tree(self.base_path)['used']
+
+        usage = self.ledger.usage()
+        if usage is None:
+            return self.ledger.reconcile()['used']
+
+        if self.ledger.needs_reconcile():
+            self.ledger.reconcile_in_background()
+        return usage['used']
+
+    def _makedirs(self, full_path: str):
+        """Create a directory and its parents, counting new folders in the ledger.
+
+        Serialized so parallel uploads into the same new folder count it once.
+        """
+        with self._makedirs_lock:
+            missing = 0
+            parent = full_path
+            while parent and not os.path.isdir(parent):
+                missing += 1
+                parent = os.path.dirname(parent)
+
+            os.makedirs(full_path, exist_ok=True)
+        self._record_usage(folders=missing)
+
+    def _refresh_mirror(self, full_path: str):
+        """Apply a change of the application to the in-memory mirror without waiting."""
+        if self.watcher is not None:
+            self.watcher.refresh(os.path.relpath(full_path, os.path.abspath(self.base_path)))
+
+    def _record_usage(self, used: int = 0, files: int = 0, folders: int = 0):
+        """Apply a write to the usage ledger, if there is one."""
+        if self.ledger is not None and (used or files or folders):
+            self.ledger.add(used=used, files=files, folders=folders)
@@ -0,0 +1,120 @@
+"""Storage provider plugins, imported only when the configuration enables them.
+
+A plugin is a factory taking the Flask application and returning a provider instance, or
+None when the provider is not configured (for example, missing credentials). Built-in
+plugins are listed in ``BUILTIN_PROVIDERS``; other packages can add providers through the
+``pasta.storage_providers`` entry point group::
+
+    entry_points={'pasta.storage_providers': ['s3 = pasta_s3:create_provider']}
+
+Provider modules, and the SDKs they depend on such as ``cloudinary``, are imported by the
+factories themselves, so deployments that do not enable a provider never load them.
+"""
+
+import importlib
+import os
+from typing import Callable, Dict, Optional
+
+from .base import StorageProvider
+
+ENTRY_POINT_GROUP = 'pasta.storage_providers'
+
+ProviderFactory = Callable[..., Optional[StorageProvider]]
+
+# Factories of installed plugins, loaded on first use
+_factories: Dict[str, ProviderFactory] = {}
+
+
+def create_local_storage(app) -> StorageProvider:
+    """Create the local filesystem provider.
+
+    Args:
+        app: Flask application instance.
+
+    Returns:
+        StorageProvider: Local storage under UPLOAD_FOLDER.
+    """
+    from .local import LocalStorage
+
+    return LocalStorage(
+        app.config['UPLOAD_FOLDER'],
+        os.path.join(app.config['DATA_FOLDER'], 'local'),
+        dedup=app.config.get('LOCAL_STORAGE_DEDUP', False),
+        watch_interval=(
+            app.config['LOCAL_STORAGE_POLL_INTERVAL']
+            if app.config.get('LOCAL_STORAGE_WATCH')
+            else None
+        ),
+    )
+
+
+def create_cloudinary_storage(app) -> Optional[StorageProvider]:
+    """Configure the Cloudinary SDK and create the Cloudinary provider.
+
+    Args:
+        app: Flask application instance.
+
+    Returns:
+        Optional[StorageProvider]: Cloudinary storage, or None without credentials.
+    """
+    credentials = app.config.get('CLOUDINARY', {})
+    if not credentials or not all(credentials.values()):
+        return None
+
+    import cloudinary
+
+    from .cloudinary_storage import CloudinaryStorage
+
+    cloudinary.config(
+        cloud_name=credentials['cloud_name'],
+        api_key=credentials['api_key'],
+        api_secret=credentials['api_secret'],
+    )
+    return CloudinaryStorage()
+
+
+BUILTIN_PROVIDERS: Dict[str, ProviderFactory] = {
+    'local': create_local_storage,
+    'cloudinary': create_cloudinary_storage,
+}
+
+
+def resolve(reference: str) -> ProviderFactory:
+    """Import the object a 'module:attribute' reference points to."""
+    module, _, attribute = reference.partition(':')
+    return getattr(importlib.import_module(module), attribute)
+
+
+def find_entry_point(name: str) -> Optional[str]:
+    """Get the 'module:attribute' reference of an installed provider plugin."""
+    from importlib.metadata import entry_points
+
+    found = entry_points()
+    if hasattr(found, 'select'):
+        matches = found.select(group=ENTRY_POINT_GROUP, name=name)
+    else:  # pragma: no cover - Python 3.9
+        matches = [ep for ep in found.get(ENTRY_POINT_GROUP, ()) if ep.name == name]
+    for entry_point in matches:
+        return entry_point.value
+    return None
+
+
+def load_provider_factory(name: str) -> ProviderFactory:
+    """Get the factory of a storage provider, importing an installed plugin on first use.
+
+    Args:
+        name: Provider name, as listed in STORAGE_PROVIDERS.
+
+    Returns:
+        ProviderFactory: Callable creating the provider for an application.
+
+    Raises:
+        ValueError: If no built-in or installed plugin has this name.
+    """
+    factory = BUILTIN_PROVIDERS.get(name) or _factories.get(name)
+    if factory is None:
+        reference = find_entry_point(name)
+        if reference is None:
+            raise ValueError(f'Unknown storage provider: {name}')
+        factory = _factories[name] = resolve(reference)
+    return factory
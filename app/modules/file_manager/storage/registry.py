@@ -0,0 +1,224 @@
+"""Process-wide storage provider registry."""
+
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+from typing import Dict, List, Optional
+
+from .base import StorageProvider
+from .cache import CachedStorage
+from .cache import create_cache_backend
+from .health import HealthMonitor
+from .plugins import load_provider_factory
+from .tiered import TieredStorage
+
+
+class StorageRegistry:
+    """Thread-safe registry of long-lived storage provider instances.
+
+    The registry is created once in ``create_app()`` and hands out shared provider
+    instances, so requests no longer build (and health-check) a new provider each time.
+    A background ``HealthMonitor`` keeps provider status snapshots fresh. Providers come
+    from the plugins named in STORAGE_PROVIDERS, whose modules are imported on first use;
+    STORAGE_PRIMARY and STORAGE_FALLBACK name the ones requests use.
+    """
+
+    def __init__(self, app=None):
+        """Initialize the registry.
+
+        Args:
+            app: Flask application to bind to (optional, see ``init_app``).
+        """
+        self.app = None
+        self._providers: Dict[str, StorageProvider] = {}
+        self._primary: Optional[str] = None
+        self._fallback: Optional[str] = None
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='storage-registry')
+        self._pending_check: Optional[Future] = None
+        self.monitor = HealthMonitor(self)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Bind the registry to an application and build its providers.
+
+        Args:
+            app: Flask application instance.
+        """
+        self.app = app
+        app.extensions['storage_registry'] = self
+        self.reconfigure()
+        self.monitor.start()
+
+    def reconfigure(self, **overrides):
+        """Rebuild provider instances from the application configuration.
+
+        If the new configuration is rejected, the configuration values and the providers
+        in use are left as they were.
+
+        Args:
+            **overrides: Configuration values to update before rebuilding (optional).
+
+        Raises:
+            ValueError: If a provider is unknown, or the fallback provider is not set up.
+        """
+        config = self.app.config
+        previous_config = {key: config[key] for key in overrides if key in config}
+        config.update(overrides)
+        try:
+            providers = self._build_providers()
+        except Exception:
+            for key in overrides:
+                config.pop(key, None)
+            config.update(previous_config)
+            raise
+
+        with self._lock:
+            previous = self._providers
+            self._providers = providers
+            self._primary = config.get('STORAGE_PRIMARY') or None
+            self._fallback = config['STORAGE_FALLBACK']
+            self._pending_check = None
+
+        for provider in previous.values():
+            provider.close()
+
+        # The health monitor runs the first check of the new providers right away
+        self.monitor.wake()
+
+    def _build_providers(self) -> Dict[str, StorageProvider]:
+        """Build the providers named in STORAGE_PROVIDERS, checking the fallback is set up.
+
+        Raises:
+            ValueError: If a provider is unknown, or the fallback provider is not set up.
+        """
+        providers = {}
+        for name in self.app.config['STORAGE_PROVIDERS']:
+            provider = load_provider_factory(name)(self.app)
+            if provider is not None:
+                providers[name] = provider
+
+        fallback = self.app.config['STORAGE_FALLBACK']
+        if fallback not in providers:
+            for provider in providers.values():
+                provider.close()
+            raise ValueError(
+                f"STORAGE_FALLBACK '{fallback}' is not among the storage providers set up "
+                f"({', '.join(providers) or 'none'}); list it in STORAGE_PROVIDERS"
+            )
+
+        if 'cloudinary' in providers:
+            if self.app.config.get('CLOUDINARY_LOCAL_TIER'):
+                providers['cloudinary'] = TieredStorage(
+                    providers['cloudinary'],
+                    os.path.join(self.app.config['DATA_FOLDER'], 'cloudinary_tier'),
+                    self.app.config['CLOUDINARY_LOCAL_TIER_MAX_BYTES'],
+                )
+
+            cache_backend = create_cache_backend(self.app.config)
+            if cache_backend is not None:
+                providers['cloudinary'] = CachedStorage(
+                    providers['cloudinary'], cache_backend, self.app.config['STORAGE_CACHE_TTL']
+                )
+        return providers
+
+    def get(self, name: str) -> Optional[StorageProvider]:
+        """Get a provider instance by name.
+
+        Args:
+            name: Provider name, as listed in STORAGE_PROVIDERS.
+
+        Returns:
+            The shared provider instance, or None if it is not configured.
+        """
+        with self._lock:
+            return self._providers.get(name)
+
+    def names(self) -> List[str]:
+        """Get the names of the providers set up, in STORAGE_PROVIDERS order."""
+        with self._lock:
+            return list(self._providers)
+
+    def get_primary(self) -> Optional[StorageProvider]:
+        """Get the provider preferred while online (STORAGE_PRIMARY), if it is set up."""
+        with self._lock:
+            return self._providers.get(self._primary) if self._primary else None
+
+    def get_fallback(self) -> StorageProvider:
+        """Get the provider used while the primary one is unavailable (STORAGE_FALLBACK)."""
+        with self._lock:
+            return self._providers[self._fallback]
+
+    def status_checkers(self) -> List:
+        """Get the status checkers of all providers that expose one.
+
+        Returns:
+            List: Status checker instances.
+        """
+        with self._lock:
+            providers = list(self._providers.values())
+        checkers = (getattr(provider, 'status_checker', None) for provider in providers)
+        return [checker for checker in checkers if checker is not None]
+
+    def get_active(self) -> StorageProvider:
+        """Get the provider requests should use.
+
+        The primary provider is preferred while its cached status is online (providers
+        without a status checker are always considered online); otherwise the fallback
+        provider is used. Only the very first call waits for a health check, later calls
+        read the snapshot kept fresh by the health monitor.
+
+        Returns:
+            StorageProvider: Shared provider instance.
+        """
+        provider = self.get_primary()
+        if provider is not None:
+            checker = getattr(provider, 'status_checker', None)
+            if checker is None:
+                return provider
+            if checker.get_status()['last_check'] is None:
+                self.check_health(wait=True)
+
+            if checker.get_status()['online']:
+                return provider
+
+        return self.get_fallback()
+
+    def check_health(self, wait: bool = False) -> Future:
+        """Run provider health checks on the background worker.
+
+        Concurrent callers share the check that is already in flight.
+
+        Args:
+            wait: Block until the check has finished.
+
+        Returns:
+            Future: Future of the scheduled check.
+        """
+        with self._lock:
+            future = self._pending_check
+            if future is None or future.done():
+                future = self._executor.submit(self._check_health)
+                self._pending_check = future
+
+        if wait:
+            future.result()
+        return future
+
+    def _check_health(self):
+        """Refresh the status of every provider that exposes a status checker."""
+        with self.app.app_context():
+            for checker in self.status_checkers():
+                checker.check_status()
+
+    def shutdown(self):
+        """Stop the background workers."""
+        self.monitor.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            providers = list(self._providers.values())
+        for provider in providers:
+            provider.close()
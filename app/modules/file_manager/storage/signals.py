@@ -0,0 +1,55 @@
+"""Signals storage providers send when their contents change.
+
+Both are sent with the provider as sender, from inside an application context, after
+the change succeeded. Receivers must not raise: they run in the middle of a write.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from blinker import Namespace
+
+storage_signals = Namespace()
+
+#: Files or folders were stored; sent with ``items``, their listing items
+items_stored = storage_signals.signal('items-stored')
+
+#: Files or folder trees were deleted; sent with ``paths``, everything below each path
+#: is gone as well
+items_removed = storage_signals.signal('items-removed')
+
+#: Provider name and item list of the ``collect_stored_items`` block being run
+_collector: ContextVar[Optional[Tuple[str, List[Dict]]]] = ContextVar(
+    'stored_items_collector', default=None
+)
+
+
+@contextmanager
+def collect_stored_items(provider_name: str) -> Iterator[List[Dict]]:
+    """Collect the items a provider stores while the block runs.
+
+    Only stores made by the block itself count, not those of other requests or
+    threads. Work handed to worker threads is included when it runs in a copy of the
+    caller's context (``contextvars.copy_context``), as batch uploads do.
+
+    Args:
+        provider_name: Name of the provider whose items are collected
+
+    Yields:
+        List the listing items are appended to.
+    """
+    stored: List[Dict] = []
+    token = _collector.set((provider_name, stored))
+    try:
+        yield stored
+    finally:
+        _collector.reset(token)
+
+
+@items_stored.connect
+def _collect_stored_items(sender, items, **kwargs):
+    """Add stored items to the collector of the context they were stored in."""
+    collector = _collector.get()
+    if collector is not None and collector[0] == getattr(sender, 'name', None):
+        collector[1].extend(items)
@@ -0,0 +1,395 @@
+"""Local disk tier keeping copies of recently downloaded remote files."""
+
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from flask import current_app
+
+from app.core.db import SQLiteStore
+from app.modules.file_manager.constants import TIER_BLOCK_SIZE
+from app.modules.file_manager.constants import TIER_FETCH_WORKERS
+from app.modules.file_manager.constants import TIER_REVALIDATE_INTERVAL
+from app.modules.file_manager.constants import TIER_TOUCH_INTERVAL
+from app.modules.file_manager.storage.base import StorageProvider
+from app.modules.file_manager.storage.instrumentation import TIER_FETCHED_BYTES
+from app.modules.file_manager.storage.instrumentation import TIER_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tier (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    etag TEXT NOT NULL,
+    validated_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tier_last_access ON tier (last_access);
+'''
+
+
+class ReadThrough:
+    """Remote file stream writing what is read from it into a staged tier copy.
+
+    Closing it after the whole file was read verifies the copy and adds it to the tier;
+    a stream closed early (an aborted download) leaves nothing behind.
+    """
+
+    def __init__(self, tier: 'TieredStorage', info: Dict[str, Any]):
+        """Open the remote file and the staged copy.
+
+        Args:
+            tier: Tier the copy is added to
+            info: Resource of the file, as returned by ``get_resource``
+        """
+        self.tier = tier
+        self.info = info
+        blob = tier.blob_path(info['path'])
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        fd, self.staged = tempfile.mkstemp(dir=os.path.dirname(blob), suffix='.part')
+        self._copy = os.fdopen(fd, 'wb')
+        self._digest = hashlib.md5()
+        self._complete = False
+        try:
+            self._stream = tier.provider.open_file(info)
+        except Exception:
+            self._discard()
+            raise
+
+    def read(self, size: int = -1) -> bytes:
+        """Read from the remote file, copying the bytes into the staged copy."""
+        block = self._stream.read(size)
+        if block:
+            self._copy.write(block)
+            self._digest.update(block)
+        elif size != 0:
+            self._complete = True
+        return block
+
+    def close(self):
+        """Close the remote file, adding the copy to the tier if it was read in full."""
+        if self._copy.closed:
+            return
+        try:
+            self._stream.close()
+            self._copy.close()
+            if self._complete:
+                self.tier._commit(self.info, self.staged, self._digest.hexdigest())
+        except Exception as e:
+            logger.warning(f"Local tier could not keep {self.info['path']}: {e}")
+        finally:
+            self._discard()
+
+    def __enter__(self) -> 'ReadThrough':
+        """Use the stream as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the stream."""
+        self.close()
+
+    def _discard(self):
+        """Remove the staged copy, unless it was moved into the tier."""
+        self._copy.close()
+        if os.path.exists(self.staged):
+            os.remove(self.staged)
+
+
+class TieredStorage(StorageProvider):
+    """Remote storage provider wrapper serving recently downloaded files from local disk.
+
+    A download that misses the tier is relayed by the application (``open_download``),
+    which writes the file into the tier while it streams to the client, so the remote
+    file is read only once; later downloads find the local copy through
+    ``get_local_path`` and so use the same streaming path (ranges, conditional requests)
+    as local storage. Files too large for the tier are redirected to the remote URL.
+    Archives and thumbnails use copies that are already in the tier but never pull files
+    into it.
+
+    Copies are verified against the provider's MD5 ``etag`` when fetched and against
+    their recorded size when served, and revalidated against the remote metadata every
+    TIER_REVALIDATE_INTERVAL seconds, so files changed elsewhere are refetched. The tier
+    is bounded by bytes, evicting the least recently used copies. Writes made through
+    the wrapper drop the copies they affect.
+
+    The wrapped provider must provide ``get_resource(path)``, returning the size, etag
+    and URL of a file (as CloudinaryStorage does). Other attributes are delegated to it.
+    """
+
+    def __init__(self, provider: StorageProvider, root: str, max_bytes: int):
+        """Initialize the tier.
+
+        Args:
+            provider: Remote storage provider to wrap
+            root: Directory holding the local copies and their index
+            max_bytes: Total size of the copies kept; files over a quarter of it are never
+                copied, so one large file cannot flush the whole tier
+        """
+        self.provider = provider
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self._blobs = os.path.join(self.root, 'blobs')
+        os.makedirs(self._blobs, exist_ok=True)
+        self._store = SQLiteStore(os.path.join(self.root, 'tier.db'), SCHEMA)
+        self._executor = ThreadPoolExecutor(TIER_FETCH_WORKERS, thread_name_prefix='tier-fetch')
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        """Delegate unknown attributes to the wrapped provider."""
+        return getattr(self.provider, name)
+
+    @property
+    def name(self) -> str:
+        """Name of the wrapped provider."""
+        return self.provider.name
+
+    def close(self):
+        """Stop the fetch workers and release the wrapped provider's resources."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.provider.close()
+
+    def get_local_path(self, path: str) -> Optional[str]:
+        """Get the local copy of a file, if the tier holds an intact one.
+
+        Args:
+            path: The path of the file
+
+        Returns:
+            Absolute path of the local copy, or None if there is none
+        """
+        now = time.time()
+        row = self._store.execute('SELECT * FROM tier WHERE path = ?', (path,)).fetchone()
+        blob = self.blob_path(path)
+        if row is not None and self._intact(blob, row['size']):
+            if now - row['validated_at'] > TIER_REVALIDATE_INTERVAL:
+                self._schedule(path, self._revalidate)
+            if now - row['last_access'] > TIER_TOUCH_INTERVAL:
+                self._store.execute('UPDATE tier SET last_access = ? WHERE path = ?', (now, path))
+            TIER_REQUESTS.labels(self.name, 'hit').inc()
+            return blob
+
+        if row is not None:
+            self.discard([path])
+        TIER_REQUESTS.labels(self.name, 'miss').inc()
+        return None
+
+    def open_file(self, item: Dict[str, Any]) -> BinaryIO:
+        """Open a file from the tier if it holds a copy, otherwise from the provider."""
+        row = self._store.execute('SELECT size FROM tier WHERE path = ?', (item['path'],))
+        row = row.fetchone()
+        blob = self.blob_path(item['path'])
+        if row is not None and self._intact(blob, row['size']):
+            return open(blob, 'rb')
+        return self.provider.open_file(item)
+
+    def blob_path(self, path: str) -> str:
+        """Get the path the local copy of a file is kept at."""
+        digest = hashlib.sha256(path.encode('utf-8')).hexdigest()
+        return os.path.join(self._blobs, digest[:2], digest)
+
+    def discard(self, paths: Iterable[str] = (), folders: Iterable[str] = ()):
+        """Drop the local copies of files, and of everything below folders.
+
+        Args:
+            paths: Files whose copies are dropped
+            folders: Folders whose files' copies are dropped
+        """
+        doomed = list(paths)
+        for folder in folders:
+            prefix = f"{folder.strip('/')}/"
+            rows = self._store.execute(
+                'SELECT path FROM tier WHERE path >= ? AND path < ?', (prefix, f'{prefix}\uffff')
+            ).fetchall()
+            doomed += [row['path'] for row in rows]
+
+        for path in doomed:
+            self._store.execute('DELETE FROM tier WHERE path = ?', (path,))
+            try:
+                os.remove(self.blob_path(path))
+            except FileNotFoundError:
+                pass
+
+    def get_storage_usage(self) -> Dict[str, Union[int, float]]:
+        """Get storage usage information from the wrapped provider."""
+        return self.provider.get_storage_usage()
+
+    async def get_storage_usage_async(self) -> Dict[str, Union[int, float]]:
+        """Get storage usage information from the wrapped provider."""
+        return await self.provider.get_storage_usage_async()
+
+    def list_items(self, path: str, *args, **kwargs) -> Dict[str, Any]:
+        """List a page of items with the wrapped provider."""
+        return self.provider.list_items(path, *args, **kwargs)
+
+    async def list_items_async(self, path: str, *args, **kwargs) -> Dict[str, Any]:
+        """List a page of items with the wrapped provider."""
+        return await self.provider.list_items_async(path, *args, **kwargs)
+
+    def open_download(self, path: str) -> Optional[Tuple[BinaryIO, int]]:
+        """Open a file that missed the tier, copying it into the tier as it is read.
+
+        Returns:
+            The stream and the file size, or None for files the tier does not keep (the
+            download is then redirected to the remote URL)
+        """
+        try:
+            info = self.provider.get_resource(path)
+            if not self._keeps(info):
+                return None
+            return ReadThrough(self, info), info['size']
+        except Exception as e:
+            current_app.logger.warning(f'Local tier could not open {path}: {e}')
+            return None
+
+    def get_file(self, path: str) -> Tuple[Optional[str], Optional[str]]:
+        """Get a file URL from the wrapped provider."""
+        return self.provider.get_file(path)
+
+    def get_thumbnail_url(self, path: str, size: int) -> Optional[str]:
+        """Get the URL of a resized image from the wrapped provider."""
+        return self.provider.get_thumbnail_url(path, size)
+
+    def walk_folders(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Walk folders with the wrapped provider."""
+        return self.provider.walk_folders(path)
+
+    def walk_files(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Walk files with the wrapped provider."""
+        return self.provider.walk_files(path)
+
+    def upload_file(self, file, path: str, filename: str) -> Tuple[bool, Optional[str]]:
+        """Upload a file and drop any stale copy of it."""
+        result = self.provider.upload_file(file, path, filename)
+        self.discard([os.path.join(path, filename) if path else filename])
+        return result
+
+    def commit_upload(
+        self, source_path: str, path: str, filename: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Store an assembled file and drop any stale copy of it."""
+        result = self.provider.commit_upload(source_path, path, filename)
+        self.discard([os.path.join(path, filename) if path else filename])
+        return result
+
+    def delete_file(self, path: str) -> Tuple[bool, Optional[str]]:
+        """Delete a file and drop its copy."""
+        result = self.provider.delete_file(path)
+        self.discard([path])
+        return result
+
+    def delete_items(
+        self, paths: Iterable[str] = (), folders: Iterable[str] = ()
+    ) -> Tuple[bool, Optional[str]]:
+        """Delete files and folders and drop their copies."""
+        paths, folders = list(paths), list(folders)
+        result = self.provider.delete_items(paths, folders)
+        self.discard(paths, folders)
+        return result
+
+    def create_folder(self, path: str) -> Tuple[bool, Optional[str]]:
+        """Create a folder with the wrapped provider."""
+        return self.provider.create_folder(path)
+
+    def wait(self, timeout: Optional[float] = None):
+        """Wait for the fetches and revalidations in flight (mostly useful in tests)."""
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            future.exception(timeout)
+
+    def _intact(self, blob: str, size: int) -> bool:
+        """Check that a local copy still exists with its recorded size."""
+        try:
+            return os.path.getsize(blob) == size
+        except OSError:
+            return False
+
+    def _schedule(self, path: str, task):
+        """Run a fetch or revalidation of a file on a worker, once at a time per file."""
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                try:
+                    task(path)
+                except Exception as e:
+                    app.logger.warning(f'Local tier could not refresh {path}: {e}')
+
+        with self._lock:
+            if path in self._pending:
+                return
+            future = self._executor.submit(run)
+            self._pending[path] = future
+        future.add_done_callback(lambda _: self._forget(path))
+
+    def _forget(self, path: str):
+        """Drop a finished task from the pending ones."""
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def _keeps(self, info: Dict[str, Any]) -> bool:
+        """Check whether a remote file can be kept in the tier."""
+        return info['size'] <= self.max_bytes // 4 and bool(info.get('etag'))
+
+    def _fetch(self, path: str):
+        """Copy a remote file into the tier, verifying it against the remote etag."""
+        info = self.provider.get_resource(path)
+        if not self._keeps(info):
+            return
+        with ReadThrough(self, info) as stream:
+            while stream.read(TIER_BLOCK_SIZE):
+                pass
+
+    def _commit(self, info: Dict[str, Any], staged: str, md5: str):
+        """Move a fully read copy into the tier, verifying it against the remote etag.
+
+        Raises:
+            IOError: If the copy does not match the remote file
+        """
+        if os.path.getsize(staged) != info['size'] or md5 != info['etag']:
+            raise IOError('downloaded copy does not match the remote etag')
+        os.replace(staged, self.blob_path(info['path']))
+        TIER_FETCHED_BYTES.inc(info['size'])
+
+        now = time.time()
+        self._store.execute(
+            'INSERT OR REPLACE INTO tier (path, size, etag, validated_at, last_access) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (info['path'], info['size'], info['etag'], now, now),
+        )
+        self._evict()
+
+    def _revalidate(self, path: str):
+        """Check a copy against the remote metadata, refetching it if the file changed."""
+        row = self._store.execute('SELECT etag FROM tier WHERE path = ?', (path,)).fetchone()
+        info = self.provider.get_resource(path)
+        if row is None or info.get('etag') != row['etag']:
+            self.discard([path])
+            self._fetch(path)
+        else:
+            self._store.execute(
+                'UPDATE tier SET validated_at = ? WHERE path = ?', (time.time(), path)
+            )
+
+    def _evict(self):
+        """Drop the least recently used copies until the tier fits its byte bound."""
+        total = self._store.execute('SELECT COALESCE(SUM(size), 0) AS total FROM tier')
+        excess = total.fetchone()['total'] - self.max_bytes
+        if excess <= 0:
+            return
+
+        doomed = []
+        for row in self._store.execute('SELECT path, size FROM tier ORDER BY last_access'):
+            if excess <= 0:
+                break
+            doomed.append(row['path'])
+            excess -= row['size']
+        self.discard(doomed)
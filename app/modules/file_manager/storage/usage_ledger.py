@@ -0,0 +1,160 @@
+"""Incremental storage usage accounting for local storage."""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from app.core.db import SQLiteStore
+from app.modules.file_manager.constants import LOCAL_USAGE_RECONCILE_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS usage (
+    root TEXT PRIMARY KEY,
+    used INTEGER NOT NULL DEFAULT 0,
+    files INTEGER NOT NULL DEFAULT 0,
+    folders INTEGER NOT NULL DEFAULT 0,
+    reconciled_at REAL
+);
+'''
+
+
+def scan_tree(root: str) -> Dict[str, int]:
+    """Walk a directory tree and total its size.
+
+    Args:
+        root: Directory to scan
+
+    Returns:
+        Dictionary with used bytes, file count and folder count
+    """
+    totals = {'used': 0, 'files': 0, 'folders': 0}
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        totals['folders'] += 1
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        totals['files'] += 1
+                        totals['used'] += entry.stat(follow_symlinks=False).st_size
+        except OSError as e:
+            logger.warning(f'Skipping unreadable directory during usage scan: {e}')
+    return totals
+
+
+class UsageLedger:
+    """Running totals of the bytes, files and folders stored under a directory.
+
+    Write paths adjust the totals with ``add()`` so reading usage is a single-row
+    lookup. ``reconcile()`` rebuilds the totals with a full scan, which also picks up
+    changes made outside the application. Totals live in SQLite, so every worker
+    process shares (and atomically updates) the same ledger.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        db_path: str,
+        reconcile_interval: float = LOCAL_USAGE_RECONCILE_INTERVAL,
+    ):
+        """Initialize the ledger.
+
+        Args:
+            root: Directory whose usage is tracked
+            db_path: Path of the SQLite ledger file
+            reconcile_interval: Seconds between periodic full reconciliations
+        """
+        self.root = os.path.abspath(root)
+        self.reconcile_interval = reconcile_interval
+        self._store = SQLiteStore(db_path, SCHEMA)
+        self._reconcile_lock = threading.Lock()
+
+    def add(self, used: int = 0, files: int = 0, folders: int = 0):
+        """Adjust the totals after a write.
+
+        Args:
+            used: Change in bytes
+            files: Change in file count
+            folders: Change in folder count
+        """
+        self._store.execute(
+            'INSERT INTO usage (root, used, files, folders) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(root) DO UPDATE SET used = MAX(used + excluded.used, 0), '
+            'files = MAX(files + excluded.files, 0), folders = MAX(folders + excluded.folders, 0)',
+            (self.root, used, files, folders),
+        )
+
+    def usage(self) -> Optional[Dict[str, float]]:
+        """Get the current totals.
+
+        Returns:
+            Dictionary with used, files, folders and reconciled_at, or None if the tree
+            has never been reconciled
+        """
+        row = self._store.execute(
+            'SELECT used, files, folders, reconciled_at FROM usage WHERE root = ?', (self.root,)
+        ).fetchone()
+        if row is None or row['reconciled_at'] is None:
+            return None
+        return dict(row)
+
+    def needs_reconcile(self) -> bool:
+        """Check whether the periodic reconciliation is due.
+
+        Returns:
+            True if the ledger was never reconciled or the interval has passed
+        """
+        usage = self.usage()
+        if usage is None:
+            return True
+        return time.time() - usage['reconciled_at'] > self.reconcile_interval
+
+    def reconcile(self) -> Dict[str, float]:
+        """Rebuild the totals from a full scan of the tree.
+
+        Returns:
+            The reconciled totals
+        """
+        with self._reconcile_lock:
+            return self._reconcile()
+
+    def reconcile_in_background(self) -> bool:
+        """Start a reconciliation thread unless one is already running.
+
+        Returns:
+            True if a reconciliation was started
+        """
+        if not self._reconcile_lock.acquire(blocking=False):
+            return False
+
+        thread = threading.Thread(
+            target=self._background_reconcile, name='usage-ledger-reconcile', daemon=True
+        )
+        thread.start()
+        return True
+
+    def _reconcile(self) -> Dict[str, float]:
+        """Scan the tree and store the totals (caller holds the reconcile lock)."""
+        totals = scan_tree(self.root)
+        totals['reconciled_at'] = time.time()
+        self._store.execute(
+            'INSERT OR REPLACE INTO usage (root, used, files, folders, reconciled_at) '
+            'VALUES (:root, :used, :files, :folders, :reconciled_at)',
+            dict(totals, root=self.root),
+        )
+        return totals
+
+    def _background_reconcile(self):
+        """Reconcile from a background thread that already holds the lock."""
+        try:
+            self._reconcile()
+        except Exception as e:
+            logger.error(f'Usage ledger reconciliation failed: {e}')
+        finally:
+            self._reconcile_lock.release()
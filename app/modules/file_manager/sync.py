@@ -0,0 +1,425 @@
+"""Replication of fallback storage writes to the primary storage.
+
+While the primary storage (STORAGE_PRIMARY, Cloudinary by default) is offline the
+storage registry falls back to STORAGE_FALLBACK (local storage by default), so files
+uploaded during an outage only exist there. Fallback writes are recorded in a durable
+outbox and replayed to the primary storage once it is back online.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import posixpath
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import current_app
+from werkzeug.datastructures import FileStorage
+
+from app.core.db import SQLiteStore
+from app.modules.file_manager.constants import CLOUDINARY_BACKOFF_BASE
+from app.modules.file_manager.constants import CLOUDINARY_BACKOFF_MAX
+from app.modules.file_manager.constants import SYNC_BLOCK_SIZE
+from app.modules.file_manager.constants import SYNC_POLL_INTERVAL
+from app.modules.file_manager.storage.signals import collect_stored_items
+from app.modules.file_manager.storage.signals import items_removed
+from app.modules.file_manager.storage.signals import items_stored
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    op TEXT NOT NULL,
+    queued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS manifest (
+    path TEXT PRIMARY KEY,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    md5 TEXT,
+    remote_etag TEXT,
+    synced_at REAL NOT NULL
+);
+'''
+
+UPLOAD = 'upload'
+MKDIR = 'mkdir'
+DELETE = 'delete'
+
+
+def file_md5(path: str) -> str:
+    """Get the MD5 digest of a file, the digest Cloudinary reports as ``etag``."""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(SYNC_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def related(path: str, other: str) -> bool:
+    """Check whether two paths are the same or one of them is below the other."""
+    return path == other or path.startswith(f'{other}/') or other.startswith(f'{path}/')
+
+
+class TokenBucket:
+    """Token bucket rate limiter.
+
+    Tokens refill at ``rate`` per second up to ``capacity``. Taking more tokens than
+    are available puts the bucket in debt, and the caller is told how long to wait, so
+    a request larger than the capacity (a big file against a byte budget) still
+    goes through at the configured rate.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second; 0 disables the limit
+            capacity: Largest burst, one second's worth of tokens by default
+        """
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take tokens from the bucket.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Seconds the caller must wait before going ahead
+        """
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+
+class SyncEngine:
+    """Replay fallback storage writes to the primary storage from a durable outbox.
+
+    Every file stored, folder created or path deleted in the fallback storage while a
+    primary storage is configured becomes an outbox entry in an SQLite database. Entries
+    are keyed by path, so repeated writes of a file collapse into one upload, and deleting
+    a folder drops the entries queued below it. A dispatcher thread hands due entries to
+    worker threads while the primary storage is online, in queue order, never running two
+    entries for the same path or for a folder and a path inside it at once. Operations
+    and uploaded bytes are rate limited, and failed entries are retried with exponential
+    backoff.
+
+    A manifest records the size, modification time and MD5 of every file replicated,
+    along with the etag the primary storage reported for its upload (the ``etag`` of
+    the item it stored). Replays only transfer what changed: files whose size and
+    modification time match the manifest are skipped without being read, and files that
+    were merely touched are skipped after hashing them, when their MD5 still matches the
+    primary's etag. Providers that report no etag get such files uploaded again.
+    Deletes only remove what was replicated, so files stored in the primary storage
+    outside the outage are never touched. The fallback storage must keep its files on
+    local disk (``get_local_path``), as local storage does.
+    """
+
+    def __init__(
+        self,
+        app,
+        db_path: str,
+        workers: int,
+        rate_limit: float = 0,
+        bandwidth_limit: float = 0,
+    ):
+        """Initialize the engine.
+
+        Args:
+            app: Flask application whose storage registry is replicated
+            db_path: Path of the outbox and manifest database
+            workers: Number of operations replayed at the same time
+            rate_limit: Operations per second, 0 for no limit
+            bandwidth_limit: Uploaded bytes per second, 0 for no limit
+        """
+        self.app = app
+        self.workers = workers
+        self._store = SQLiteStore(db_path, SCHEMA)
+        self._operations = TokenBucket(rate_limit)
+        self._bandwidth = TokenBucket(bandwidth_limit)
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='sync-worker')
+        self._in_flight: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the dispatcher thread if it is not running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='sync-engine', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the dispatcher and the workers; unfinished entries stay in the outbox."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def wake(self):
+        """Dispatch due entries right away."""
+        self._wake.set()
+
+    def enqueue(self, op: str, paths: Iterable[str]):
+        """Queue operations for replay, replacing the entries already queued for the paths.
+
+        Args:
+            op: UPLOAD, MKDIR or DELETE
+            paths: Paths in local storage the operation applies to
+        """
+        now = time.time()
+        rows = []
+        for path in paths:
+            path = path.strip('/')
+            if op == DELETE:
+                prefix = f'{path}/'
+                self._store.execute(
+                    'DELETE FROM outbox WHERE path >= ? AND path < ?', (prefix, f'{prefix}\uffff')
+                )
+            rows.append((path, op, now, now))
+        if not rows:
+            return
+
+        self._store.executemany(
+            'INSERT OR REPLACE INTO outbox (path, op, queued_at, next_attempt) '
+            'VALUES (?, ?, ?, ?)',
+            rows,
+        )
+        self.wake()
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Get the queued entries, oldest first."""
+        rows = self._store.execute('SELECT * FROM outbox ORDER BY id').fetchall()
+        return [dict(row) for row in rows]
+
+    def manifest(self, path: str) -> Optional[Dict[str, Any]]:
+        """Get the manifest record of a replicated path, if there is one."""
+        row = self._store.execute('SELECT * FROM manifest WHERE path = ?', (path,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Wait until the outbox is empty (mostly useful in tests).
+
+        Returns:
+            Whether the outbox was emptied before the timeout
+        """
+        deadline = time.monotonic() + timeout
+        while self.pending() or self._in_flight:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _run(self):
+        """Dispatch due entries, then sleep until woken or the next poll."""
+        while not self._stopped.is_set():
+            self._wake.clear()
+            try:
+                delay = self._dispatch()
+            except Exception as e:
+                self.app.logger.error(f'Sync dispatch failed: {e}')
+                delay = SYNC_POLL_INTERVAL
+            self._wake.wait(delay)
+
+    def _dispatch(self) -> Optional[float]:
+        """Hand due entries to the workers while the primary storage is online.
+
+        Returns:
+            Seconds until the outbox should be looked at again, None to wait for a wake
+        """
+        if not self._store.execute('SELECT 1 FROM outbox LIMIT 1').fetchone():
+            return None
+        remote = self.app.extensions['storage_registry'].get_primary()
+        checker = getattr(remote, 'status_checker', None)
+        if remote is None or (checker is not None and not checker.get_status()['online']):
+            return SYNC_POLL_INTERVAL
+
+        rows = self._store.execute(
+            'SELECT * FROM outbox WHERE next_attempt <= ? ORDER BY id LIMIT ?',
+            (time.time(), self.workers * 4),
+        ).fetchall()
+        with self._lock:
+            blocked = list(self._in_flight.values())
+            for row in rows:
+                if len(self._in_flight) >= self.workers:
+                    break
+                if not any(related(row['path'], other) for other in blocked):
+                    self._in_flight[row['id']] = row['path']
+                    self._executor.submit(self._replay, dict(row))
+                blocked.append(row['path'])
+        return SYNC_POLL_INTERVAL
+
+    def _replay(self, entry: Dict[str, Any]):
+        """Replay one outbox entry on a worker, removing it once it succeeded."""
+        try:
+            with self.app.app_context():
+                if self._stopped.wait(self._operations.reserve()):
+                    return
+                try:
+                    self._apply(entry)
+                    self._store.execute('DELETE FROM outbox WHERE id = ?', (entry['id'],))
+                except Exception as e:
+                    self._retry_later(entry, e)
+        finally:
+            with self._lock:
+                self._in_flight.pop(entry['id'], None)
+            self.wake()
+
+    def _apply(self, entry: Dict[str, Any]):
+        """Apply an outbox entry to the primary storage, raising if it failed."""
+        registry = self.app.extensions['storage_registry']
+        local, remote = registry.get_fallback(), registry.get_primary()
+        if remote is None or remote is local:
+            raise IOError('No primary storage is configured')
+
+        if entry['op'] == UPLOAD:
+            success, error = self._upload(entry['path'], local, remote)
+        elif entry['op'] == MKDIR:
+            success, error = self._mkdir(entry['path'], remote)
+        else:
+            success, error = self._delete(entry['path'], remote)
+        if not success:
+            raise IOError(error)
+
+    def _upload(self, path: str, local, remote):
+        """Upload a local file unless the manifest shows the primary storage holds it."""
+        full_path = local.get_local_path(path)
+        if full_path is None:
+            return True, None  # deleted since; its delete entry follows
+
+        stat = os.stat(full_path)
+        record = self.manifest(path)
+        if record and (record['size'], record['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            return True, None
+
+        md5 = file_md5(full_path)
+        if not record or record['remote_etag'] != md5:
+            if self._stopped.wait(self._bandwidth.reserve(stat.st_size)):
+                return False, 'Sync stopped'
+            folder, filename = posixpath.split(path)
+            with open(full_path, 'rb') as f, collect_stored_items(remote.name) as stored:
+                success, error = remote.upload_file(
+                    FileStorage(stream=f, filename=filename), folder, filename
+                )
+            if not success:
+                return False, error
+            etags = [item.get('etag') for item in stored if item['path'] == path]
+            remote_etag = etags[-1] if etags else None
+        else:
+            remote_etag = record['remote_etag']
+
+        self._record(path, False, stat.st_size, stat.st_mtime_ns, md5, remote_etag)
+        return True, None
+
+    def _mkdir(self, path: str, remote):
+        """Create a folder in the primary storage unless it was replicated already."""
+        if self.manifest(path):
+            return True, None
+
+        success, error = remote.create_folder(path)
+        if success:
+            self._record(path, True, 0, 0, None, None)
+        return success, error
+
+    def _delete(self, path: str, remote):
+        """Delete a replicated file or folder tree from the primary storage."""
+        prefix = f'{path}/'
+        rows = self._store.execute(
+            'SELECT path, is_dir FROM manifest WHERE path = ? OR (path >= ? AND path < ?)',
+            (path, prefix, f'{prefix}\uffff'),
+        ).fetchall()
+        if not rows:
+            return True, None  # never replicated
+
+        files = [row['path'] for row in rows if not row['is_dir']]
+        if any(row['is_dir'] for row in rows if row['path'] == path):
+            success, error = remote.delete_items(files, [path])
+        else:
+            success, error = remote.delete_items(files)
+        if success:
+            self._store.execute(
+                'DELETE FROM manifest WHERE path = ? OR (path >= ? AND path < ?)',
+                (path, prefix, f'{prefix}\uffff'),
+            )
+        return success, error
+
+    def _record(
+        self,
+        path: str,
+        is_dir: bool,
+        size: int,
+        mtime_ns: int,
+        md5: Optional[str],
+        remote_etag: Optional[str],
+    ):
+        """Record a replicated path in the manifest, with the etag the primary reported."""
+        self._store.execute(
+            'INSERT OR REPLACE INTO manifest '
+            '(path, is_dir, size, mtime_ns, md5, remote_etag, synced_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (path, int(is_dir), size, mtime_ns, md5, remote_etag, time.time()),
+        )
+
+    def _retry_later(self, entry: Dict[str, Any], error: Exception):
+        """Reschedule a failed entry with jittered exponential backoff."""
+        delay = min(CLOUDINARY_BACKOFF_MAX, CLOUDINARY_BACKOFF_BASE * 2 ** entry['attempts'])
+        delay = random.uniform(delay / 2, delay)
+        self._store.execute(
+            'UPDATE outbox SET attempts = attempts + 1, next_attempt = ?, error = ? '
+            'WHERE id = ?',
+            (time.time() + delay, str(error), entry['id']),
+        )
+        self.app.logger.warning(f"Could not sync {entry['path']} to primary storage: {error}")
+
+
+def replicating_engine(sender) -> Optional[SyncEngine]:
+    """Get the application's sync engine if the sender's writes must be replicated."""
+    registry = current_app.extensions['storage_registry']
+    fallback, primary = registry.get_fallback(), registry.get_primary()
+    if primary is None or primary is fallback:
+        return None
+    if getattr(sender, 'name', None) != fallback.name:
+        return None
+    return current_app.extensions.get('sync_engine')
+
+
+@items_stored.connect
+def queue_stored_items(sender, items: List[Dict[str, Any]], **extra):
+    """Queue files and folders stored locally for replication."""
+    try:
+        engine = replicating_engine(sender)
+        if engine is not None:
+            engine.enqueue(MKDIR, [item['path'] for item in items if item['is_dir']])
+            engine.enqueue(UPLOAD, [item['path'] for item in items if not item['is_dir']])
+    except Exception as e:
+        current_app.logger.error(f'Could not queue stored items for sync: {e}')
+
+
+@items_removed.connect
+def queue_removed_items(sender, paths: List[str], **extra):
+    """Queue paths deleted locally for replication."""
+    try:
+        engine = replicating_engine(sender)
+        if engine is not None:
+            engine.enqueue(DELETE, paths)
+    except Exception as e:
+        current_app.logger.error(f'Could not queue removed items for sync: {e}')
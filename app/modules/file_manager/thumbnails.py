@@ -0,0 +1,200 @@
+"""Thumbnails of local images, rendered in the background and cached on disk."""
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from PIL import Image
+from PIL import ImageOps
+
+from .constants import THUMBNAIL_RENDER_TIMEOUT
+
+HASH_BUFFER_SIZE = 64 * 1024
+RESOLVED_CACHE_SIZE = 4096  # images whose thumbnail path is remembered
+
+
+def content_digest(path: str) -> str:
+    """Get the SHA-256 digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def render_thumbnail(source_path: str, target_path: str, size: int):
+    """Render a JPEG thumbnail fitting in a ``size`` square with Pillow.
+
+    Args:
+        source_path: Image to shrink
+        target_path: Path the thumbnail is written to
+        size: Largest width or height of the thumbnail
+    """
+    with Image.open(source_path) as image:
+        image.draft('RGB', (size, size))  # lets JPEG decode at a reduced scale
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        image.convert('RGB').save(target_path, 'JPEG', quality=85, optimize=True)
+
+
+class ThumbnailService:
+    """Render thumbnails on a worker pool into a size-bounded on-disk cache.
+
+    Thumbnails are keyed by the SHA-256 of the image and the requested size, so renamed
+    or copied images reuse the same thumbnail and edited ones get a new one. Concurrent
+    requests for the same thumbnail share a single render. Once the cache grows past
+    ``max_bytes`` the least recently served thumbnails are removed.
+
+    Images are hashed on the worker pool, not on the request thread. The thumbnail
+    path of an image is then remembered for its size and modification time, so later
+    requests are served without reading the image again.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int,
+        max_workers: int,
+        renderer: Optional[Callable[[str, str, int], None]] = None,
+    ):
+        """Initialize the service.
+
+        Args:
+            cache_dir: Directory holding the rendered thumbnails
+            max_bytes: Total size the cache is trimmed back to
+            max_workers: Number of thumbnails rendered at the same time
+            renderer: Callable rendering (source, target, size); Pillow by default
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.renderer = renderer or render_thumbnail
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='thumbnails')
+        self._pending: Dict[Tuple, Future] = {}
+        self._resolved: OrderedDict[Tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = sum(entry.stat().st_size for entry in os.scandir(cache_dir))
+
+    @property
+    def enabled(self) -> bool:
+        """Whether thumbnails are rendered; clearing ``renderer`` turns them off."""
+        return self.renderer is not None
+
+    def thumbnail(self, source_path: str, size: int) -> str:
+        """Get the cached thumbnail of an image, rendering it first if needed.
+
+        Args:
+            source_path: Image on local disk
+            size: Largest width or height of the thumbnail
+
+        Returns:
+            Path of the thumbnail file
+
+        Raises:
+            OSError: If the image cannot be read or rendered
+        """
+        stat = os.stat(source_path)
+        key = (source_path, stat.st_size, stat.st_mtime_ns, size)
+        with self._lock:
+            target_path = self._resolved.get(key)
+            if target_path is not None:
+                self._resolved.move_to_end(key)
+        if target_path is not None and self._touch(target_path):
+            return target_path
+
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self._resolve, key)
+                self._pending[key] = future
+                future.add_done_callback(lambda _: self._forget(key))
+        return future.result(THUMBNAIL_RENDER_TIMEOUT)
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _resolve(self, key: Tuple) -> str:
+        """Hash an image and get its thumbnail, rendering it if it is not cached.
+
+        Args:
+            key: Image path, size, modification time and thumbnail size
+
+        Returns:
+            Path of the thumbnail file
+        """
+        source_path, _, _, size = key
+        target_path = os.path.join(self.cache_dir, f'{content_digest(source_path)}-{size}.jpg')
+        if not self._touch(target_path):
+            self._render(source_path, target_path, size)
+
+        with self._lock:
+            self._resolved[key] = target_path
+            if len(self._resolved) > RESOLVED_CACHE_SIZE:
+                self._resolved.popitem(last=False)
+        return target_path
+
+    def _touch(self, target_path: str) -> bool:
+        """Mark a thumbnail as recently used for eviction, if it is still cached."""
+        try:
+            os.utime(target_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _render(self, source_path: str, target_path: str, size: int):
+        """Render a thumbnail into place and trim the cache."""
+        fd, staged = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+        os.close(fd)
+        try:
+            self.renderer(source_path, staged, size)
+            replaced = os.path.exists(target_path)
+            os.replace(staged, target_path)
+        finally:
+            if os.path.exists(staged):
+                os.remove(staged)
+
+        with self._lock:
+            if not replaced:
+                self._size += os.path.getsize(target_path)
+            if self._size > self.max_bytes:
+                self._evict(keep=target_path)
+
+    def _evict(self, keep: str):
+        """Remove the least recently used thumbnails until the cache fits its bound.
+
+        Args:
+            keep: Thumbnail that must stay (the one about to be served)
+        """
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.jpg')),
+            key=lambda entry: entry.stat().st_mtime_ns,
+        )
+        self._size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if entry.path == keep:
+                continue
+            if self._size <= self.max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._size -= size
+            except FileNotFoundError:
+                continue
+
+    def _forget(self, key: Tuple):
+        """Drop a finished render from the pending ones."""
+        with self._lock:
+            self._pending.pop(key, None)
@@ -2,8 +2,18 @@ from datetime import datetime
 from datetime import timedelta
 
 from flask import Blueprint
+from flask import jsonify
 from flask import render_template
 from flask import request
+from flask import Response
+
+from .timesheet import calculate_timesheet
+from .timesheet import DEFAULT_DAILY_LIMIT
+from .timesheet import MAX_BATCH_ROWS
+from .timesheet import parse_duration
+from .timesheet import read_csv_rows
+from .timesheet import TimesheetError
+from .timesheet import write_csv
 
 time_calculator_bp = Blueprint(
     'time_calculator',
@@ -117,3 +127,61 @@ def calculate_time_difference():
             calculation_type=calculation_type,
             error='Formato de hora inválido. Use HH:MM',
         )
+
+
+def read_batch_request():
+    """Get the rows and options of a batch request.
+
+    Takes a JSON object (``rows`` plus options), a text/csv body or an uploaded ``file``
+    field holding CSV; CSV batches take their options from the query string.
+
+    Returns:
+        The rows and a mapping of options
+
+    Raises:
+        TimesheetError: If the request holds no valid batch
+    """
+    if 'file' in request.files:
+        return read_csv_rows(request.files['file'].read()), request.args
+    if request.mimetype == 'text/csv':
+        return read_csv_rows(request.get_data()), request.args
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('rows'), list):
+        raise TimesheetError('Send a JSON object with a list of rows, or CSV')
+    return data['rows'], data
+
+
+@time_calculator_bp.route('/batch', methods=['POST'])
+def calculate_batch():
+    """Calculate many intervals and time operations in one request.
+
+    Answers with the result of every row plus the worked time and overtime of each day
+    and of the whole batch (see ``calculate_timesheet``). The ``daily_limit`` option
+    ('H:MM', default 08:00) sets when overtime starts. With ``format=csv`` (or an
+    ``Accept: text/csv`` header) the rows are answered as CSV, with the totals in
+    ``X-Timesheet-*`` headers.
+
+    Returns:
+        Response: JSON or CSV results, or a JSON error with status 400.
+    """
+    try:
+        rows, options = read_batch_request()
+        if len(rows) > MAX_BATCH_ROWS:
+            raise TimesheetError(f'A batch holds at most {MAX_BATCH_ROWS} rows')
+        daily_limit = options.get('daily_limit')
+        daily_limit = parse_duration(str(daily_limit)) if daily_limit else DEFAULT_DAILY_LIMIT
+    except TimesheetError as e:
+        return jsonify({'error': str(e)}), 400
+
+    timesheet = calculate_timesheet(rows, daily_limit)
+    best = request.accept_mimetypes.best_match(['application/json', 'text/csv'])
+    if request.args.get('format', 'csv' if best == 'text/csv' else 'json') != 'csv':
+        return jsonify(timesheet)
+
+    totals = timesheet['totals']
+    response = Response(write_csv(rows, timesheet['rows']), mimetype='text/csv')
+    response.headers['X-Timesheet-Total'] = totals['duration']
+    response.headers['X-Timesheet-Overtime'] = totals['overtime']
+    response.headers['X-Timesheet-Errors'] = str(totals['errors'])
+    return response
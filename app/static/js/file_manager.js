@@ -0,0 +1,584 @@
+/**
+ * File manager client-side helpers.
+ *
+ * Selected files and folders are uploaded in as few requests as possible:
+ * small files are grouped into multi-file posts (keeping their relative
+ * folders), and files larger than one chunk are sent through the chunked
+ * upload protocol: start a session, PUT every part as a raw body, then commit
+ * the upload. Sessions are remembered per file, so retrying after a dropped
+ * connection only sends the parts the server does not hold yet.
+ *
+ * Uploads, new folders and deletes go through the JSON API (/api/v1), whose
+ * responses carry only what changed; the listing and the usage card are then
+ * patched in place instead of reloading the page. Changes made from other pages
+ * arrive over the /api/v1/events stream and are applied the same way.
+ */
+const listing = (function () {
+  'use strict';
+
+  const list = document.getElementById('itemList');
+  if (!list) {
+    return null;
+  }
+
+  const count = document.getElementById('itemCount');
+  const emptyState = document.getElementById('emptyState');
+  const card = document.querySelector('[data-usage-card]');
+  const imageExtensions = list.dataset.imageExtensions.split(' ');
+
+  function itemUrl(template, path) {
+    return template.replace('__path__', path.split('/').map(encodeURIComponent).join('/'));
+  }
+
+  function formatSize(size) {
+    if (size < 1024) {
+      return size + ' B';
+    }
+    if (size < 1024 * 1024) {
+      return (size / 1024).toFixed(1) + ' KB';
+    }
+    return (size / 1024 / 1024).toFixed(1) + ' MB';
+  }
+
+  function element(tag, attributes, children) {
+    const node = document.createElement(tag);
+    Object.entries(attributes || {}).forEach(([name, value]) => node.setAttribute(name, value));
+    (children || []).forEach((child) =>
+      node.append(typeof child === 'string' ? document.createTextNode(child) : child)
+    );
+    return node;
+  }
+
+  function icon(name) {
+    return element('i', { class: 'bi bi-' + name });
+  }
+
+  // Build a row like the ones rendered by index.html
+  function renderItem(item) {
+    // The thumbnail URL is only set when the server can render thumbnails
+    const hasThumbnail =
+      list.dataset.thumbnailUrl !== undefined &&
+      !item.is_dir &&
+      imageExtensions.some((ext) => item.name.toLowerCase().endsWith(ext));
+    const info = element('div', {}, [
+      element('input', {
+        type: 'checkbox',
+        class: 'form-check-input me-2',
+        name: item.is_dir ? 'folder' : 'path',
+        value: item.path,
+        form: 'selectionForm',
+        'aria-label': 'Selecionar ' + item.name,
+      }),
+    ]);
+    if (hasThumbnail) {
+      const thumbnail = element('img', {
+        src: itemUrl(list.dataset.thumbnailUrl, item.path) + '?v=' + (item.modified || ''),
+        class: 'file-thumbnail me-2',
+        alt: '',
+        loading: 'lazy',
+      });
+      thumbnail.onerror = function () {
+        this.hidden = true;
+        this.nextElementSibling.hidden = false;
+      };
+      info.append(thumbnail);
+    }
+    const typeIcon = icon(
+      item.is_dir ? 'folder-fill text-warning me-2' : 'file-earmark text-secondary me-2'
+    );
+    typeIcon.hidden = hasThumbnail;
+    info.append(typeIcon);
+
+    const actions = element('div', { class: 'actions' });
+    if (item.is_dir) {
+      const href = list.dataset.indexUrl + '?path=' + encodeURIComponent(item.path);
+      info.append(element('a', { href: href, class: 'text-decoration-none' }, [item.name]));
+      actions.append(
+        element(
+          'a',
+          {
+            href: list.dataset.archiveUrl + '?path=' + encodeURIComponent(item.path),
+            class: 'btn btn-sm btn-outline-success',
+            title: 'Baixar pasta (ZIP)',
+          },
+          [icon('file-earmark-zip')]
+        )
+      );
+    } else {
+      const href = itemUrl(list.dataset.downloadUrl, item.path);
+      const name = element('span', {}, [item.name]);
+      info.append(
+        element('a', { href: href, class: 'text-decoration-none' }, [name]),
+        element('small', { class: 'text-muted ms-2' }, [formatSize(item.size)])
+      );
+      actions.append(
+        element('a', { href: href, class: 'btn btn-sm btn-outline-success' }, [icon('download')])
+      );
+    }
+    const deleteHref =
+      itemUrl(list.dataset.deleteUrl, item.path) + (item.is_dir ? '?folder=1' : '');
+    const deleteLink = element(
+      'a',
+      { href: deleteHref, class: 'btn btn-sm btn-outline-danger', 'data-delete': '' },
+      [icon('trash')]
+    );
+    deleteLink.onclick = () => confirm('Tem certeza?');
+    actions.append(deleteLink);
+
+    const row = element(
+      'div',
+      {
+        class: 'list-group-item file-item d-flex justify-content-between align-items-center',
+        'data-path': item.path,
+        'data-name': item.name,
+        'data-size': item.size,
+      },
+      [info, actions]
+    );
+    row.toggleAttribute('data-dir', item.is_dir);
+    return row;
+  }
+
+  function rows() {
+    return Array.from(list.querySelectorAll('.file-item'));
+  }
+
+  function findRow(path) {
+    return rows().find((row) => row.dataset.path === path);
+  }
+
+  // Folders come first; within each group rows follow the name order when sorting by name
+  function comesBefore(item, row) {
+    if (item.is_dir !== row.hasAttribute('data-dir')) {
+      return item.is_dir;
+    }
+    if (list.dataset.sort !== 'name') {
+      return true;
+    }
+    const order = item.name.toLowerCase().localeCompare(row.dataset.name.toLowerCase());
+    return list.dataset.order === 'desc' ? order > 0 : order < 0;
+  }
+
+  function updateCount(delta) {
+    emptyState.hidden = rows().length > 0;
+    if (count.dataset.total !== '') {
+      count.dataset.total = parseInt(count.dataset.total, 10) + delta;
+      count.textContent = count.dataset.total + ' itens';
+    }
+  }
+
+  // The row standing for an item in the current folder: the item itself, or the
+  // folder below the current one it was stored in
+  function rowItem(item) {
+    const base = list.dataset.path ? list.dataset.path + '/' : '';
+    if (!item.path.startsWith(base)) {
+      return null;
+    }
+    const parts = item.path.slice(base.length).split('/');
+    if (parts.length === 1) {
+      return item;
+    }
+    return { name: parts[0], path: base + parts[0], is_dir: true, size: 0, modified: null };
+  }
+
+  function insert(items) {
+    let added = 0;
+    items.forEach(function (stored) {
+      const item = rowItem(stored);
+      if (!item) {
+        return;
+      }
+      const existing = findRow(item.path);
+      if (existing) {
+        if (item === stored && !item.is_dir) {
+          existing.replaceWith(renderItem(item));
+        }
+        return;
+      }
+      const next = rows().find((row) => comesBefore(item, row));
+      list.insertBefore(renderItem(item), next || emptyState);
+      added++;
+    });
+    updateCount(added);
+  }
+
+  function remove(paths) {
+    let removed = 0;
+    paths.forEach(function (path) {
+      const row = findRow(path);
+      if (row) {
+        row.remove();
+        removed++;
+      }
+    });
+    updateCount(-removed);
+  }
+
+  function renderUsage(used, total) {
+    card.dataset.used = used;
+    card.dataset.total = total;
+    const gb = 1024 * 1024 * 1024;
+    const unit = total / gb >= 1 ? gb : 1024 * 1024;
+    const suffix = unit === gb ? 'GB' : 'MB';
+    const text = card.querySelector('[data-usage-text]');
+    text.replaceChildren(
+      element('strong', {}, [+(used / unit).toFixed(2) + suffix]),
+      ' de ' + +(total / unit).toFixed(2) + suffix
+    );
+
+    const percent = total > 0 ? Math.round((used / total) * 1000) / 10 : 0;
+    const level = percent > 90 ? 'danger' : percent > 70 ? 'warning' : 'success';
+    const bar = card.querySelector('.progress-bar');
+    bar.classList.remove('bg-danger', 'bg-warning', 'bg-success');
+    bar.classList.add('bg-' + level);
+    bar.style.width = percent + '%';
+    bar.setAttribute('aria-valuenow', percent);
+    card.querySelector('[data-usage-percent]').textContent = percent + '% usado';
+
+    const states = {
+      danger: ['exclamation-triangle-fill', ' Crítico'],
+      warning: ['exclamation-triangle', ' Atenção'],
+      success: ['check-circle', ' OK'],
+    };
+    card
+      .querySelector('[data-usage-state]')
+      .replaceChildren(
+        element('span', { class: 'text-' + level }, [icon(states[level][0]), states[level][1]])
+      );
+  }
+
+  // Apply a known change in used bytes, or fetch the usage when it is not known
+  async function adjustUsage(delta) {
+    if (!card) {
+      return;
+    }
+    if (delta !== null) {
+      const used = Math.max(parseFloat(card.dataset.used) + delta, 0);
+      renderUsage(used, parseFloat(card.dataset.total));
+      return;
+    }
+    const response = await fetch(list.dataset.apiUsageUrl);
+    if (response.ok) {
+      const usage = await response.json();
+      renderUsage(usage.used, usage.total);
+    }
+  }
+
+  async function deletePaths(paths, folders) {
+    const response = await fetch(list.dataset.apiItemsUrl, {
+      method: 'DELETE',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ paths: paths, folders: folders }),
+    });
+    const body = await response.json().catch(() => ({}));
+    if (!response.ok) {
+      alert('Falha ao excluir: ' + (body.error || response.statusText));
+      return;
+    }
+    const freed = paths.reduce((sum, path) => sum + parseInt(findRow(path).dataset.size, 10), 0);
+    remove(body.removed);
+    await adjustUsage(folders.length ? null : -freed);
+  }
+
+  // Enable the selection actions (archive download, bulk delete) only while items are selected
+  const selectionActions = document.querySelectorAll('[data-selection-action]');
+  function selectedBoxes() {
+    return Array.from(list.querySelectorAll('input[type="checkbox"][form="selectionForm"]'));
+  }
+  function updateSelectionActions() {
+    const selected = selectedBoxes().some((box) => box.checked);
+    selectionActions.forEach((action) => (action.disabled = !selected));
+  }
+  list.addEventListener('change', updateSelectionActions);
+
+  // Inline confirm() handlers run first and cancel the event when declined
+  list.addEventListener('click', function (event) {
+    const link = event.target.closest('[data-delete]');
+    if (!link || event.defaultPrevented) {
+      return;
+    }
+    event.preventDefault();
+    const row = link.closest('.file-item');
+    const isDir = row.hasAttribute('data-dir');
+    deletePaths(isDir ? [] : [row.dataset.path], isDir ? [row.dataset.path] : []).then(
+      updateSelectionActions
+    );
+  });
+
+  document.getElementById('selectionForm').addEventListener('submit', function (event) {
+    if (!event.submitter || !event.submitter.hasAttribute('data-bulk-delete')) {
+      return;
+    }
+    event.preventDefault();
+    const checked = selectedBoxes().filter((box) => box.checked);
+    const values = (name) => checked.filter((box) => box.name === name).map((box) => box.value);
+    deletePaths(values('path'), values('folder')).then(updateSelectionActions);
+  });
+
+  return { insert: insert, remove: remove, adjustUsage: adjustUsage };
+})();
+
+(function () {
+  'use strict';
+
+  const list = document.getElementById('itemList');
+  if (!list || !listing || !window.EventSource) {
+    return;
+  }
+
+  // Events repeat the changes this page made itself; inserts and removals of known
+  // paths are no-ops, and the usage is fetched again rather than adjusted.
+  let usageTimer = null;
+  function refreshUsage() {
+    clearTimeout(usageTimer);
+    usageTimer = setTimeout(() => listing.adjustUsage(null), 1000);
+  }
+
+  // The browser reconnects on its own, sending the id of the last event it got
+  const source = new EventSource(list.dataset.eventsUrl);
+  function onStorageEvent(name, apply) {
+    source.addEventListener(name, function (event) {
+      const data = JSON.parse(event.data);
+      if (data.storage === list.dataset.storage) {
+        apply(data);
+        refreshUsage();
+      }
+    });
+  }
+  onStorageEvent('stored', (data) => listing.insert(data.items));
+  onStorageEvent('removed', (data) => listing.remove(data.paths));
+  source.addEventListener('resync', () => window.location.reload());
+  window.addEventListener('pagehide', () => source.close());
+})();
+
+(function () {
+  'use strict';
+
+  const form = document.getElementById('mkdirForm');
+  if (!form || !listing) {
+    return;
+  }
+
+  form.addEventListener('submit', async function (event) {
+    event.preventDefault();
+    const response = await fetch(form.dataset.apiUrl, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ path: form.elements.path.value, name: form.elements.dirname.value }),
+    });
+    const body = await response.json().catch(() => ({}));
+    if (!response.ok) {
+      alert('Falha ao criar pasta: ' + (body.error || response.statusText));
+      return;
+    }
+    listing.insert([body.item]);
+    form.reset();
+    bootstrap.Modal.getOrCreateInstance(form.closest('.modal')).hide();
+  });
+})();
+
+(function () {
+  'use strict';
+
+  const form = document.getElementById('uploadForm');
+  if (!form) {
+    return;
+  }
+
+  const chunkSize = parseInt(form.dataset.chunkSize, 10);
+  const chunkedUrl = form.dataset.chunkedUrl;
+  const stored = [];
+  const progress = document.getElementById('uploadProgress');
+  const progressBar = progress.querySelector('.progress-bar');
+
+  function setProgress(fraction) {
+    const percent = Math.round(fraction * 100);
+    progress.classList.remove('d-none');
+    progressBar.style.width = percent + '%';
+    progressBar.textContent = percent + '%';
+  }
+
+  async function checkedFetch(url, options) {
+    const response = await fetch(url, options);
+    if (!response.ok) {
+      const body = await response.json().catch(() => ({}));
+      throw new Error(body.error || response.statusText);
+    }
+    return response;
+  }
+
+  const MAX_ATTEMPTS = 5;
+
+  function sessionKey(file, path) {
+    return ['chunked-upload', path, file.name, file.size, file.lastModified].join(':');
+  }
+
+  async function sha256(blob) {
+    if (!window.crypto || !window.crypto.subtle) {
+      return null; // only available in secure contexts; the server then skips the check
+    }
+    const digest = await window.crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+    return Array.from(new Uint8Array(digest))
+      .map((byte) => byte.toString(16).padStart(2, '0'))
+      .join('');
+  }
+
+  async function resumeOrStart(file, path) {
+    const key = sessionKey(file, path);
+    const savedId = window.localStorage.getItem(key);
+    if (savedId) {
+      const response = await fetch(chunkedUrl + '/' + savedId);
+      if (response.ok) {
+        return response.json();
+      }
+    }
+
+    const response = await checkedFetch(chunkedUrl, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ path: path, filename: file.name, size: file.size }),
+    });
+    const session = await response.json();
+    session.missing = Array.from({ length: session.chunks }, (_, index) => index);
+    window.localStorage.setItem(key, session.id);
+    return session;
+  }
+
+  async function fetchWithRetries(url, options) {
+    for (let attempt = 1; ; attempt++) {
+      try {
+        return await checkedFetch(url, options);
+      } catch (error) {
+        if (attempt >= MAX_ATTEMPTS) {
+          throw error;
+        }
+        await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** attempt));
+      }
+    }
+  }
+
+  async function sendChunk(url, chunk) {
+    const headers = {};
+    const checksum = await sha256(chunk);
+    if (checksum) {
+      headers['X-Chunk-SHA256'] = checksum;
+    }
+    return fetchWithRetries(url, { method: 'PUT', headers: headers, body: chunk });
+  }
+
+  async function uploadInChunks(file, path, onProgress) {
+    const session = await resumeOrStart(file, path);
+    const sessionUrl = chunkedUrl + '/' + session.id;
+    let done = session.chunks - session.missing.length;
+    onProgress(Math.min(done * session.chunk_size, file.size));
+
+    for (const index of session.missing) {
+      const start = index * session.chunk_size;
+      await sendChunk(sessionUrl + '/' + index, file.slice(start, start + session.chunk_size));
+      onProgress(Math.min(++done * session.chunk_size, file.size));
+    }
+
+    // A failed commit keeps the session on the server, so it can simply be sent again
+    const response = await fetchWithRetries(sessionUrl + '/complete', { method: 'POST' });
+    stored.push(...(await response.json()).items);
+    window.localStorage.removeItem(sessionKey(file, path));
+  }
+
+  function relativeName(file) {
+    return file.webkitRelativePath || file.name;
+  }
+
+  function folderOf(file, path) {
+    const parts = relativeName(file).split('/').slice(0, -1);
+    return [path].concat(parts).filter(Boolean).join('/');
+  }
+
+  async function postBatch(files, path) {
+    const data = new FormData();
+    data.append('path', path);
+    files.forEach((file) => data.append('file', file, relativeName(file)));
+
+    const response = await fetch(form.dataset.apiUrl, { method: 'POST', body: data });
+    const body = await response.json().catch(() => ({}));
+    if (!response.ok) {
+      throw new Error(body.error || response.statusText);
+    }
+    stored.push(...body.items);
+    return body.results.filter((result) => !result.success);
+  }
+
+  async function uploadAll(files, path) {
+    const totalBytes = files.reduce((sum, file) => sum + file.size, 0) || 1;
+    let doneBytes = 0;
+    const failures = [];
+    let batch = [];
+    let batchBytes = 0;
+
+    async function flush() {
+      if (batch.length) {
+        const failed = await postBatch(batch, path);
+        failed.forEach((result) => failures.push(result.filename + ': ' + result.error));
+        doneBytes += batchBytes;
+        setProgress(doneBytes / totalBytes);
+        batch = [];
+        batchBytes = 0;
+      }
+    }
+
+    for (const file of files) {
+      if (file.size > chunkSize) {
+        try {
+          await uploadInChunks(file, folderOf(file, path), (sent) =>
+            setProgress((doneBytes + sent) / totalBytes)
+          );
+        } catch (error) {
+          failures.push(relativeName(file) + ': ' + error.message);
+        }
+        doneBytes += file.size;
+        continue;
+      }
+
+      // Keep each multi-file request below the request size limit
+      if (batchBytes + file.size > chunkSize) {
+        await flush();
+      }
+      batch.push(file);
+      batchBytes += file.size;
+    }
+    await flush();
+    return failures;
+  }
+
+  form.addEventListener('submit', async function (event) {
+    const inputs = Array.from(form.querySelectorAll('input[type="file"]'));
+    const files = inputs.flatMap((input) => Array.from(input.files));
+    if (!files.length) {
+      return;
+    }
+
+    event.preventDefault();
+    const submit = form.querySelector('[type="submit"]');
+    submit.disabled = true;
+    stored.length = 0;
+    try {
+      const failures = await uploadAll(files, form.elements.path.value);
+      if (failures.length) {
+        alert('Falha no upload:\n' + failures.join('\n'));
+      }
+    } catch (error) {
+      alert('Falha no upload: ' + error.message);
+    }
+
+    if (!listing) {
+      window.location.reload();
+      return;
+    }
+    listing.insert(stored);
+    // Overwritten files count twice here; the next page load shows the exact usage
+    await listing.adjustUsage(stored.reduce((sum, item) => sum + item.size, 0));
+    form.reset();
+    progress.classList.add('d-none');
+    submit.disabled = false;
+    bootstrap.Modal.getOrCreateInstance(form.closest('.modal')).hide();
+  });
+})();
@@ -13,5 +13,6 @@ if __name__ == '__main__':
             'app/modules/file_manager/templates/index.html',
             'app/modules/time_calculator/templates/time_calculator.html',
             'app/static/css/style.css',
+            'app/static/js/file_manager.js',
         ],
     )
@@ -10,5 +10,7 @@ setup(
         'Flask',
         'Werkzeug',
         'cloudinary',
+        'httpx',
+        'Pillow',
     ],
 )
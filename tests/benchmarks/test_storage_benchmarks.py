@@ -0,0 +1,97 @@
+"""Benchmarks of the storage layer against local disk and the Cloudinary stand-in.
+
+Needs pytest-benchmark. They are kept out of the regular test run; run them with::
+
+    pytest tests/benchmarks --benchmark-only --no-cov
+
+BENCHMARK_FILE_COUNTS (comma separated, default 10,1000,100000) sets the folder sizes and
+BENCHMARK_CLOUDINARY_LATENCY the seconds added to every stand-in request (default 0).
+The number of Cloudinary API round trips of one call is saved in each result's extra info.
+
+CI (.github/workflows/benchmarks.yml) runs them with 10 and 1000 files against a baseline
+saved from the base commit, failing on regressions beyond ``--benchmark-compare-fail``.
+"""
+
+from io import BytesIO
+import os
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+pytest.importorskip('pytest_benchmark')
+
+FILE_COUNTS = [int(n) for n in os.getenv('BENCHMARK_FILE_COUNTS', '10,1000,100000').split(',')]
+LATENCY = float(os.getenv('BENCHMARK_CLOUDINARY_LATENCY', '0'))
+FOLDER = 'bench'
+FILE_SIZE = 100
+
+
+@pytest.fixture(params=['local', 'cloudinary'])
+def provider(request):
+    """Name of the storage provider benchmarked."""
+    return request.param
+
+
+@pytest.fixture(params=FILE_COUNTS, ids=lambda count: f'{count}files')
+def storage(request, app, provider):
+    """Get the active storage provider, with a folder of ``count`` files to work on."""
+    count = request.param
+    registry = app.extensions['storage_registry']
+    if provider == 'local':
+        folder = os.path.join(app.config['UPLOAD_FOLDER'], FOLDER)
+        os.makedirs(folder)
+        for i in range(count):
+            with open(os.path.join(folder, f'{i:06}.txt'), 'wb') as f:
+                f.write(b'x' * FILE_SIZE)
+        standin = None
+    else:
+        standin = request.getfixturevalue('cloudinary_standin')
+        for i in range(count):
+            standin.add_resource(f'{FOLDER}/{i:06}.txt', b'x' * FILE_SIZE)
+        # Measure the API calls themselves, not the metadata cache in front of them
+        registry.reconfigure(STORAGE_CACHE_BACKEND='')
+        registry.check_health(wait=True)
+        standin.latency = LATENCY
+
+    with app.test_request_context():
+        storage = registry.get_active()
+        assert storage.name == provider
+        storage.standin = standin
+        yield storage
+
+
+def run(benchmark, storage, function, *args):
+    """Benchmark a call, recording the Cloudinary round trips a single call makes."""
+    if storage.standin is not None:
+        storage.standin.counts.clear()
+        function(*args)
+        benchmark.extra_info['round_trips'] = dict(storage.standin.counts)
+    return benchmark(function, *args)
+
+
+def upload(storage):
+    """Upload one small file into the benchmark folder."""
+    file = FileStorage(stream=BytesIO(b'x' * FILE_SIZE), filename='new.txt')
+    return storage.upload_file(file, FOLDER, 'new.txt')
+
+
+def test_list_items(benchmark, storage):
+    """Benchmark listing the first page of the folder."""
+    listing = run(benchmark, storage, storage.list_items, FOLDER, 0, 100)
+    assert listing['items']
+
+
+def test_upload_file(benchmark, storage):
+    """Benchmark uploading a file into the folder."""
+    assert run(benchmark, storage, upload, storage) == (True, None)
+
+
+def test_get_storage_usage(benchmark, storage):
+    """Benchmark reading the storage usage."""
+    assert 'used' in run(benchmark, storage, storage.get_storage_usage)
+
+
+def test_index_request(benchmark, client, storage):
+    """Benchmark the whole listing page request for the folder."""
+    response = run(benchmark, storage, client.get, f'/?path={FOLDER}')
+    assert response.status_code == 200
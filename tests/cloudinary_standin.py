@@ -0,0 +1,348 @@
+"""Local HTTP stand-in for the Cloudinary Admin and Upload APIs.
+
+Implements the endpoints CloudinaryStorage calls, keeping resources in memory, so the
+storage layer can be tested and benchmarked without network access. Point the SDK at it
+with ``cloudinary.config(upload_prefix=standin.url)``; any cloud name is accepted.
+
+Every request can be delayed by ``latency`` seconds, and ``failure_rate`` (or
+``fail_next``) makes requests fail with HTTP 500, to exercise timeouts, retries and the
+circuit breaker. Request counts per endpoint are kept in ``counts``.
+
+Run it on its own with ``python -m tests.cloudinary_standin --port 8001`` and set
+``upload_prefix`` in the application's Cloudinary configuration to use it manually.
+"""
+
+import argparse
+import bisect
+from collections import Counter
+from datetime import datetime
+from datetime import timezone
+import hashlib
+import json
+import posixpath
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.exceptions import NotFound
+from werkzeug.routing import Map
+from werkzeug.routing import Rule
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request
+from werkzeug.wrappers import Response
+
+RESOURCE_TYPES = ('image', 'video', 'raw')
+DEFAULT_MAX_RESULTS = 10
+MAX_RESULTS = 500
+CREDITS_LIMIT = 25
+# Delivery URLs accept any cloud name, so resources are served without knowing it
+CLOUD_PLACEHOLDER = 'standin'
+
+URLS = Map(
+    [
+        Rule('/v1_1/<cloud>/ping', endpoint='ping'),
+        Rule('/v1_1/<cloud>/usage', endpoint='usage'),
+        Rule('/v1_1/<cloud>/folders', endpoint='root_folders'),
+        Rule('/v1_1/<cloud>/folders/<path:path>', endpoint='folder'),
+        Rule('/v1_1/<cloud>/resources/<resource_type>/<type>', endpoint='resources'),
+        Rule(
+            '/v1_1/<cloud>/resources/<resource_type>/<type>/<path:public_id>', endpoint='resource'
+        ),
+        Rule('/v1_1/<cloud>/<resource_type>/upload', endpoint='upload', methods=['POST']),
+        Rule('/v1_1/<cloud>/<resource_type>/destroy', endpoint='destroy', methods=['POST']),
+        Rule('/<cloud>/<resource_type>/upload/<path:public_id>', endpoint='deliver'),
+    ]
+)
+
+
+def json_response(data: Any, status: int = 200) -> Response:
+    """Build a JSON response."""
+    return Response(json.dumps(data), status=status, mimetype='application/json')
+
+
+class ApiError(HTTPException):
+    """Error answered in the Cloudinary API's JSON error format."""
+
+    def __init__(self, code: int, message: str):
+        """Initialize the error with its HTTP status and message."""
+        super().__init__(message)
+        self.code = code
+
+    def get_response(self, environ=None, scope=None) -> Response:
+        """Build the JSON error response."""
+        return json_response({'error': {'message': self.description}}, status=self.code)
+
+
+class CloudinaryStandIn:
+    """In-memory Cloudinary account served over HTTP by a background thread."""
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        """Initialize an empty account.
+
+        Args:
+            latency: Seconds every request is delayed by
+            failure_rate: Fraction of requests answered with HTTP 500
+            seed: Seed of the failure injection, for reproducible runs
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.counts: Counter = Counter()
+        self._random = random.Random(seed)
+        self._fail_next = 0
+        self._resources: Dict[str, Dict[str, Dict[str, Any]]] = {t: {} for t in RESOURCE_TYPES}
+        self._ids: Dict[str, list] = {t: [] for t in RESOURCE_TYPES}
+        self._folders = set()
+        self._uploads: Dict[str, bytearray] = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self.url = None
+
+    def start(self, port: int = 0) -> 'CloudinaryStandIn':
+        """Serve the API on a background thread.
+
+        Args:
+            port: Port to listen on, 0 for any free port
+
+        Returns:
+            The stand-in, whose ``url`` is set to its address
+        """
+        self._server = make_server('127.0.0.1', port, self, threaded=True)
+        self.url = f'http://127.0.0.1:{self._server.server_port}'
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def fail_next(self, count: int = 1):
+        """Answer the next ``count`` requests with HTTP 500."""
+        with self._lock:
+            self._fail_next += count
+
+    def add_resource(self, public_id: str, content: bytes = b'', resource_type: str = 'raw'):
+        """Store a resource directly, without a request (for seeding large accounts)."""
+        with self._lock:
+            self._store(public_id, resource_type, bytes(content))
+
+    def __call__(self, environ, start_response):
+        """Answer a WSGI request."""
+        request = Request(environ)
+        try:
+            endpoint, args = URLS.bind_to_environ(environ).match()
+            self._inject_faults(endpoint)
+            response = getattr(self, f'on_{endpoint}')(request, **args)
+        except HTTPException as e:
+            response = e if isinstance(e, ApiError) else ApiError(e.code, e.description)
+        return response(environ, start_response)
+
+    def _inject_faults(self, endpoint: str):
+        """Count the request, delay it and fail it if a failure is due."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.counts[endpoint] += 1
+            fail = self._fail_next > 0 or self._random.random() < self.failure_rate
+            self._fail_next = max(0, self._fail_next - 1)
+        if fail:
+            raise ApiError(500, 'Injected failure')
+
+    def on_ping(self, request: Request, cloud: str) -> Response:
+        """Answer a health check."""
+        return json_response({'status': 'ok'})
+
+    def on_usage(self, request: Request, cloud: str) -> Response:
+        """Report the bytes stored against the free plan's credits."""
+        with self._lock:
+            resources = [r for by_id in self._resources.values() for r in by_id.values()]
+        return json_response(
+            {
+                'storage': {'usage': sum(r['bytes'] for r in resources)},
+                'credits': {'limit': CREDITS_LIMIT},
+                'resources': len(resources),
+            }
+        )
+
+    def on_root_folders(self, request: Request, cloud: str) -> Response:
+        """List the top-level folders."""
+        return self._folder_listing('')
+
+    def on_folder(self, request: Request, cloud: str, path: str) -> Response:
+        """List, create or delete a folder."""
+        path = path.strip('/')
+        if request.method == 'POST':
+            with self._lock:
+                self._add_folders(path)
+            return json_response({'success': True, 'path': path, 'name': posixpath.basename(path)})
+        if request.method == 'DELETE':
+            return self._delete_folder(path)
+        if path not in self._folders:
+            raise ApiError(404, f"Can't find folder with path {path}")
+        return self._folder_listing(path)
+
+    def on_resources(self, request: Request, cloud: str, resource_type: str, type: str) -> Response:
+        """List resources by prefix, or delete resources by id or prefix."""
+        if request.method == 'DELETE':
+            public_ids = request.args.getlist('public_ids[]')
+            with self._lock:
+                if 'prefix' in request.args:
+                    public_ids = self._matching(resource_type, request.args['prefix'])
+                deleted = {
+                    public_id: (
+                        'deleted' if self._remove(public_id, resource_type) else 'not_found'
+                    )
+                    for public_id in public_ids
+                }
+            return json_response({'deleted': deleted, 'partial': False})
+
+        max_results = min(int(request.args.get('max_results', DEFAULT_MAX_RESULTS)), MAX_RESULTS)
+        offset = int(request.args.get('next_cursor') or 0)
+        next_offset = offset + max_results
+        with self._lock:
+            matching = self._matching(resource_type, request.args.get('prefix', ''))
+            page = [
+                self._resources[resource_type][public_id]
+                for public_id in matching[offset:next_offset]
+            ]
+        result = {'resources': [self._public(r) for r in page]}
+        if next_offset < len(matching):
+            result['next_cursor'] = str(next_offset)
+        return json_response(result)
+
+    def on_resource(
+        self, request: Request, cloud: str, resource_type: str, type: str, public_id: str
+    ) -> Response:
+        """Get the details of a resource."""
+        resource = self._resources[resource_type].get(public_id)
+        if resource is None:
+            raise ApiError(404, f'Resource not found - {public_id}')
+        return json_response(self._public(resource))
+
+    def on_upload(self, request: Request, cloud: str, resource_type: str) -> Response:
+        """Store an uploaded file, assembling the parts of chunked uploads."""
+        if 'api_key' not in request.form or 'file' not in request.files:
+            raise ApiError(400, 'Must supply api_key and file')
+        public_id = request.form.get('public_id') or request.files['file'].filename
+        content = request.files['file'].read()
+
+        content_range = request.headers.get('Content-Range')
+        if content_range:
+            end, total = map(int, content_range.split(' ', 1)[1].split('-', 1)[1].split('/'))
+            upload_id = request.headers.get('X-Unique-Upload-Id', public_id)
+            with self._lock:
+                content = bytes(self._uploads.setdefault(upload_id, bytearray()) + content)
+                if end + 1 < total:
+                    self._uploads[upload_id] = bytearray(content)
+                    return json_response({'public_id': public_id, 'done': False})
+                self._uploads.pop(upload_id, None)
+
+        with self._lock:
+            resource = self._store(public_id, resource_type, content)
+        return json_response(self._public(resource))
+
+    def on_destroy(self, request: Request, cloud: str, resource_type: str) -> Response:
+        """Delete a resource."""
+        with self._lock:
+            removed = self._remove(request.form.get('public_id', ''), resource_type)
+        return json_response({'result': 'ok' if removed else 'not found'})
+
+    def on_deliver(
+        self, request: Request, cloud: str, resource_type: str, public_id: str
+    ) -> Response:
+        """Serve the content of a resource, like the delivery CDN."""
+        resource = self._resources[resource_type].get(public_id)
+        if resource is None:
+            raise NotFound()
+        return Response(resource['content'], mimetype='application/octet-stream')
+
+    def _store(self, public_id: str, resource_type: str, content: bytes) -> Dict[str, Any]:
+        """Store a resource and its folders (the lock must be held)."""
+        if public_id not in self._resources[resource_type]:
+            bisect.insort(self._ids[resource_type], public_id)
+        created_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        url = f'{self.url}/{CLOUD_PLACEHOLDER}/{resource_type}/upload/{public_id}'
+        resource = {
+            'public_id': public_id,
+            'resource_type': resource_type,
+            'type': 'upload',
+            'version': int(time.time()),
+            'format': posixpath.splitext(public_id)[1].lstrip('.'),
+            'bytes': len(content),
+            'etag': hashlib.md5(content).hexdigest(),
+            'created_at': created_at,
+            'url': url,
+            'secure_url': url,
+            'content': content,
+        }
+        self._resources[resource_type][public_id] = resource
+        self._add_folders(posixpath.dirname(public_id))
+        return resource
+
+    def _remove(self, public_id: str, resource_type: str) -> bool:
+        """Remove a resource (the lock must be held)."""
+        if self._resources[resource_type].pop(public_id, None) is None:
+            return False
+        ids = self._ids[resource_type]
+        del ids[bisect.bisect_left(ids, public_id)]
+        return True
+
+    def _matching(self, resource_type: str, prefix: str) -> list:
+        """Get the sorted public ids starting with a prefix (the lock must be held)."""
+        ids = self._ids[resource_type]
+        start = bisect.bisect_left(ids, prefix)
+        end = bisect.bisect_left(ids, f'{prefix}\uffff') if prefix else len(ids)
+        return ids[start:end]
+
+    def _add_folders(self, path: str):
+        """Record a folder and its ancestors (the lock must be held)."""
+        while path:
+            self._folders.add(path)
+            path = posixpath.dirname(path)
+
+    def _delete_folder(self, path: str) -> Response:
+        """Delete an empty folder and its empty subfolders."""
+        with self._lock:
+            if path not in self._folders:
+                raise ApiError(404, f"Can't find folder with path {path}")
+            if any(self._matching(resource_type, f'{path}/') for resource_type in RESOURCE_TYPES):
+                raise ApiError(400, 'Folder is not empty')
+            doomed = {f for f in self._folders if f == path or f.startswith(f'{path}/')}
+            self._folders -= doomed
+        return json_response({'deleted': sorted(doomed)})
+
+    def _folder_listing(self, parent: str) -> Response:
+        """List the direct subfolders of a folder ('' for the root)."""
+        with self._lock:
+            paths = sorted(f for f in self._folders if posixpath.dirname(f) == parent)
+        folders = [{'name': posixpath.basename(p), 'path': p} for p in paths]
+        return json_response({'folders': folders, 'next_cursor': None, 'total_count': len(paths)})
+
+    @staticmethod
+    def _public(resource: Dict[str, Any]) -> Dict[str, Any]:
+        """Get a resource as the API describes it (without its content)."""
+        return {key: value for key, value in resource.items() if key != 'content'}
+
+
+def main(argv: Optional[list] = None):
+    """Serve the stand-in until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per request')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction failing')
+    args = parser.parse_args(argv)
+
+    standin = CloudinaryStandIn(args.latency, args.failure_rate).start(args.port)
+    print(f'Cloudinary stand-in listening on {standin.url}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == '__main__':
+    main()
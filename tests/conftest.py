@@ -1,9 +1,12 @@
 import os
+import shutil
 
+import cloudinary
 from dotenv import load_dotenv
 import pytest
 
 from app import create_app
+from tests.cloudinary_standin import CloudinaryStandIn
 
 
 @pytest.fixture
@@ -21,6 +24,7 @@ def app():
         {
             'TESTING': True,
             'UPLOAD_FOLDER': 'test_uploads',
+            'DATA_FOLDER': 'test_data',
             'CLOUDINARY': {
                 'cloud_name': os.getenv('CLOUDINARY_CLOUD_NAME'),
                 'api_key': os.getenv('CLOUDINARY_API_KEY'),
@@ -34,6 +38,15 @@ def app():
 
     yield app
 
+    # Stop background storage workers
+    app.extensions['search_crawler'].stop()
+    app.extensions['sync_engine'].stop()
+    app.extensions['storage_registry'].shutdown()
+    app.extensions['batch_uploads'].shutdown()
+    app.extensions['async_runner'].close()
+    app.extensions['thumbnails'].shutdown()
+    app.extensions['events'].close()
+
     # Clean up uploads directory after tests
     for root, dirs, files in os.walk(app.config['UPLOAD_FOLDER'], topdown=False):
         for name in files:
@@ -41,6 +54,29 @@ def app():
         for name in dirs:
             os.rmdir(os.path.join(root, name))
     os.rmdir(app.config['UPLOAD_FOLDER'])
+    shutil.rmtree(app.config['DATA_FOLDER'], ignore_errors=True)
+
+
+@pytest.fixture
+def cloudinary_app(app):
+    """Configure fake Cloudinary credentials, for tests that stub the Cloudinary API."""
+    app.config['CLOUDINARY'] = {'cloud_name': 'demo', 'api_key': 'key', 'api_secret': 'secret'}
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def cloudinary_standin(app, monkeypatch):
+    """Serve a local Cloudinary stand-in and point the app's Cloudinary storage at it."""
+    standin = CloudinaryStandIn().start()
+    monkeypatch.setattr(cloudinary.config(), 'upload_prefix', standin.url)
+    registry = app.extensions['storage_registry']
+    registry.reconfigure(
+        CLOUDINARY={'cloud_name': 'demo', 'api_key': 'key', 'api_secret': 'secret'}
+    )
+    registry.check_health(wait=True)
+    yield standin
+    standin.stop()
 
 
 @pytest.fixture
@@ -0,0 +1,11 @@
+"""Readers of the application's metric values, shared by tests that assert on them."""
+
+from app.core.metrics import REGISTRY
+
+
+def count(name: str, *labels) -> float:
+    """Get the value of a counter, or the observation count of a histogram."""
+    value = REGISTRY.get(name).labels(*labels)
+    if hasattr(value, 'snapshot'):
+        return sum(value.snapshot()[0])
+    return value.value
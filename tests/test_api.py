@@ -0,0 +1,102 @@
+from io import BytesIO
+import os
+import threading
+
+from tests.metric_values import count
+
+
+def storage_calls(method: str) -> float:
+    """Count the calls made to a local storage method so far."""
+    return count('storage_operation_seconds', 'local', 'LocalStorage', method)
+
+
+def test_list_items(app, client):
+    """Tests if a listing page is returned with its pagination."""
+    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'docs', 'sub'))
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], 'docs', 'a.txt'), 'wb') as f:
+        f.write(b'hello')
+
+    response = client.get('/api/v1/items?path=docs&per_page=1')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [item['name'] for item in body['items']] == ['sub']
+    assert body['pagination']['total'] == 2
+    assert body['pagination']['next_cursor'] == '1'
+
+
+def test_upload_returns_stored_items(client):
+    """Tests if an upload answers with the listing items of the stored files only."""
+    listings = storage_calls('list_items')
+    data = {'path': 'docs', 'file': [(BytesIO(b'one'), 'one.txt'), (BytesIO(b'x'), '../..')]}
+    response = client.post('/api/v1/upload', data=data, content_type='multipart/form-data')
+
+    assert response.status_code == 207
+    body = response.get_json()
+    assert (body['uploaded'], body['failed']) == (1, 1)
+    assert [(item['path'], item['size']) for item in body['items']] == [('docs/one.txt', 3)]
+    assert storage_calls('list_items') == listings
+
+
+def test_concurrent_uploads_return_their_own_items(app, monkeypatch):
+    """Tests if an upload only answers with its files while another upload runs."""
+    storage = app.extensions['storage_registry'].get('local')
+    upload_file = storage.upload_file
+    waiting, other_done = threading.Event(), threading.Event()
+
+    def upload_after_other(file, path, filename):
+        if filename == 'mine.txt':
+            waiting.set()
+            other_done.wait(5)
+        return upload_file(file, path, filename)
+
+    monkeypatch.setattr(storage, 'upload_file', upload_after_other)
+    responses = {}
+
+    def post(folder, filename):
+        data = {'path': folder, 'file': [(BytesIO(b'data'), filename)]}
+        responses[folder] = app.test_client().post(
+            '/api/v1/upload', data=data, content_type='multipart/form-data'
+        )
+
+    mine = threading.Thread(target=post, args=('mine', 'mine.txt'))
+    mine.start()
+    assert waiting.wait(5)
+    post('other', 'someone_else.txt')
+    other_done.set()
+    mine.join(5)
+
+    for folder, filename in (('mine', 'mine.txt'), ('other', 'someone_else.txt')):
+        items = responses[folder].get_json()['items']
+        assert [item['path'] for item in items] == [f'{folder}/{filename}']
+
+
+def test_create_folder(app, client):
+    """Tests if a created folder is returned as a listing item."""
+    response = client.post('/api/v1/folders', json={'path': 'docs', 'name': 'new folder'})
+    assert response.status_code == 201
+    assert response.get_json()['item'] == dict(
+        response.get_json()['item'], name='new_folder', path='docs/new_folder', is_dir=True
+    )
+    assert os.path.isdir(os.path.join(app.config['UPLOAD_FOLDER'], 'docs', 'new_folder'))
+
+    assert client.post('/api/v1/folders', json={'name': '..'}).status_code == 400
+
+
+def test_delete_costs_one_provider_call(app, client):
+    """Tests if a delete neither lists the folder again nor walks the storage usage."""
+    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'docs'))
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], 'docs', 'a.txt'), 'wb') as f:
+        f.write(b'hello')
+
+    before = {method: storage_calls(method) for method in ('list_items', 'get_storage_usage')}
+    deletes = storage_calls('delete_file')
+    response = client.delete('/api/v1/items', json={'paths': ['docs/a.txt']})
+
+    assert response.get_json() == {'removed': ['docs/a.txt']}
+    assert storage_calls('delete_file') == deletes + 1
+    assert {method: storage_calls(method) for method in before} == before
+    assert not os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], 'docs', 'a.txt'))
+
+    response = client.delete('/api/v1/items', json={'folders': ['docs']})
+    assert response.get_json() == {'removed': ['docs']}
+    assert client.delete('/api/v1/items', json={}).status_code == 400
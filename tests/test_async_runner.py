@@ -0,0 +1,41 @@
+import asyncio
+import os
+import time
+
+from flask import current_app
+
+from app.core.async_runner import AsyncRunner
+
+
+def test_run_keeps_flask_context(app):
+    """Tests if coroutines run on the shared loop see the caller's application context."""
+
+    async def app_name():
+        await asyncio.sleep(0)
+        return current_app.name
+
+    with app.app_context():
+        assert app.extensions['async_runner'].run(app_name()) == app.name
+
+
+def test_blocking_calls_run_concurrently():
+    """Tests if blocking calls handed to worker threads overlap instead of queueing."""
+    runner = AsyncRunner(max_threads=4)
+
+    async def sleep_all():
+        await asyncio.gather(*(asyncio.to_thread(time.sleep, 0.2) for _ in range(4)))
+
+    try:
+        started = time.monotonic()
+        runner.run(sleep_all(), timeout=5)
+        assert time.monotonic() - started < 0.6
+    finally:
+        runner.close()
+
+
+def test_index_lists_items(app, client):
+    """Tests if the index page renders the listing and usage fetched on the shared loop."""
+    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'docs'))
+    response = client.get('/')
+    assert response.status_code == 200
+    assert b'docs' in response.data
@@ -0,0 +1,80 @@
+from io import BytesIO
+import os
+
+from app.modules.file_manager.batch_upload import split_relative_path
+
+
+def test_split_relative_path():
+    """Tests if relative upload names are split into safe folders and file names."""
+    assert split_relative_path('report.pdf') == ('', 'report.pdf')
+    assert split_relative_path('project/src/main.py') == ('project/src', 'main.py')
+    assert split_relative_path('..\\..\\etc/passwd') == ('etc', 'passwd')
+    assert split_relative_path('../') == ('', '')
+
+
+def test_upload_multiple_files_with_folders(app, client):
+    """Tests if one request stores several files, recreating their relative folders."""
+    data = {
+        'path': 'base',
+        'file': [
+            (BytesIO(b'one'), 'one.txt'),
+            (BytesIO(b'two'), 'project/src/two.txt'),
+            (BytesIO(b'three'), 'project/three.txt'),
+        ],
+    }
+    response = client.post(
+        '/upload',
+        data=data,
+        headers={'Accept': 'application/json'},
+        content_type='multipart/form-data',
+    )
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['uploaded'] == 3
+    assert [result['path'] for result in body['results']] == [
+        'base',
+        'base/project/src',
+        'base/project',
+    ]
+
+    root = app.config['UPLOAD_FOLDER']
+    with open(os.path.join(root, 'base', 'project', 'src', 'two.txt'), 'rb') as f:
+        assert f.read() == b'two'
+    assert os.path.isfile(os.path.join(root, 'base', 'one.txt'))
+    assert os.path.isfile(os.path.join(root, 'base', 'project', 'three.txt'))
+
+
+def test_upload_reports_failures_per_file(client):
+    """Tests if invalid files are reported without failing the rest of the batch."""
+    data = {'file': [(BytesIO(b'ok'), 'ok.txt'), (BytesIO(b'bad'), '../..')]}
+    response = client.post(
+        '/upload',
+        data=data,
+        headers={'Accept': 'application/json'},
+        content_type='multipart/form-data',
+    )
+    assert response.status_code == 207
+    results = response.get_json()['results']
+    assert results[0]['success'] is True
+    assert results[1] == dict(results[1], success=False, error='Invalid file name')
+
+
+def test_upload_form_post_redirects(client):
+    """Tests if regular form posts are still redirected back to the listing."""
+    data = {'path': '', 'file': (BytesIO(b'content'), 'page.txt')}
+    response = client.post('/upload', data=data, content_type='multipart/form-data')
+    assert response.status_code == 302
+
+
+def test_bulk_delete_route(app, client):
+    """Tests if selected files and folders are deleted in one request."""
+    data = {'file': [(BytesIO(b'1'), 'a/one.txt'), (BytesIO(b'2'), 'two.txt')]}
+    client.post('/upload', data=data, content_type='multipart/form-data')
+
+    response = client.post(
+        '/delete',
+        data={'path': ['two.txt'], 'folder': ['a']},
+        headers={'Accept': 'application/json'},
+    )
+    assert response.get_json() == {'success': True, 'error': None}
+    assert os.listdir(app.config['UPLOAD_FOLDER']) == []
@@ -0,0 +1,104 @@
+import hashlib
+import os
+
+import pytest
+
+from app.modules.file_manager.storage import LocalStorage
+
+
+@pytest.fixture
+def uploads(app):
+    """Use tiny chunks so tests can exercise multi-part uploads."""
+    manager = app.extensions['chunked_uploads']
+    manager.chunk_size = 4
+    return manager
+
+
+def start_upload(client, size: int, filename: str = 'big.bin', path: str = '') -> dict:
+    """Start a chunked upload session and return its manifest."""
+    response = client.post(
+        '/upload/chunked', json={'path': path, 'filename': filename, 'size': size}
+    )
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def test_chunked_upload_assembles_file(app, client, uploads):
+    """Tests if parts sent out of order are assembled into the final file."""
+    content = b'0123456789'
+    session = start_upload(client, len(content), path='docs')
+    assert session['chunks'] == 3
+
+    for index in (2, 0, 1):
+        start, end = index * 4, index * 4 + 4
+        response = client.put(f"/upload/chunked/{session['id']}/{index}", data=content[start:end])
+        assert response.status_code == 200
+
+    response = client.post(f"/upload/chunked/{session['id']}/complete")
+    assert response.status_code == 200
+    assert [item['path'] for item in response.get_json()['items']] == ['docs/big.bin']
+
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], 'docs', 'big.bin'), 'rb') as f:
+        assert f.read() == content
+    assert not os.path.exists(os.path.join(uploads.root, session['id']))
+
+
+def test_chunked_upload_rejects_bad_parts(client, uploads):
+    """Tests if wrong-sized parts, bad indexes and early commits are rejected."""
+    session = start_upload(client, 6)
+    url = f"/upload/chunked/{session['id']}"
+
+    assert client.put(f'{url}/0', data=b'123').status_code == 400
+    assert client.put(f'{url}/5', data=b'1234').status_code == 400
+    assert client.put(f'{url}/0', data=b'1234').status_code == 200
+    assert client.post(f'{url}/complete').status_code == 409
+
+
+def test_chunked_upload_unknown_session(client, uploads):
+    """Tests if unknown or malformed session ids are reported as not found."""
+    assert client.put('/upload/chunked/../../etc/0', data=b'x').status_code == 404
+    assert client.post(f"/upload/chunked/{'0' * 32}/complete").status_code == 404
+
+
+def test_chunked_upload_resumes_with_checksums(client, uploads):
+    """Tests if status reports held ranges and corrupted parts are rejected."""
+    content = b'abcdefghij'
+    session = start_upload(client, len(content))
+    url = f"/upload/chunked/{session['id']}"
+
+    def put(index: int, data: bytes, checksum: str):
+        return client.put(f'{url}/{index}', data=data, headers={'X-Chunk-SHA256': checksum})
+
+    assert put(0, b'abcd', hashlib.sha256(b'abcd').hexdigest()).status_code == 200
+    assert put(1, b'eXgh', hashlib.sha256(b'efgh').hexdigest()).status_code == 422
+
+    status = client.get(url).get_json()
+    assert status['received'] == [0]
+    assert status['missing'] == [1, 2]
+    assert status['ranges'] == [[0, 4]]
+
+    assert put(2, b'ij', hashlib.sha256(b'ij').hexdigest()).status_code == 200
+    assert put(1, b'efgh', hashlib.sha256(b'efgh').hexdigest()).status_code == 200
+
+    status = client.get(url).get_json()
+    assert status['ranges'] == [[0, 10]]
+    assert status['bytes_received'] == 10
+    assert client.post(f'{url}/complete').status_code == 200
+
+
+def test_failed_commit_keeps_session(app, client, uploads, monkeypatch):
+    """Tests if a commit the storage fails can be retried without sending the parts again."""
+    session = start_upload(client, 4)
+    url = f"/upload/chunked/{session['id']}"
+    assert client.put(f'{url}/0', data=b'abcd').status_code == 200
+
+    monkeypatch.setattr(LocalStorage, 'commit_upload', lambda *args: (False, 'Disk full'))
+    response = client.post(f'{url}/complete')
+    assert response.status_code == 500
+    assert response.get_json()['upload_id'] == session['id']
+    assert client.get(url).get_json()['missing'] == []
+
+    monkeypatch.undo()
+    assert client.post(f'{url}/complete').status_code == 200
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], 'big.bin'), 'rb') as f:
+        assert f.read() == b'abcd'
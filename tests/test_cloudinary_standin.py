@@ -0,0 +1,78 @@
+from io import BytesIO
+import time
+
+from werkzeug.datastructures import FileStorage
+
+
+def upload(storage, path: str, filename: str, content: bytes):
+    """Upload a file through a storage provider."""
+    file = FileStorage(stream=BytesIO(content), filename=filename)
+    return storage.upload_file(file, path, filename)
+
+
+def test_storage_round_trip(app, cloudinary_standin):
+    """Tests uploads, listings, usage, reads and deletes against the stand-in."""
+    storage = app.extensions['storage_registry'].get('cloudinary')
+    with app.test_request_context():
+        assert storage.create_folder('docs') == (True, None)
+        assert upload(storage, 'docs', 'a.txt', b'hello') == (True, None)
+        assert upload(storage, 'docs/sub', 'b.jpg', b'image') == (True, None)
+
+        listing = storage.list_items('docs')
+        assert [(item['name'], item['is_dir']) for item in listing['items']] == [
+            ('sub', True),
+            ('a.txt', False),
+        ]
+        assert storage.get_storage_usage()['used'] == 10
+        files = {item['path']: item for item in storage.walk_files('docs')}
+        assert sorted(files) == ['docs/a.txt', 'docs/sub/b.jpg']
+        with storage.open_file(files['docs/a.txt']) as f:
+            assert f.read() == b'hello'
+        assert storage.get_resource('docs/a.txt')['size'] == 5
+
+        assert storage.delete_items(folders=['docs']) == (True, None)
+        assert storage.list_items('')['items'] == []
+
+
+def test_chunked_uploads_are_assembled(app, cloudinary_standin, tmp_path):
+    """Tests if ``upload_large`` parts are assembled into one resource."""
+    source = tmp_path / 'big.bin'
+    source.write_bytes(b'x' * 1000)
+    storage = app.extensions['storage_registry'].get('cloudinary')
+    with app.test_request_context():
+        assert storage.commit_upload(str(source), '', 'big.bin') == (True, None)
+        assert storage.get_resource('big.bin')['size'] == 1000
+    assert cloudinary_standin.counts['upload'] == 1
+
+
+def test_listings_are_paginated(app, cloudinary_standin):
+    """Tests if resource listings follow cursors across pages."""
+    for i in range(25):
+        cloudinary_standin.add_resource(f'many/{i:02}.txt', b'.')
+    storage = app.extensions['storage_registry'].get('cloudinary')
+    with app.test_request_context():
+        page = storage.list_items('many', limit=10)
+        assert [item['name'] for item in page['items']][:2] == ['00.txt', '01.txt']
+        names = [item['name'] for item in storage.list_items('many')['items']]
+    assert len(names) == 25
+    assert len(set(names)) == 25
+
+
+def test_failures_and_latency_are_injected(app, cloudinary_standin):
+    """Tests if injected failures surface as errors and latency delays every request."""
+    storage = app.extensions['storage_registry'].get('cloudinary')
+    with app.test_request_context():
+        cloudinary_standin.fail_next()
+        success, error = upload(storage, '', 'a.txt', b'a')
+        assert not success
+        assert 'Injected failure' in error
+
+        cloudinary_standin.latency = 0.05
+        started = time.monotonic()
+        assert upload(storage, '', 'a.txt', b'a') == (True, None)
+        assert time.monotonic() - started >= 0.05
+
+        cloudinary_standin.failure_rate = 1.0
+        status = storage.status_checker.check_status()
+    assert status['error']
+    assert 'Injected failure' in status['error_message']
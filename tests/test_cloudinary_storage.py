@@ -0,0 +1,147 @@
+import asyncio
+import threading
+
+import cloudinary.api
+import httpx
+import pytest
+
+from app.modules.file_manager.storage import CloudinaryStorage
+
+
+def make_resource(public_id: str, size: int = 1) -> dict:
+    """Build a resource as returned by the Cloudinary Admin API."""
+    return {'public_id': public_id, 'bytes': size, 'created_at': '2024-01-31T12:00:00Z'}
+
+
+@pytest.fixture
+def storage(cloudinary_app, monkeypatch):
+    """Create an online Cloudinary provider with a stubbed Admin API."""
+    monkeypatch.setattr(cloudinary.api, 'ping', lambda: None)
+    monkeypatch.setattr(cloudinary.api, 'root_folders', lambda **kw: {'folders': [{'path': 'f'}]})
+    provider = CloudinaryStorage()
+    provider.status_checker.check_status()
+    yield provider
+    provider.close()
+
+
+def test_list_items_merges_resource_types(storage, monkeypatch):
+    """Tests if image, video and raw listings are fetched concurrently and merged."""
+    barrier = threading.Barrier(3, timeout=5)
+    pages = {
+        'image': [make_resource('photo.jpg', 3)],
+        'video': [make_resource('clip.mp4', 2)],
+        'raw': [make_resource('notes.txt'), make_resource('f/nested.txt')],
+    }
+
+    def resources(resource_type, **options):
+        barrier.wait()  # fails unless all three listings are in flight together
+        assert options['type'] == 'upload'
+        return {'resources': pages[resource_type]}
+
+    monkeypatch.setattr(cloudinary.api, 'resources', resources)
+
+    page = storage.list_items('', sort_by='size', reverse=True)
+    assert [item['name'] for item in page['items']] == ['f', 'photo.jpg', 'clip.mp4', 'notes.txt']
+    assert page['items'][1]['resource_type'] == 'image'
+    assert page['next_cursor'] is None
+
+
+def test_list_items_follows_cursors(storage, monkeypatch):
+    """Tests if next_cursor pages through resources beyond the first page."""
+    raw_pages = {None: (['a.txt', 'b.txt'], 'raw-2'), 'raw-2': (['c.txt'], None)}
+
+    def resources(resource_type, next_cursor=None, **options):
+        if resource_type != 'raw':
+            return {'resources': []}
+        names, following = raw_pages[next_cursor]
+        return {'resources': [make_resource(name) for name in names], 'next_cursor': following}
+
+    monkeypatch.setattr(cloudinary.api, 'resources', resources)
+
+    first = storage.list_items('', limit=2)
+    assert [item['name'] for item in first['items']] == ['f', 'a.txt', 'b.txt']
+    assert first['next_cursor']
+
+    second = storage.list_items('', limit=2, cursor=first['next_cursor'])
+    assert [item['name'] for item in second['items']] == ['c.txt']
+    assert second['next_cursor'] is None
+
+    everything = storage.list_items('')
+    assert len(everything['items']) == 4
+
+
+def test_delete_items_uses_bulk_calls(storage, monkeypatch):
+    """Tests if resources are deleted in batches and folders by prefix."""
+    calls = []
+
+    def delete_resources(public_ids, resource_type):
+        calls.append(('ids', resource_type, len(public_ids)))
+
+    def delete_resources_by_prefix(prefix, resource_type, next_cursor=None):
+        calls.append(('prefix', resource_type, prefix, next_cursor))
+        if resource_type == 'raw' and next_cursor is None:
+            return {'partial': True, 'next_cursor': 'more'}
+        return {'partial': False}
+
+    monkeypatch.setattr(cloudinary.api, 'delete_resources', delete_resources)
+    monkeypatch.setattr(cloudinary.api, 'delete_resources_by_prefix', delete_resources_by_prefix)
+    monkeypatch.setattr(
+        cloudinary.api, 'delete_folder', lambda path: calls.append(('folder', path))
+    )
+
+    paths = [f'docs/{index}.txt' for index in range(250)] + ['photo.jpg']
+    assert storage.delete_items(paths, folders=['old/']) == (True, None)
+
+    assert sorted(call for call in calls if call[0] == 'ids') == [
+        ('ids', 'image', 1),
+        ('ids', 'raw', 50),
+        ('ids', 'raw', 100),
+        ('ids', 'raw', 100),
+    ]
+    assert [call for call in calls if call[0] == 'prefix'] == [
+        ('prefix', 'image', 'old/', None),
+        ('prefix', 'video', 'old/', None),
+        ('prefix', 'raw', 'old/', None),
+        ('prefix', 'raw', 'old/', 'more'),
+    ]
+    assert calls[-1] == ('folder', 'old')
+
+
+def test_async_listing_uses_pooled_client(storage, monkeypatch):
+    """Tests if the async listing fetches folders and resource types over httpx."""
+    from app.modules.file_manager.storage import cloudinary_async
+
+    def handler(request):
+        if request.url.path.endswith('/folders'):
+            return httpx.Response(200, json={'folders': [{'path': 'f'}]})
+        if request.url.path.endswith('/usage'):
+            return httpx.Response(200, json={'storage': {'usage': 5}, 'plan': 'Free'})
+        resource_type = request.url.path.split('/')[-2]
+        return httpx.Response(200, json={'resources': [make_resource(f'{resource_type}.bin')]})
+
+    monkeypatch.setattr(
+        cloudinary_async,
+        'create_async_client',
+        lambda: cloudinary_async.AsyncCloudinaryClient(
+            httpx.AsyncClient(
+                base_url='https://api.test/v1_1/demo/', transport=httpx.MockTransport(handler)
+            )
+        ),
+    )
+
+    async def list_and_usage():
+        return await asyncio.gather(storage.list_items_async(''), storage.get_storage_usage_async())
+
+    page, usage = asyncio.run(list_and_usage())
+    assert [item['name'] for item in page['items']] == ['f', 'image.bin', 'raw.bin', 'video.bin']
+    assert usage['used'] == 5
+
+
+def test_thumbnail_url_is_a_derived_image(storage, monkeypatch):
+    """Tests if images get a resized derived URL and other files none."""
+    monkeypatch.setattr(cloudinary.config(), 'cloud_name', 'demo')
+    url = storage.get_thumbnail_url('pics/photo.png', 128)
+    assert url.startswith('https://res.cloudinary.com/demo/image/upload/')
+    assert 'c_limit,h_128,q_auto,w_128' in url
+    assert url.endswith('/pics/photo.png.jpg')
+    assert storage.get_thumbnail_url('docs/notes.txt', 128) is None
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def stored_file(app):
+    """Write a file straight into local storage and return its content."""
+    content = b'0123456789abcdef'
+    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'docs'), exist_ok=True)
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], 'docs', 'data.bin'), 'wb') as f:
+        f.write(content)
+    return content
+
+
+def test_download_streams_local_file(client, stored_file):
+    """Tests if local files are sent as attachments with validators."""
+    response = client.get('/download/docs/data.bin')
+    assert response.status_code == 200
+    assert response.data == stored_file
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert 'attachment' in response.headers['Content-Disposition']
+    assert response.headers['ETag'].startswith('"')
+    assert 'Last-Modified' in response.headers
+
+
+def test_download_range_and_conditional_requests(client, stored_file):
+    """Tests if byte ranges return partial content and matching validators return 304."""
+    response = client.get('/download/docs/data.bin', headers={'Range': 'bytes=4-7'})
+    assert response.status_code == 206
+    assert response.data == stored_file[4:8]
+    assert response.headers['Content-Range'] == f'bytes 4-7/{len(stored_file)}'
+
+    etag = client.get('/download/docs/data.bin').headers['ETag']
+    response = client.get('/download/docs/data.bin', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    response = client.get(
+        '/download/docs/data.bin', headers={'Range': 'bytes=0-3', 'If-Range': '"stale"'}
+    )
+    assert response.status_code == 200
+    assert response.data == stored_file
+
+
+def test_download_offload_headers(app, client, stored_file):
+    """Tests if downloads can be handed to a front proxy."""
+    app.config['DOWNLOAD_OFFLOAD'] = 'x-accel-redirect'
+    response = client.get('/download/docs/data.bin')
+    assert response.headers['X-Accel-Redirect'] == '/protected-uploads/docs/data.bin'
+    assert response.data == b''
+
+    app.config['DOWNLOAD_OFFLOAD'] = 'x-sendfile'
+    response = client.get('/download/docs/data.bin')
+    assert response.headers['X-Sendfile'].endswith(os.path.join('docs', 'data.bin'))
+
+
+def test_download_rejects_missing_and_outside_paths(client, stored_file):
+    """Tests if missing files and paths escaping the storage root are not served."""
+    assert client.get('/download/docs/missing.bin').status_code == 302
+    assert client.get('/download/../requirements.txt').status_code in (302, 404)
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from app.modules.file_manager.events import EventHub
+from app.modules.file_manager.events import format_event
+
+
+@pytest.fixture
+def stream(client):
+    """Open the event stream and get an iterator of its decoded events."""
+    response = client.get('/api/v1/events', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = (chunk.decode() for chunk in response.response)
+    assert next(chunks) == 'retry: 3000\n\n'
+    yield (parse(chunk) for chunk in chunks)
+    response.close()
+
+
+def parse(chunk: str) -> dict:
+    """Parse one text/event-stream message."""
+    fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+    return {'id': fields['id'], 'type': fields['event'], 'data': json.loads(fields['data'])}
+
+
+def test_hub_replays_missed_events():
+    """Tests replays after Last-Event-ID, and resyncs for unknown ids and slow readers."""
+    hub = EventHub(history_size=3, queue_size=2)
+    first = hub.publish('stored', {'n': 1})
+    hub.publish('stored', {'n': 2})
+
+    replayed = hub.subscribe(first['id'])
+    assert replayed.get(0)['data'] == {'n': 2}
+    assert hub.subscribe('unknown-1').get(0)['type'] == 'resync'
+
+    for n in range(3):
+        hub.publish('stored', {'n': n})
+    assert replayed.get(0)['type'] == 'resync'
+    assert replayed.get(0) is None
+    assert format_event(first) == f"id: {first['id']}\nevent: stored\ndata: {{\"n\":1}}\n\n"
+
+    hub.unsubscribe(replayed)
+    assert hub.subscriber_count() == 1
+    hub.close()
+    assert hub.subscriber_count() == 0
+
+
+def test_stream_pushes_storage_changes(app, client, stream):
+    """Tests if folders created and items deleted through the API reach open streams."""
+    client.post('/api/v1/folders', json={'name': 'docs'})
+    event = next(stream)
+    assert event['type'] == 'stored'
+    assert event['data']['storage'] == 'local'
+    assert [item['path'] for item in event['data']['items']] == ['docs']
+
+    client.delete('/api/v1/items', json={'folders': ['docs']})
+    event = next(stream)
+    assert (event['type'], event['data']['paths']) == ('removed', ['docs'])
+
+    hub = app.extensions['events']
+    assert hub.subscribe(event['id']).get(0) is None
+
+
+def test_stream_pushes_upload_progress(app, client, stream):
+    """Tests if every part of a chunked upload is reported with the bytes received."""
+    app.extensions['chunked_uploads'].chunk_size = 4
+    response = client.post('/upload/chunked', json={'filename': 'big.bin', 'size': 6})
+    url = f"/upload/chunked/{response.get_json()['id']}"
+
+    client.put(f'{url}/1', data=b'56')
+    client.put(f'{url}/0', data=b'1234')
+    progress = [next(stream)['data'] for _ in range(2)]
+    assert [(data['bytes_received'], data['size']) for data in progress] == [(2, 6), (6, 6)]
+    assert progress[0]['filename'] == 'big.bin'
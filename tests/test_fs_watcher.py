@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+from app.modules.file_manager.storage import LocalStorage
+from app.modules.file_manager.storage.directory_tree import DirectoryTree
+from app.modules.file_manager.storage.fs_watcher import InotifyWatcher
+from app.modules.file_manager.storage.fs_watcher import load_inotify
+from app.modules.file_manager.storage.fs_watcher import PollingWatcher
+
+
+def write(path, content: bytes):
+    """Write a file, creating its folders, as an outside program would."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def wait_for(condition, timeout: float = 5):
+    """Wait until a condition holds, failing the test after the timeout."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def names(items):
+    """Get the sorted names of listing items."""
+    return sorted(item['name'] for item in items)
+
+
+def test_tree_keeps_folder_totals(tmp_path):
+    """Tests listings and per-folder usage of the mirror, and refreshes of changed paths."""
+    write(tmp_path / 'a' / 'one.txt', b'1' * 10)
+    write(tmp_path / 'a' / 'b' / 'two.txt', b'2' * 5)
+    tree = DirectoryTree(str(tmp_path))
+    assert tree.list_items('') is None
+
+    tree.rebuild()
+    assert names(tree.list_items('a')) == ['b', 'one.txt']
+    assert (tree.used(''), tree.used('a/b'), tree.used('missing')) == (15, 5, None)
+
+    write(tmp_path / 'a' / 'b' / 'c' / 'three.txt', b'3' * 7)
+    tree.refresh('a/b/c/three.txt')
+    assert (tree.used(''), tree.used('a/b/c')) == (22, 7)
+
+    os.remove(tmp_path / 'a' / 'one.txt')
+    tree.refresh('a/one.txt')
+    assert names(tree.list_items('a')) == ['b']
+    assert tree.used('a') == 12
+    assert tree.list_items('../') is None
+
+
+@pytest.mark.skipif(load_inotify() is None, reason='inotify is not available')
+def test_local_storage_follows_outside_changes(app, tmp_path):
+    """Tests if listings and usage follow files written and removed outside the app."""
+    storage = LocalStorage(str(tmp_path), watch_interval=60)
+    assert isinstance(storage.watcher, InotifyWatcher)
+    wait_for(storage.watcher.ready.is_set)
+    try:
+        with app.app_context():
+            write(tmp_path / 'docs' / 'a.txt', b'hello')
+            wait_for(lambda: storage.get_storage_usage()['used'] == 5)
+            assert names(storage.list_items('docs')['items']) == ['a.txt']
+
+            os.rename(tmp_path / 'docs', tmp_path / 'moved')
+            wait_for(lambda: names(storage.list_items('')['items']) == ['moved'])
+            write(tmp_path / 'moved' / 'b.txt', b'!')
+            wait_for(lambda: storage.get_storage_usage()['used'] == 6)
+
+            # Changes made through the storage are mirrored without waiting for events
+            assert storage.delete_file('moved/a.txt') == (True, None)
+            assert names(storage.list_items('moved')['items']) == ['b.txt']
+    finally:
+        storage.close()
+
+
+def test_polling_fallback(tmp_path):
+    """Tests the polling watcher, and the fallback to it when inotify cannot be used."""
+
+    class BrokenInotify:
+        """C library whose inotify calls fail."""
+
+        def inotify_init1(self, flags):
+            """Fail like a system out of inotify instances."""
+            return -1
+
+    watcher = InotifyWatcher(str(tmp_path), 0.01, BrokenInotify())
+    watcher.start()
+    try:
+        wait_for(watcher.ready.is_set)
+        write(tmp_path / 'new.txt', b'abc')
+        wait_for(lambda: watcher.used() == 3)
+        assert names(watcher.list_items('')) == ['new.txt']
+    finally:
+        watcher.stop()
+
+    assert PollingWatcher(str(tmp_path), 1).list_items('') is None
@@ -0,0 +1,72 @@
+import cloudinary.api
+
+from app.modules.file_manager.storage.cloudinary_status import CloudinaryStatus
+from app.modules.file_manager.storage.health import CircuitBreaker
+
+
+def test_breaker_opens_after_threshold():
+    """Tests if the breaker opens after consecutive failures and rejects calls."""
+    breaker = CircuitBreaker(failure_threshold=2, backoff_base=60, backoff_max=60)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert 30 <= breaker.retry_after() <= 60
+
+
+def test_breaker_half_open_probe():
+    """Tests if an open breaker lets a probe through after the backoff delay."""
+    breaker = CircuitBreaker(failure_threshold=1, backoff_base=0, backoff_max=0)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_status_is_cached(cloudinary_app, monkeypatch):
+    """Tests if reading the status never pings Cloudinary."""
+    calls = []
+    monkeypatch.setattr(cloudinary.api, 'ping', lambda: calls.append(1))
+
+    checker = CloudinaryStatus()
+    assert checker.should_refresh()
+    assert checker.check_status()['online']
+    assert not checker.should_refresh()
+
+    for _ in range(5):
+        assert checker.get_status()['online']
+    assert len(calls) == 1
+
+
+def test_status_goes_offline_when_circuit_opens(cloudinary_app, monkeypatch):
+    """Tests if repeated ping failures open the circuit and stop further pings."""
+    calls = []
+
+    def failing_ping():
+        calls.append(1)
+        raise Exception('timeout')
+
+    monkeypatch.setattr(cloudinary.api, 'ping', lambda: None)
+    checker = CloudinaryStatus()
+    checker.check_status()
+
+    monkeypatch.setattr(cloudinary.api, 'ping', failing_ping)
+    for _ in range(checker.breaker.failure_threshold):
+        status = checker.check_status()
+
+    assert status['state'] == CircuitBreaker.OPEN
+    assert not status['online']
+    assert status['error_message'] == 'timeout'
+
+    checker.check_status()
+    assert len(calls) == checker.breaker.failure_threshold
@@ -0,0 +1,133 @@
+from io import BytesIO
+import os
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app.modules.file_manager.storage import LocalStorage
+
+
+@pytest.fixture
+def storage(app, tmp_path):
+    """Create a local storage provider with a usage ledger in a temporary folder."""
+    with app.app_context():
+        yield LocalStorage(str(tmp_path / 'files'), str(tmp_path / 'data'))
+
+
+def make_file(content: bytes, filename: str = 'file.txt') -> FileStorage:
+    """Build an uploaded file object with the given content."""
+    return FileStorage(stream=BytesIO(content), filename=filename)
+
+
+def test_usage_ledger_tracks_writes(storage):
+    """Tests if uploads, overwrites, folders and deletes update the usage ledger."""
+    os.makedirs(storage.base_path)
+    assert storage.get_storage_usage()['used'] == 0
+
+    storage.upload_file(make_file(b'12345'), '', 'a.txt')
+    storage.upload_file(make_file(b'123'), 'docs', 'b.txt')
+    assert storage.get_storage_usage()['used'] == 8
+
+    storage.upload_file(make_file(b'1'), '', 'a.txt')
+    assert storage.get_storage_usage()['used'] == 4
+
+    storage.create_folder('x/y')
+    storage.delete_file('docs/b.txt')
+    usage = storage.ledger.usage()
+    assert usage['used'] == 1
+    assert usage['files'] == 1
+    assert usage['folders'] == 3
+
+
+def test_usage_ledger_reconciles_external_changes(storage):
+    """Tests if reconciliation picks up files written outside the application."""
+    storage.create_folder('')
+    storage.get_storage_usage()
+
+    with open(os.path.join(storage.base_path, 'external.bin'), 'wb') as f:
+        f.write(b'x' * 10)
+    assert storage.get_storage_usage()['used'] == 0
+
+    storage.reconcile_usage()
+    assert storage.get_storage_usage()['used'] == 10
+
+
+def test_list_items_sorts_and_paginates(storage):
+    """Tests if listings keep folders first, sort, and page with a cursor."""
+    storage.create_folder('zeta')
+    for name, content in (('b.txt', b'22'), ('a.txt', b'333'), ('c.txt', b'1')):
+        storage.upload_file(make_file(content), '', name)
+
+    page = storage.list_items('', limit=2)
+    assert [item['name'] for item in page['items']] == ['zeta', 'a.txt']
+    assert page['total'] == 4
+    assert page['next_cursor'] == '2'
+
+    page = storage.list_items('', limit=2, cursor=page['next_cursor'])
+    assert [item['name'] for item in page['items']] == ['b.txt', 'c.txt']
+    assert page['next_cursor'] is None
+
+    page = storage.list_items('', sort_by='size', reverse=True)
+    assert [item['name'] for item in page['items']] == ['zeta', 'a.txt', 'b.txt', 'c.txt']
+    assert page['items'][1]['size'] == 3
+
+
+@pytest.fixture
+def dedup_storage(app, tmp_path):
+    """Create a local storage provider that deduplicates file contents."""
+    with app.app_context():
+        yield LocalStorage(str(tmp_path / 'files'), str(tmp_path / 'data'), dedup=True)
+
+
+def test_dedup_links_identical_uploads(dedup_storage):
+    """Tests if identical uploads share one blob that is collected after the last delete."""
+    storage = dedup_storage
+    storage.upload_file(make_file(b'same content'), 'a', 'x.bin')
+    storage.upload_file(make_file(b'same content'), 'b', 'y.bin')
+
+    first = os.path.join(storage.base_path, 'a', 'x.bin')
+    second = os.path.join(storage.base_path, 'b', 'y.bin')
+    assert os.path.samefile(first, second)
+    blob = storage.blobs.blob_path(storage.blobs.digest_of(first))
+    assert os.stat(blob).st_nlink == 3
+
+    storage.delete_file('a/x.bin')
+    assert os.path.exists(blob)
+    storage.delete_file('b/y.bin')
+    assert not os.path.exists(blob)
+
+
+def test_dedup_overwrite_and_commit(dedup_storage, tmp_path):
+    """Tests if overwrites release the old blob and committed files join the store."""
+    storage = dedup_storage
+    storage.upload_file(make_file(b'old'), '', 'f.txt')
+    old_blob = storage.blobs.blob_path(storage.blobs.digest_of(f'{storage.base_path}/f.txt'))
+
+    source = tmp_path / 'assembled'
+    source.write_bytes(b'new')
+    storage.commit_upload(str(source), '', 'f.txt')
+    assert not source.exists()
+    assert not os.path.exists(old_blob)
+
+    with open(os.path.join(storage.base_path, 'f.txt'), 'rb') as f:
+        assert f.read() == b'new'
+    assert storage.get_storage_usage()['used'] == 3
+
+
+def test_delete_folder_tree(storage):
+    """Tests if folders are deleted with their contents and the ledger follows."""
+    storage.upload_file(make_file(b'12345'), 'docs/a', 'x.txt')
+    storage.upload_file(make_file(b'123'), 'docs', 'y.txt')
+    storage.upload_file(make_file(b'1'), '', 'keep.txt')
+    assert storage.get_storage_usage()['used'] == 9
+
+    assert storage.delete_file('docs') == (True, None)
+    assert not os.path.exists(os.path.join(storage.base_path, 'docs'))
+    usage = storage.ledger.usage()
+    assert (usage['used'], usage['files'], usage['folders']) == (1, 1, 0)
+
+    success, error = storage.delete_items(['keep.txt', '../outside', ''])
+    assert not success
+    assert 'Invalid path' in error
+    assert not os.path.exists(os.path.join(storage.base_path, 'keep.txt'))
+    assert os.path.isdir(storage.base_path)
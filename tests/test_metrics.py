@@ -0,0 +1,88 @@
+from io import BytesIO
+import os
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app.core.metrics import Metric
+from app.core.metrics import MetricsRegistry
+from tests.metric_values import count
+
+
+def test_text_format():
+    """Tests the exposition of counters and histograms, with escaped label values."""
+    registry = MetricsRegistry()
+    counter = registry.counter('jobs_total', 'Jobs run', ('queue',))
+    counter.labels('a"b').inc(2)
+    histogram = registry.histogram('job_seconds', 'Job time', buckets=(0.1, 1.0))
+    histogram.labels().observe(0.5)
+    histogram.labels().observe(5)
+    assert registry.counter('jobs_total', 'Jobs run', ('queue',)) is counter
+
+    assert registry.render().splitlines() == [
+        '# HELP jobs_total Jobs run',
+        '# TYPE jobs_total counter',
+        'jobs_total{queue="a\\"b"} 2.0',
+        '# HELP job_seconds Job time',
+        '# TYPE job_seconds histogram',
+        'job_seconds_bucket{le="0.1"} 0',
+        'job_seconds_bucket{le="1.0"} 1',
+        'job_seconds_bucket{le="+Inf"} 2',
+        'job_seconds_sum 5.5',
+        'job_seconds_count 2',
+    ]
+
+    with pytest.raises(TypeError):
+        type('Gauge', (Metric,), {})('gauge', 'Incomplete metric type')
+
+
+def test_requests_and_storage_calls_are_measured(app, client):
+    """Tests route latency, response bytes and storage method timers, and /metrics."""
+    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'docs'))
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], 'docs', 'a.txt'), 'wb') as f:
+        f.write(b'0123456789')
+
+    requests = count('http_request_duration_seconds', 'GET', 'file_manager.index', 200)
+    listings = count('storage_operation_seconds', 'local', 'LocalStorage', 'list_items')
+    sent = count('http_response_bytes_total', 'file_manager.download_file')
+    assert client.get('/?path=docs').status_code == 200
+    assert client.get('/download/docs/a.txt').data == b'0123456789'
+
+    assert count('http_request_duration_seconds', 'GET', 'file_manager.index', 200) == (
+        requests + 1
+    )
+    assert count('storage_operation_seconds', 'local', 'LocalStorage', 'list_items') > listings
+    assert count('http_response_bytes_total', 'file_manager.download_file') == sent + 10
+
+    response = client.get('/metrics')
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",endpoint="file_manager.index",'
+        'status="200",le="+Inf"}'
+    ) in response.get_data(as_text=True)
+
+
+def test_cloudinary_calls_and_cache_lookups_are_counted(app, cloudinary_standin):
+    """Tests Cloudinary API call and error counts and metadata cache hits."""
+    storage = app.extensions['storage_registry'].get('cloudinary')
+    uploads = count('cloudinary_api_call_seconds', 'upload', 'upload')
+    errors = count('cloudinary_api_errors_total', 'upload', 'upload')
+    errors_reported = count(
+        'storage_operation_errors_total', 'cloudinary', 'CloudinaryStorage', 'upload_file'
+    )
+    hits = count('storage_cache_requests_total', 'cloudinary', 'hit')
+
+    with app.test_request_context():
+        cloudinary_standin.fail_next()
+        file = FileStorage(stream=BytesIO(b'a'), filename='a.txt')
+        assert not storage.upload_file(file, '', 'a.txt')[0]
+        storage.list_items('')
+        storage.list_items('')
+
+    assert count('cloudinary_api_call_seconds', 'upload', 'upload') == uploads + 1
+    assert count('cloudinary_api_errors_total', 'upload', 'upload') == errors + 1
+    assert (
+        count('storage_operation_errors_total', 'cloudinary', 'CloudinaryStorage', 'upload_file')
+        == errors_reported + 1
+    )
+    assert count('storage_cache_requests_total', 'cloudinary', 'hit') == hits + 1
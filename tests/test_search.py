@@ -0,0 +1,99 @@
+from io import BytesIO
+import os
+
+import pytest
+
+from app.modules.file_manager.search import SearchIndex
+from app.modules.file_manager.storage import LocalStorage
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Create an empty search index."""
+    return SearchIndex(str(tmp_path / 'search.db'))
+
+
+def file_item(path: str, size: int = 1) -> dict:
+    """Build a file listing item."""
+    return {'name': os.path.basename(path), 'is_dir': False, 'size': size, 'path': path}
+
+
+def names(results) -> list:
+    """Get the paths of search results."""
+    return [item['path'] for item in results]
+
+
+def test_search_filters(index):
+    """Tests substring, prefix, extension and folder filters."""
+    index.add(
+        'local',
+        [
+            file_item('docs/Report 2024.pdf'),
+            file_item('docs/sub/report-draft.txt'),
+            file_item('pics/beach_report.jpg'),
+            file_item('pics/100%.png'),
+        ],
+    )
+    index.add('cloudinary', [file_item('report.pdf')])
+
+    assert names(index.search('local', 'REPORT')) == [
+        'pics/beach_report.jpg',
+        'docs/Report 2024.pdf',
+        'docs/sub/report-draft.txt',
+    ]
+    assert names(index.search('local', 'rep', mode='prefix')) == [
+        'docs/Report 2024.pdf',
+        'docs/sub/report-draft.txt',
+    ]
+    assert names(index.search('local', 'report', extension='JPG')) == ['pics/beach_report.jpg']
+    assert names(index.search('local', 'report', folder='docs/sub')) == [
+        'docs/sub/report-draft.txt'
+    ]
+    assert names(index.search('local', '0%')) == ['pics/100%.png']
+    assert names(index.search('local', extension='.pdf')) == ['docs/Report 2024.pdf']
+
+    # Folders the files are in are indexed too, and listed first
+    assert names(index.search('local', 'su'))[0] == 'docs/sub'
+
+
+def test_remove_drops_folder_trees(index):
+    """Tests if removing a folder removes everything below it, but not its siblings."""
+    index.add('local', [file_item('a/b/c.txt'), file_item('a/b2.txt')])
+    index.remove('local', ['a/b'])
+    assert names(index.search('local')) == ['a', 'a/b2.txt']
+
+
+def test_crawl_reconciles_with_storage(app, index, tmp_path):
+    """Tests if a crawl adds unseen files and empty folders and drops stale entries."""
+    root = tmp_path / 'files'
+    (root / 'docs' / 'empty').mkdir(parents=True)
+    (root / 'docs' / 'a.txt').write_bytes(b'abc')
+    index.add('local', [file_item('gone.txt')])
+
+    with app.app_context():
+        assert index.crawl('local', LocalStorage(str(root))) == 3
+
+    results = index.search('local')
+    assert names(results) == ['docs', 'docs/empty', 'docs/a.txt']
+    assert results[2]['size'] == 3
+
+
+def test_writes_update_the_index(app, client):
+    """Tests if uploads, new folders and deletes are searchable right away."""
+    client.post('/mkdir', data={'path': '', 'dirname': 'albums'})
+    client.post(
+        '/upload',
+        data={'file': (BytesIO(b'data'), 'Holiday.jpg'), 'path': 'albums'},
+        content_type='multipart/form-data',
+    )
+
+    response = client.get('/search?q=holi', headers={'Accept': 'application/json'})
+    assert response.json['storage'] == 'local'
+    assert names(response.json['results']) == ['albums/Holiday.jpg']
+    assert response.json['results'][0]['size'] == 4
+
+    assert b'albums/Holiday.jpg' in client.get('/search?q=holi').data
+
+    client.get('/delete/albums?folder=1')
+    response = client.get('/search?q=al', headers={'Accept': 'application/json'})
+    assert response.json['results'] == []
@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+
+# Seconds a cold create_app() may take, imports included; override on slow machines
+STARTUP_BUDGET = float(os.environ.get('STARTUP_BUDGET_SECONDS', '1.5'))
+
+STARTUP_SCRIPT = '''
+import json
+import sys
+import time
+
+started = time.perf_counter()
+from app import create_app
+
+create_app({
+    'TESTING': True,
+    'UPLOAD_FOLDER': sys.argv[1],
+    'DATA_FOLDER': sys.argv[2],
+    'STORAGE_PROVIDERS': ['local'],
+})
+print(json.dumps({
+    'seconds': time.perf_counter() - started,
+    'modules': sorted(name for name in sys.modules if name.split('.')[0] == 'cloudinary'),
+}))
+'''
+
+
+def test_cold_start_is_within_budget(tmp_path):
+    """Tests if a local-only create_app() skips the Cloudinary SDK and starts in budget."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            STARTUP_SCRIPT,
+            str(tmp_path / 'uploads'),
+            str(tmp_path / 'data'),
+        ],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    startup = json.loads(result.stdout.splitlines()[-1])
+
+    assert startup['modules'] == []
+    assert startup['seconds'] < STARTUP_BUDGET
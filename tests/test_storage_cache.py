@@ -0,0 +1,98 @@
+from io import BytesIO
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app.modules.file_manager.storage import CachedStorage
+from app.modules.file_manager.storage import LocalStorage
+from app.modules.file_manager.storage.cache import MemoryCacheBackend
+from app.modules.file_manager.storage.cache import SQLiteCacheBackend
+
+
+class CountingStorage(LocalStorage):
+    """Local storage that counts listing calls."""
+
+    def __init__(self, base_path: str):
+        """Initialize the storage with a zeroed call counter."""
+        super().__init__(base_path)
+        self.list_calls = 0
+
+    def list_items(self, path: str, *args, **kwargs):
+        """List items, counting the call."""
+        self.list_calls += 1
+        return super().list_items(path, *args, **kwargs)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cached(request, app, tmp_path):
+    """Create a cached local storage with each cache backend."""
+    if request.param == 'memory':
+        backend = MemoryCacheBackend(max_entries=100)
+    else:
+        backend = SQLiteCacheBackend(str(tmp_path / 'cache.db'), max_entries=100)
+
+    with app.app_context():
+        provider = CountingStorage(str(tmp_path / 'files'))
+        provider.create_folder('docs')
+        provider.create_folder('other')
+        yield CachedStorage(provider, backend, ttl=60)
+
+
+def upload(storage, path: str, filename: str):
+    """Upload a small file through the storage."""
+    storage.upload_file(FileStorage(stream=BytesIO(b'data'), filename=filename), path, filename)
+
+
+def test_listing_is_cached(cached):
+    """Tests if repeated listings are served from the cache."""
+    first = cached.list_items('docs')
+    assert cached.list_items('docs') == first
+    assert cached.provider.list_calls == 1
+    assert cached.name == 'local'
+
+
+def test_writes_invalidate_affected_listings(cached):
+    """Tests if uploads, folders and deletes invalidate only the affected listings."""
+    cached.list_items('docs')
+    cached.list_items('other')
+
+    upload(cached, 'docs', 'a.txt')
+    assert [item['name'] for item in cached.list_items('docs')['items']] == ['a.txt']
+    cached.list_items('other')
+    assert cached.provider.list_calls == 3
+
+    cached.create_folder('docs/sub')
+    assert len(cached.list_items('docs')['items']) == 2
+
+    cached.delete_file('docs/a.txt')
+    assert [item['name'] for item in cached.list_items('docs')['items']] == ['sub']
+
+
+def test_errors_are_not_cached(cached):
+    """Tests if failed listings are retried instead of served from the cache."""
+    assert cached.list_items('missing')['error']
+    cached.list_items('missing')
+    assert cached.provider.list_calls == 2
+
+
+def test_memory_backend_evicts_least_recently_used():
+    """Tests if the memory backend stays within its entry limit."""
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set('a', '1', ttl=60)
+    backend.set('b', '2', ttl=60)
+    backend.get('a')
+    backend.set('c', '3', ttl=60)
+
+    assert backend.get('b') is None
+    assert backend.get('a') == '1'
+    assert backend.get('c') == '3'
+
+
+def test_async_reads_share_the_cache(app, cached):
+    """Tests if async listings and usage are served from the same entries as sync ones."""
+    first = cached.list_items('docs')
+    runner = app.extensions['async_runner']
+    assert runner.run(cached.list_items_async('docs')) == first
+    assert cached.provider.list_calls == 1
+
+    assert runner.run(cached.get_storage_usage_async()) == cached.get_storage_usage()
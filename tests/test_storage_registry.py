@@ -0,0 +1,88 @@
+import pytest
+
+from app.modules.file_manager.storage import get_storage_provider
+from app.modules.file_manager.storage import LocalStorage
+from app.modules.file_manager.storage import plugins
+
+
+def test_registry_is_installed(app):
+    """Tests if create_app sets up the storage registry with a local provider."""
+    registry = app.extensions['storage_registry']
+    assert isinstance(registry.get('local'), LocalStorage)
+
+
+def test_provider_is_shared_between_requests(app):
+    """Tests if every request gets the same long-lived provider instance."""
+    with app.test_request_context('/'):
+        first = get_storage_provider()
+    with app.test_request_context('/'):
+        second = get_storage_provider()
+
+    assert first is second
+
+
+def test_local_fallback_without_cloudinary(app):
+    """Tests if local storage is used when Cloudinary is not configured."""
+    registry = app.extensions['storage_registry']
+    registry.reconfigure(CLOUDINARY={'cloud_name': None, 'api_key': None, 'api_secret': None})
+
+    assert registry.get('cloudinary') is None
+    assert isinstance(registry.get_active(), LocalStorage)
+
+
+def test_reconfigure_builds_new_instances(app):
+    """Tests if reconfiguring replaces the shared provider instances."""
+    registry = app.extensions['storage_registry']
+    before = registry.get('local')
+    registry.reconfigure()
+
+    assert registry.get('local') is not before
+
+
+def test_providers_come_from_configured_plugins(app, monkeypatch):
+    """Tests if only the plugins named in STORAGE_PROVIDERS are set up."""
+    registry = app.extensions['storage_registry']
+    credentials = {'cloud_name': 'demo', 'api_key': 'key', 'api_secret': 'secret'}
+    registry.reconfigure(STORAGE_PROVIDERS=['local'], CLOUDINARY=credentials)
+    assert registry.get('cloudinary') is None
+
+    monkeypatch.setattr(
+        plugins, 'find_entry_point', lambda name: 'tests.test_storage_registry:create_memo'
+    )
+    monkeypatch.setattr(plugins, '_factories', {})
+    registry.reconfigure(STORAGE_PROVIDERS=['local', 'memo'])
+    assert isinstance(registry.get('memo'), LocalStorage)
+
+
+def test_primary_and_fallback_come_from_config(app, monkeypatch):
+    """Tests if STORAGE_PRIMARY picks the active provider and a missing fallback fails."""
+    monkeypatch.setattr(
+        plugins, 'find_entry_point', lambda name: 'tests.test_storage_registry:create_memo'
+    )
+    monkeypatch.setattr(plugins, '_factories', {})
+    registry = app.extensions['storage_registry']
+    registry.reconfigure(STORAGE_PROVIDERS=['local', 'memo'], STORAGE_PRIMARY='memo')
+    assert registry.names() == ['local', 'memo']
+    assert registry.get_active() is registry.get('memo')
+
+    before = registry.get('memo')
+    with pytest.raises(ValueError, match='STORAGE_FALLBACK'):
+        registry.reconfigure(STORAGE_PROVIDERS=['memo'], STORAGE_PRIMARY='local')
+    assert registry.get('memo') is before
+    assert app.config['STORAGE_PROVIDERS'] == ['local', 'memo']
+    assert app.config['STORAGE_PRIMARY'] == 'memo'
+
+    registry.reconfigure(STORAGE_FALLBACK='memo')
+    assert registry.get_fallback() is registry.get('memo')
+
+
+def test_unknown_plugin_is_rejected(monkeypatch):
+    """Tests if a provider name without a built-in or installed plugin is an error."""
+    monkeypatch.setattr(plugins, 'find_entry_point', lambda name: None)
+    with pytest.raises(ValueError):
+        plugins.load_provider_factory('missing')
+
+
+def create_memo(app):
+    """Create a provider, standing in for the factory of an installed plugin."""
+    return LocalStorage(app.config['UPLOAD_FOLDER'])
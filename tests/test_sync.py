@@ -0,0 +1,199 @@
+import hashlib
+from io import BytesIO
+import os
+import time
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app.modules.file_manager.storage.signals import items_stored
+from app.modules.file_manager.sync import TokenBucket
+
+
+class StatusChecker:
+    """Status checker stand-in reporting a switchable online state."""
+
+    def __init__(self):
+        """Start offline."""
+        self.online = False
+
+    def get_status(self):
+        """Get the current status."""
+        return {'configured': True, 'online': self.online, 'last_check': time.time()}
+
+    def check_status(self):
+        """Check the status (nothing to contact)."""
+        return self.get_status()
+
+
+class RemoteStorage:
+    """Cloudinary stand-in recording the calls made to it."""
+
+    name = 'cloudinary'
+
+    def __init__(self):
+        """Start empty and offline."""
+        self.status_checker = StatusChecker()
+        self.files = {}
+        self.folders = set()
+        self.calls = []
+        self.fail = 0
+        self.etag = None
+
+    def upload_file(self, file, path, filename):
+        """Store an uploaded file, failing while ``fail`` is set."""
+        self.calls.append(('upload', f'{path}/{filename}' if path else filename))
+        if self.fail:
+            self.fail -= 1
+            return False, 'Cloudinary is unavailable'
+        public_id = f'{path}/{filename}' if path else filename
+        self.files[public_id] = file.read()
+        etag = self.etag or hashlib.md5(self.files[public_id]).hexdigest()
+        item = {'name': filename, 'is_dir': False, 'path': public_id, 'etag': etag}
+        items_stored.send(self, items=[dict(item, size=len(self.files[public_id]))])
+        return True, None
+
+    def create_folder(self, path):
+        """Create a folder."""
+        self.calls.append(('mkdir', path))
+        self.folders.add(path)
+        return True, None
+
+    def delete_items(self, paths=(), folders=()):
+        """Delete files and folders."""
+        self.calls.append(('delete', sorted(paths), list(folders)))
+        for path in paths:
+            self.files.pop(path, None)
+        self.folders.difference_update(folders)
+        return True, None
+
+    def close(self):
+        """Release nothing."""
+
+
+@pytest.fixture
+def remote(app):
+    """Register an offline Cloudinary stand-in next to local storage."""
+    remote = RemoteStorage()
+    app.extensions['storage_registry']._providers['cloudinary'] = remote
+    with app.app_context():
+        yield remote
+
+
+def store(app, path: str, content: bytes):
+    """Store a file in local storage."""
+    folder, filename = os.path.split(path)
+    file = FileStorage(stream=BytesIO(content), filename=filename)
+    assert app.extensions['storage_registry'].get('local').upload_file(file, folder, filename)[0]
+
+
+def replay(app, remote):
+    """Bring Cloudinary back online and wait for the outbox to drain."""
+    remote.status_checker.online = True
+    app.extensions['sync_engine'].wake()
+    assert app.extensions['sync_engine'].wait_idle(5)
+
+
+def test_outage_writes_are_replayed(app, remote):
+    """Tests if files and folders stored during an outage reach Cloudinary afterwards."""
+    local = app.extensions['storage_registry'].get('local')
+    engine = app.extensions['sync_engine']
+    local.create_folder('docs')
+    store(app, 'docs/a.txt', b'first')
+    store(app, 'docs/a.txt', b'second')
+    store(app, 'b.txt', b'b')
+
+    assert [(e['op'], e['path']) for e in engine.pending()] == [
+        ('mkdir', 'docs'),
+        ('upload', 'docs/a.txt'),
+        ('upload', 'b.txt'),
+    ]
+    assert remote.calls == []
+
+    replay(app, remote)
+    assert remote.folders == {'docs'}
+    assert remote.files == {'docs/a.txt': b'second', 'b.txt': b'b'}
+    assert remote.calls.index(('mkdir', 'docs')) < remote.calls.index(('upload', 'docs/a.txt'))
+    assert engine.manifest('b.txt')['size'] == 1
+
+
+def test_unchanged_files_are_not_uploaded_again(app, remote):
+    """Tests if replays skip files the manifest shows as already replicated."""
+    engine = app.extensions['sync_engine']
+    store(app, 'a.txt', b'a')
+    replay(app, remote)
+    remote.calls.clear()
+
+    full_path = app.extensions['storage_registry'].get('local').get_local_path('a.txt')
+    engine.enqueue('upload', ['a.txt'])
+    assert engine.wait_idle(5)
+    os.utime(full_path, ns=(0, 10**18))
+    engine.enqueue('upload', ['a.txt'])
+    assert engine.wait_idle(5)
+    assert remote.calls == []
+    assert engine.manifest('a.txt')['mtime_ns'] == 10**18
+
+    store(app, 'a.txt', b'changed')
+    assert engine.wait_idle(5)
+    assert remote.calls == [('upload', 'a.txt')]
+    assert engine.manifest('a.txt')['remote_etag'] == hashlib.md5(b'changed').hexdigest()
+
+    remote.etag = 'reported-by-remote'
+    store(app, 'a.txt', b'again')
+    assert engine.wait_idle(5)
+    assert engine.manifest('a.txt')['remote_etag'] == 'reported-by-remote'
+    os.utime(full_path, ns=(0, 10**18))
+    engine.enqueue('upload', ['a.txt'])
+    assert engine.wait_idle(5)
+    assert remote.calls[-2:] == [('upload', 'a.txt')] * 2
+
+
+def test_deletes_only_remove_replicated_items(app, remote):
+    """Tests if local deletes replay for replicated items and cancel queued ones."""
+    local = app.extensions['storage_registry'].get('local')
+    engine = app.extensions['sync_engine']
+    store(app, 'docs/a.txt', b'a')
+    replay(app, remote)
+
+    remote.status_checker.online = False
+    store(app, 'docs/b.txt', b'b')
+    store(app, 'c.txt', b'c')
+    local.delete_items(['docs', 'c.txt'])
+    assert sorted((e['op'], e['path']) for e in engine.pending()) == [
+        ('delete', 'c.txt'),
+        ('delete', 'docs'),
+    ]
+
+    remote.calls.clear()
+    replay(app, remote)
+    assert remote.calls == [('delete', ['docs/a.txt'], [])]
+    assert remote.files == {}
+    assert engine.manifest('docs/a.txt') is None
+
+
+def test_failed_operations_are_retried_later(app, remote):
+    """Tests if a failed replay stays in the outbox with a backoff."""
+    engine = app.extensions['sync_engine']
+    remote.fail = 1
+    store(app, 'a.txt', b'a')
+    remote.status_checker.online = True
+    engine.wake()
+
+    deadline = time.monotonic() + 5
+    while not engine.pending()[0]['attempts'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    entry = engine.pending()[0]
+    assert entry['attempts'] == 1
+    assert entry['error'] == 'Cloudinary is unavailable'
+    assert entry['next_attempt'] > time.time()
+    assert remote.files == {}
+
+
+def test_token_bucket_limits_the_rate():
+    """Tests if the bucket allows a burst, then spaces requests out."""
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve(20) == pytest.approx(2.1, abs=0.02)
+    assert TokenBucket(rate=0).reserve(10**9) == 0
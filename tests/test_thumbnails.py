@@ -0,0 +1,141 @@
+import os
+import threading
+
+from PIL import Image
+import pytest
+
+from app.modules.file_manager import thumbnails
+from app.modules.file_manager.thumbnails import content_digest
+from app.modules.file_manager.thumbnails import render_thumbnail
+from app.modules.file_manager.thumbnails import ThumbnailService
+
+
+class FakeRenderer:
+    """Renderer writing a fixed-size placeholder instead of a real thumbnail."""
+
+    def __init__(self, size: int = 100, gate: threading.Event = None):
+        """Keep the placeholder size and an optional event renders wait for."""
+        self.size = size
+        self.gate = gate
+        self.calls = 0
+
+    def __call__(self, source_path: str, target_path: str, size: int):
+        """Write the placeholder, counting the call."""
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        with open(target_path, 'wb') as f:
+            f.write(b'j' * self.size)
+
+
+def write_image(folder, name: str, content: bytes) -> str:
+    """Write an image file and return its path."""
+    path = os.path.join(str(folder), name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+
+@pytest.fixture
+def service(tmp_path):
+    """Create a thumbnail service with a fake renderer and a 250 byte cache."""
+    service = ThumbnailService(str(tmp_path / 'cache'), 250, 2, renderer=FakeRenderer())
+    yield service
+    service.shutdown()
+
+
+def test_thumbnails_are_keyed_by_content(service, tmp_path):
+    """Tests if identical images share one thumbnail and changed images get a new one."""
+    first = service.thumbnail(write_image(tmp_path, 'a.png', b'same'), 128)
+    second = service.thumbnail(write_image(tmp_path, 'b.png', b'same'), 128)
+    assert first == second
+    assert service.renderer.calls == 1
+
+    service.thumbnail(write_image(tmp_path, 'a.png', b'changed'), 128)
+    service.thumbnail(write_image(tmp_path, 'a.png', b'changed'), 512)
+    assert service.renderer.calls == 3
+
+
+def test_concurrent_requests_share_a_render(service, tmp_path):
+    """Tests if requests for a thumbnail being rendered wait for the same render."""
+    service.renderer.gate = threading.Event()
+    image = write_image(tmp_path, 'a.png', b'image')
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(service.thumbnail(image, 128)))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    service.renderer.gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(set(results)) == 1 and len(results) == 3
+    assert service.renderer.calls == 1
+
+
+def test_images_are_hashed_on_the_worker(service, tmp_path, monkeypatch):
+    """Tests if images are hashed on the worker pool, once per size and modification time."""
+    threads = []
+
+    def digest(path: str) -> str:
+        threads.append(threading.current_thread().name)
+        return content_digest(path)
+
+    monkeypatch.setattr(thumbnails, 'content_digest', digest)
+    image = write_image(tmp_path, 'a.png', b'image')
+    assert service.thumbnail(image, 128) == service.thumbnail(image, 128)
+    assert len(threads) == 1 and threads[0].startswith('thumbnails')
+
+
+def test_cache_evicts_least_recently_used(service, tmp_path):
+    """Tests if the cache is trimmed back to its size, dropping the oldest thumbnails."""
+    paths = [
+        service.thumbnail(write_image(tmp_path, f'{i}.png', bytes([i])), 128) for i in range(2)
+    ]
+    os.utime(paths[1], ns=(1, 1))  # make the second one the least recently used
+    service.thumbnail(write_image(tmp_path, 'new.png', b'new'), 128)
+
+    assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[1])
+    assert service._size == 200
+
+
+def test_thumbnail_route(app, client):
+    """Tests if local thumbnails are served with long-lived cache headers."""
+    app.extensions['thumbnails'].renderer = FakeRenderer()
+    write_image(app.config['UPLOAD_FOLDER'], 'photo.jpg', b'jpeg')
+
+    response = client.get('/thumbnail/photo.jpg?size=128&v=1')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert response.cache_control.max_age == 365 * 24 * 60 * 60
+    assert response.cache_control.public
+
+    assert client.get('/thumbnail/photo.jpg?size=64').status_code == 404
+    assert client.get('/thumbnail/missing.jpg').status_code == 404
+    write_image(app.config['UPLOAD_FOLDER'], 'notes.txt', b'text')
+    assert client.get('/thumbnail/notes.txt').status_code == 404
+
+
+def test_listing_shows_thumbnails_only_when_enabled(app, client):
+    """Tests if image rows only link thumbnails the server can render."""
+    write_image(app.config['UPLOAD_FOLDER'], 'photo.jpg', b'jpeg')
+    assert b'file-thumbnail' in client.get('/').data
+
+    app.extensions['thumbnails'].renderer = None
+    page = client.get('/').data
+    assert b'file-thumbnail' not in page
+    assert b'data-thumbnail-url' not in page
+
+
+def test_pillow_renderer(tmp_path):
+    """Tests if Pillow shrinks an image into the requested square."""
+    source = str(tmp_path / 'big.png')
+    Image.new('RGBA', (800, 400), (255, 0, 0, 128)).save(source)
+    render_thumbnail(source, str(tmp_path / 'thumb.jpg'), 128)
+
+    with Image.open(str(tmp_path / 'thumb.jpg')) as thumbnail:
+        assert thumbnail.format == 'JPEG'
+        assert thumbnail.size == (128, 64)
@@ -0,0 +1,164 @@
+import hashlib
+from io import BytesIO
+import os
+import time
+
+import pytest
+
+from app.modules.file_manager.storage import TieredStorage
+
+
+class RemoteStorage:
+    """Remote provider stand-in serving files from memory."""
+
+    name = 'remote'
+
+    def __init__(self, files):
+        """Keep the file contents by path."""
+        self.files = files
+        self.etags = {}
+        self.reads = 0
+
+    def get_resource(self, path):
+        """Describe a file the way CloudinaryStorage.get_resource does."""
+        content = self.files[path]
+        etag = self.etags.get(path, hashlib.md5(content).hexdigest())
+        return {'path': path, 'size': len(content), 'etag': etag, 'url': f'https://cdn/{path}'}
+
+    def open_file(self, item):
+        """Open a remote file, counting the read."""
+        self.reads += 1
+        return BytesIO(self.files[item['path']])
+
+    def get_file(self, path):
+        """Get the remote URL of a file."""
+        return f'https://cdn/{path}', None
+
+    def delete_file(self, path):
+        """Delete a file."""
+        del self.files[path]
+        return True, None
+
+    def close(self):
+        """Release nothing."""
+
+
+@pytest.fixture
+def tier(app, tmp_path):
+    """Create a 100 byte tier over an in-memory remote storage."""
+    remote = RemoteStorage({'a.txt': b'a' * 20, 'b.txt': b'b' * 20, 'c.txt': b'c' * 20})
+    with app.test_request_context():
+        tier = TieredStorage(remote, str(tmp_path / 'tier'), max_bytes=100)
+        yield tier
+        tier.close()
+
+
+def fetch(tier, path: str) -> bytes:
+    """Download a file that misses the tier, reading it through to the client."""
+    download = tier.open_download(path)
+    if download is None:
+        return None
+    stream, size = download
+    with stream:
+        content = b''.join(iter(lambda: stream.read(7), b''))
+    assert len(content) == size
+    return content
+
+
+def test_downloads_fill_the_tier(tier):
+    """Tests if a missed download is copied into the tier and then served locally."""
+    assert tier.get_local_path('a.txt') is None
+    assert fetch(tier, 'a.txt') == b'a' * 20
+
+    local_path = tier.get_local_path('a.txt')
+    with open(local_path, 'rb') as f:
+        assert f.read() == b'a' * 20
+    with tier.open_file({'path': 'a.txt'}) as f:
+        assert f.read() == b'a' * 20
+    assert tier.provider.reads == 1
+
+    tier.delete_file('a.txt')
+    assert tier.get_local_path('a.txt') is None
+    assert not os.path.exists(local_path)
+
+
+def test_corrupt_copies_are_rejected(tier):
+    """Tests if copies not matching the remote etag or their size are never served."""
+    tier.provider.etags['a.txt'] = 'not-the-md5'
+    fetch(tier, 'a.txt')
+    assert tier.get_local_path('a.txt') is None
+
+    fetch(tier, 'b.txt')
+    with open(tier.blob_path('b.txt'), 'ab') as f:
+        f.write(b'tampered')
+    assert tier.get_local_path('b.txt') is None
+
+
+def test_least_recently_used_copies_are_evicted(tier):
+    """Tests if the tier stays within its byte bound, dropping the oldest copies."""
+    tier.provider.files.update({'d.txt': b'd' * 20, 'big.bin': b'x' * 30})
+    for path in ('a.txt', 'b.txt', 'c.txt'):
+        fetch(tier, path)
+    tier._store.execute('UPDATE tier SET last_access = 0 WHERE path = ?', ('b.txt',))
+
+    fetch(tier, 'd.txt')
+    fetch(tier, 'a.txt')
+    tier.provider.files['e.txt'] = b'e' * 25
+    fetch(tier, 'e.txt')
+    assert tier.get_local_path('b.txt') is None
+    assert tier.get_local_path('a.txt') is not None
+
+    fetch(tier, 'big.bin')  # over a quarter of the tier
+    assert tier.get_local_path('big.bin') is None
+
+
+def test_changed_files_are_refetched(tier):
+    """Tests if a copy found stale on revalidation is replaced by the new content."""
+    fetch(tier, 'a.txt')
+    tier.provider.files['a.txt'] = b'new content'
+    tier._store.execute('UPDATE tier SET validated_at = ?', (time.time() - 7200,))
+
+    assert tier.get_local_path('a.txt') is not None  # served while revalidating
+    tier.wait(5)
+    with open(tier.get_local_path('a.txt'), 'rb') as f:
+        assert f.read() == b'new content'
+
+
+def test_download_route_streams_copies(app, client, tier):
+    """Tests if the download route streams tier copies under the file's own name."""
+    fetch(tier, 'a.txt')
+    registry = app.extensions['storage_registry']
+    registry._providers['local'] = tier
+
+    response = client.get('/download/a.txt', headers={'Range': 'bytes=0-4'})
+    assert response.status_code == 206
+    assert response.data == b'aaaaa'
+    assert 'filename=a.txt' in response.headers['Content-Disposition']
+
+
+def test_aborted_downloads_leave_no_copy(tier):
+    """Tests if a download closed early, or too large for the tier, keeps nothing."""
+    stream, _ = tier.open_download('a.txt')
+    assert stream.read(5) == b'aaaaa'
+    stream.close()
+    assert tier.get_local_path('a.txt') is None
+    assert os.listdir(os.path.dirname(tier.blob_path('a.txt'))) == []
+
+    tier.provider.files['big.bin'] = b'x' * 30
+    assert tier.open_download('big.bin') is None
+
+
+def test_download_route_reads_remote_files_once(app, client, tier):
+    """Tests if a missed download is relayed while filling the tier, then served locally."""
+    registry = app.extensions['storage_registry']
+    registry._providers['local'] = tier
+
+    response = client.get('/download/a.txt')
+    assert response.status_code == 200
+    assert response.data == b'a' * 20
+    assert response.content_length == 20
+    response.close()
+
+    response = client.get('/download/a.txt', headers={'Range': 'bytes=0-4'})
+    assert response.status_code == 206
+    assert tier.provider.reads == 1
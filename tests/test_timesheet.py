@@ -0,0 +1,70 @@
+import csv
+import io
+from io import BytesIO
+
+from app.modules.time_calculator.timesheet import calculate_timesheet
+
+
+def test_timesheet_totals_and_overtime():
+    """Tests per-row results, cross-midnight rows and per-day overtime."""
+    rows = [
+        {'date': '2024-03-04', 'start': '08:00', 'end': '12:00'},
+        {'date': '2024-03-04', 'start': '13:00', 'end': '18:30'},
+        {'date': '2024-03-05', 'start': '22:00', 'end': '02:15'},
+        {'start': '23:30', 'operation': 'add', 'hours': 1, 'minutes': 45},
+        {'start': '00:10', 'operation': 'subtract', 'duration': '26:20'},
+        {'start': '25:00', 'end': '10:00'},
+        {'start': '08:00', 'operation': 'multiply'},
+    ]
+    timesheet = calculate_timesheet(rows, daily_limit=8 * 60)
+
+    results = timesheet['rows']
+    assert [result['row'] for result in results] == list(range(len(rows)))
+    assert (results[2]['duration'], results[2]['overnight']) == ('04:15', True)
+    assert (results[3]['time'], results[3]['day_offset']) == ('01:15', 1)
+    assert (results[4]['time'], results[4]['day_offset']) == ('21:50', -2)
+    assert 'error' in results[5] and 'error' in results[6]
+
+    assert [(day['date'], day['duration'], day['overtime']) for day in timesheet['days']] == [
+        ('2024-03-04', '09:30', '01:30'),
+        ('2024-03-05', '04:15', '00:00'),
+    ]
+    totals = timesheet['totals']
+    assert (totals['minutes'], totals['overtime_minutes'], totals['errors']) == (825, 90, 2)
+
+
+def test_batch_json(client):
+    """Tests the JSON batch endpoint, its options and its rejected requests."""
+    rows = [{'start': '09:00', 'end': '17:00'}] * 5000
+    response = client.post('/time-calculator/batch', json={'rows': rows, 'daily_limit': '6:00'})
+    assert response.status_code == 200
+    totals = response.get_json()['totals']
+    assert (totals['duration'], totals['overtime']) == ('40000:00', '39994:00')
+
+    assert client.post('/time-calculator/batch', json={'rows': 'x'}).status_code == 400
+    invalid_limit = {'rows': rows, 'daily_limit': '8h'}
+    assert client.post('/time-calculator/batch', json=invalid_limit).status_code == 400
+
+
+def test_batch_csv(client):
+    """Tests CSV bodies and uploads, answered as CSV with the totals in headers."""
+    text = 'date,start,end\nmon,08:00,12:00\nmon,13:00,17:30\ntue,bad,10:00\n'
+    response = client.post('/time-calculator/batch?format=csv', data=text, content_type='text/csv')
+    assert response.status_code == 200
+    assert response.headers['X-Timesheet-Total'] == '08:30'
+    assert response.headers['X-Timesheet-Overtime'] == '00:30'
+    assert response.headers['X-Timesheet-Errors'] == '1'
+    lines = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [line['duration'] for line in lines] == ['04:00', '04:30', '']
+    assert lines[2]['error']
+
+    data = {'file': (BytesIO(text.encode()), 'week.csv')}
+    response = client.post('/time-calculator/batch', data=data, content_type='multipart/form-data')
+    assert response.get_json()['totals']['minutes'] == 510
+
+    latin1 = 'date,start,end\nterça,08:00,12:00\n'.encode('latin-1')
+    data = {'file': (BytesIO(latin1), 'week.csv')}
+    response = client.post('/time-calculator/batch', data=data, content_type='multipart/form-data')
+    assert response.status_code == 400
+    response = client.post('/time-calculator/batch', data=latin1, content_type='text/csv')
+    assert response.status_code == 400